@@ -0,0 +1,220 @@
+"""In-process IVF (inverted file) index over resume vectors (one or several per resume)."""
+import json
+import os
+import numpy as np
+
+
+def spherical_kmeans(x: np.ndarray, k: int, iters: int = 15, seed: int = 0) -> np.ndarray:
+    """Unit-length centroids for k clusters of unit-length rows (cosine k-means)."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # re-seed empty clusters with random points so every list stays useful
+        sums[empty] = x[rng.choice(len(x), size=int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Cosine-similarity IVF index with incremental inserts and deletions.
+
+    Vectors are bucketed by their nearest centroid; a query scans only the
+    `nprobe` closest buckets. Larger `nprobe` means better recall and more
+    latency; nprobe >= nlist is an exact search. Until trained the index is a
+    flat exact scan.
+
+    An id may own several vectors (a resume's chunks); it scores as its best one.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.centroids: np.ndarray | None = None
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.ids: list[str] = []
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.pos: dict[str, tuple[int, int]] = {}   # id -> its rows [start, stop)
+        self.meta: dict[str, str] = {}
+        self._size = 0
+        self._lists: tuple | None = None
+
+    def __len__(self):
+        return len(self.pos)
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    # -- building -----------------------------------------------------------------------------------------
+    def train(self, sample: np.ndarray, nlist: int | None = None):
+        """Fit centroids on a sample and re-bucket every stored vector."""
+        if nlist is None:
+            nlist = max(1, int(np.sqrt(len(sample))))
+        nlist = min(nlist, len(sample))
+        if nlist < 2:
+            return
+        self.centroids = spherical_kmeans(np.asarray(sample, dtype=np.float32), nlist)
+        if self._size:
+            self.assign[:self._size] = self._nearest(self.vectors[:self._size])
+        self._lists = None
+
+    def _nearest(self, x: np.ndarray) -> np.ndarray:
+        return np.argmax(x @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _grow(self, extra: int):
+        need = self._size + extra
+        if need <= len(self.vectors):
+            return
+        cap = max(need, 2 * len(self.vectors), 1024)
+        self.vectors = np.resize(self.vectors, (cap, self.dim))
+        self.assign = np.resize(self.assign, cap)
+        alive = np.zeros(cap, dtype=bool)
+        alive[:self._size] = self.alive[:self._size]
+        self.alive = alive
+
+    def add(self, ids: list[str], vectors: np.ndarray, counts: list[int] | None = None):
+        """
+        Insert (or replace) vectors under the given ids: `counts[i]` consecutive rows
+        of `vectors` belong to ids[i] (one each by default).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        counts = [1] * len(ids) if counts is None else counts
+        self.remove(ids)
+        self._grow(len(vectors))
+        rows = np.arange(self._size, self._size + len(vectors))
+        self.vectors[rows] = vectors
+        self.assign[rows] = self._nearest(vectors) if self.centroids is not None else 0
+        self.alive[rows] = True
+        start = self._size
+        for vid, n in zip(ids, counts):
+            self.pos[vid] = (start, start + n)
+            self.ids.extend([vid] * n)
+            start += n
+        self._size += len(vectors)
+
+    def remove(self, ids: list[str]):
+        for vid in ids:
+            span = self.pos.pop(vid, None)
+            if span is not None:
+                self.alive[span[0]:span[1]] = False
+
+    @staticmethod
+    def _spans(ids: list[str], alive: np.ndarray) -> dict[str, tuple[int, int]]:
+        """id -> rows of its live vectors, which are always consecutive."""
+        pos = {}
+        for row, vid in enumerate(ids):
+            if alive[row]:
+                pos[vid] = (pos[vid][0] if vid in pos else row, row + 1)
+        return pos
+
+    def compact(self):
+        """Drop deleted rows; done on save once they make up a noticeable share."""
+        keep = np.flatnonzero(self.alive[:self._size])
+        self.vectors = self.vectors[keep].copy()
+        self.assign = self.assign[keep].copy()
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.ids = [self.ids[i] for i in keep]
+        self.pos = self._spans(self.ids, self.alive)
+        self._size = len(keep)
+        self._lists = None
+
+    # -- querying -----------------------------------------------------------------------------------------
+    def _packed(self):
+        """
+        Live vectors copied bucket-by-bucket so a probe reads one contiguous slice.
+        Rows inserted afterwards form a small tail that is scanned flat; the copy is
+        rebuilt once that tail grows past a few percent of the index.
+        """
+        tail = self._size - (self._lists[3] if self._lists is not None else 0)
+        if self._lists is None or tail > max(2048, self._size // 20):
+            nb = max(self.nlist, 1)
+            live = np.flatnonzero(self.alive[:self._size])
+            order = live[np.argsort(self.assign[live], kind="stable")]
+            bounds = np.searchsorted(self.assign[order], np.arange(nb + 1))
+            self._lists = (order, bounds, self.vectors[order], self._size)
+        return self._lists
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 8) -> list[tuple[str, float]]:
+        """Approximate top-k ids by cosine similarity (of each id's best vector), best first."""
+        if not self.pos or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        order, bounds, packed, packed_upto = self._packed()
+
+        if self.centroids is None or nprobe >= self.nlist:
+            spans = [(0, len(order))]
+        else:
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            spans = [(bounds[c], bounds[c + 1]) for c in probe]
+        rows = [order[a:b] for a, b in spans]
+        sims = [packed[a:b] @ query for a, b in spans]
+
+        tail = np.arange(packed_upto, self._size)
+        if len(tail):
+            rows.append(tail)
+            sims.append(self.vectors[tail] @ query)
+
+        rows = np.concatenate(rows)
+        sims = np.concatenate(sims)
+        live = self.alive[rows]   # drop rows deleted since packing
+        rows, sims = rows[live], sims[live]
+        if len(rows) == 0:
+            return []
+        # widen the candidate rows until they hold k distinct ids
+        take = min(k, len(rows))
+        while True:
+            if take < len(rows):
+                best = np.argpartition(-sims, take - 1)[:take]
+            else:
+                best = np.arange(len(rows))
+            best = best[np.argsort(-sims[best], kind="stable")]
+            found: dict[str, float] = {}
+            for i in best:
+                found.setdefault(self.ids[rows[i]], float(sims[i]))
+            if len(found) >= k or take == len(rows):
+                return list(found.items())[:k]
+            take = min(len(rows), 2 * take)
+
+    # -- persistence --------------------------------------------------------------------------------------
+    def save(self, path: str):
+        """Write atomically so readers never see a half-written index."""
+        if self._size and self.alive[:self._size].mean() < 0.8:
+            self.compact()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        n = self._size
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                dim=np.int64(self.dim),
+                centroids=self.centroids if self.centroids is not None else np.zeros((0, self.dim), np.float32),
+                vectors=self.vectors[:n],
+                assign=self.assign[:n],
+                alive=self.alive[:n],
+                # plain fixed-width strings: the file loads without unpickling anything
+                ids=np.asarray(self.ids, dtype=str),
+                meta=np.asarray(json.dumps(self.meta)),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(int(data["dim"]))
+            centroids = data["centroids"]
+            index.centroids = centroids if len(centroids) else None
+            index.vectors = data["vectors"]
+            index.assign = data["assign"]
+            index.alive = data["alive"]
+            index.ids = data["ids"].tolist()
+            index.meta = json.loads(str(data["meta"]))
+        index._size = len(index.ids)
+        index.pos = cls._spans(index.ids, index.alive)
+        return index
@@ -1,25 +1,54 @@
-import spacy
-from pymongo import MongoClient
-from gridfs import GridFS
-from flask import send_file
 from bson import ObjectId
-from flask import Flask, request, render_template, redirect, url_for, flash
-from flask import abort
+from bson.errors import InvalidId
+from flask import Flask, request, render_template, redirect, url_for, flash, g
+from flask import before_render_template, template_rendered
+from flask import abort, jsonify, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_wtf import FlaskForm
 from flask_bcrypt import Bcrypt
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired, EqualTo, Email
 from dotenv import load_dotenv
+from gridfs import GridOut
+from urllib.parse import quote
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
 import os
 from flask_wtf import CSRFProtect
 from flask_wtf.csrf import generate_csrf
-from io import BytesIO
-from pdfminer.high_level import extract_text
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import PyMongoError
+import numpy as np
+import click
 import math
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import re
+from functools import wraps
+from itertools import islice
+import hashlib
+import hmac
+import ipaddress
+import uuid
+import json
+import base64
+from scoring import CandidateMatrix, StreamingTopK, blend_scores_vec, pool_segments, rank_key
+from nlp_registry import nlp_registry
+from skill_gazetteer import GazetteerExtractor, load_extra_terms, normalize_skill
+from jd_cache import JDCache, jd_fingerprint
+from embedding_service import EmbeddingOverloaded, MicroBatcher
+from resume_chunks import CHUNKER_VERSION, chunk_resume, pack_vectors, unpack_vectors
+from vector_snapshot import VectorSnapshot
+from resume_cache import ResumeFileCache
+from pdf_extract import PDFExtractor
+import pdf_extract
+import database
+import ingest
+import metrics
+from ann_index import IVFIndex
+import atexit
+import threading
+import time
 
 
 
@@ -34,6 +63,17 @@ csrf = CSRFProtect(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
+# Load spaCy up front so the first request doesn't pay for it (skip with WARM_MODELS=0)
+if os.getenv("WARM_MODELS", "1") == "1" and os.getenv("SKILL_EXTRACTOR", "ner") != "gazetteer":
+    nlp_registry.warm()
+
+# Make sure the indexes the routes rely on exist (skip with ENSURE_INDEXES=0)
+if os.getenv("ENSURE_INDEXES", "1") == "1":
+    try:
+        database.ensure_indexes()
+    except PyMongoError as e:
+        print(f"Could not ensure MongoDB indexes: {e}")
+
 # ===========================================================================================================
 # Templating Helpers
 # ===========================================================================================================
@@ -46,8 +86,7 @@ def inject_csrf_token():
 # Utility: NLP & Scoring
 # ===========================================================================================================
 
-def extract_tech(nlp, text: str) -> set[str]:
-    doc = nlp(text or "")
+def _tech_from_doc(doc) -> set[str]:
     tech = []
     for ent in doc.ents:
         if ent.label_ in ["ORG", "TECHNOLOGY", "TECH"]:
@@ -63,57 +102,1195 @@ def extract_tech(nlp, text: str) -> set[str]:
             tech.append(token)
     return set(tech)
 
+def extract_tech(nlp, text: str) -> set[str]:
+    return _tech_from_doc(nlp(text or ""))
+
+def extract_tech_batch(nlp, texts: list[str], batch_size: int = 64) -> list[set[str]]:
+    """extract_tech() over many texts via nlp.pipe."""
+    return [_tech_from_doc(doc) for doc in nlp.pipe((t or "" for t in texts), batch_size=batch_size)]
+
+# Skill extractor backend: "ner" (spaCy model), "gazetteer" (phrase matching only) or "merged" (both)
+SKILL_EXTRACTOR = os.getenv("SKILL_EXTRACTOR", "ner")
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(app.instance_path, "skills_gazetteer.txt"))
+
+_gazetteer = None
+def get_gazetteer() -> GazetteerExtractor:
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = GazetteerExtractor(load_extra_terms(GAZETTEER_PATH))
+    return _gazetteer
+
+def extract_skills_batch(texts: list[str], batch_size: int = 64) -> list[set[str]]:
+    """Skills per text from the backend selected by SKILL_EXTRACTOR."""
+    if SKILL_EXTRACTOR == "gazetteer":
+        return get_gazetteer().extract_batch(texts)
+    ner = extract_tech_batch(nlp_registry.get(), texts, batch_size=batch_size)
+    if SKILL_EXTRACTOR == "merged":
+        found = get_gazetteer().extract_batch(texts)
+        return [{normalize_skill(s) for s in a} | b for a, b in zip(ner, found)]
+    return ner
+
+def extract_skills(text: str) -> set[str]:
+    return extract_skills_batch([text])[0]
+
+def skill_extractor_version() -> str:
+    """Identifies the extractor(s) in use; changes when a model is retrained or the gazetteer rebuilt."""
+    parts = []
+    if SKILL_EXTRACTOR != "gazetteer":
+        parts.append(nlp_registry.version)
+    if SKILL_EXTRACTOR != "ner":
+        parts.append(get_gazetteer().version)
+    return "+".join(parts)
+
+# PDF parsing runs in a subprocess pool with size / page / time limits; see pdf_extract.py
+pdf_extractor = PDFExtractor(
+    engine=os.getenv("PDF_ENGINE", "pdfminer"),
+    workers=int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1)))),   # 0: parse in-process, no timeout
+    max_bytes=int(os.getenv("PDF_MAX_BYTES", str(10 << 20))),
+    max_pages=int(os.getenv("PDF_MAX_PAGES", "50")),
+    timeout=float(os.getenv("PDF_TIMEOUT", "20")),
+    parallel_pages=int(os.getenv("PDF_PARALLEL_PAGES", "8")),
+)
+atexit.register(pdf_extractor.close)
+
 def extract_pdf_text(file_storage) -> str:
-    data = file_storage.read()
+    # never buffer more than the size limit (plus one byte to detect going over it)
+    data = file_storage.stream.read(pdf_extractor.max_bytes + 1)
     file_storage.stream.seek(0)
-    return extract_text(BytesIO(data)) or ""
+    return extract_pdf_bytes(data)
+
+def extract_pdf_bytes(data: bytes) -> str:
+    """Resume text, at most RESUME_TEXT_CHARS of it; raises PDFExtractionError."""
+    with metrics.span("pdf_extract"):
+        return pdf_extractor.extract(data)
 
 # ===========================================================================================================
 # Semantic model
 # ===========================================================================================================
+SEM_MODEL_NAME = "all-MiniLM-L6-v2"
+# Bump whenever the text fed to the encoder or the normalisation changes, so
+# stored resume embeddings get recomputed by `flask backfill-embeddings`.
+SEM_MODEL_VERSION = 1
+SEM_DIM = 384
+
+# Inference runtime for the same model: torch, onnx or onnx-int8 (dynamically quantised).
+# The ONNX variants need `pip install "sentence-transformers[onnx]"`; vectors stay in the
+# same space, so stored embeddings remain valid (see benchmarks/embedding_backends.py for drift).
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_qint8_avx2.onnx"),  # or _avx512_vnni, _arm64
+}
+
+def load_sem_model(backend: str = EMBED_BACKEND) -> SentenceTransformer:
+    if backend == "torch":
+        return SentenceTransformer(SEM_MODEL_NAME)
+    if backend not in ONNX_FILES:
+        raise ValueError(f"Unknown EMBED_BACKEND {backend!r} (expected torch, onnx or onnx-int8)")
+    return SentenceTransformer(SEM_MODEL_NAME, backend="onnx",
+                               model_kwargs={"file_name": ONNX_FILES[backend]})
+
 _sem_model = None
 def get_sem_model():
     global _sem_model
     if _sem_model is None:
-        _sem_model = SentenceTransformer("all-MiniLM-L6-v2")
+        with metrics.span("sem_model_load"):
+            _sem_model = load_sem_model()
+        metrics.MODEL_LOADS.inc("sentence_transformer")
     return _sem_model
 
+def _encode_direct(texts: list[str], batch_size: int = 32) -> np.ndarray:
+    model = get_sem_model()
+    return model.encode([t or "" for t in texts], normalize_embeddings=True, batch_size=batch_size,
+                        convert_to_numpy=True).astype(np.float32)
+
+# Small encode calls from concurrent requests are coalesced into one model call (EMBED_BATCHING=0 to disable)
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))        # texts per model call
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))   # how long a batch waits to fill up
+EMBED_MAX_QUEUE = int(os.getenv("EMBED_MAX_QUEUE", "256"))       # waiting calls before new ones are rejected
+
+embedding_batcher = MicroBatcher(lambda texts: _encode_direct(texts, batch_size=EMBED_MAX_BATCH),
+                                 EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS, EMBED_MAX_QUEUE)
+
+def encode_texts(texts: list[str], batch_size: int = 32) -> np.ndarray:
+    """Unit-length embeddings, one float32 row per input text."""
+    # bulk callers already fill a batch on their own; queueing them would only stall the small ones
+    if EMBED_BATCHING and len(texts) < EMBED_MAX_BATCH:
+        return embedding_batcher.encode(texts)
+    return _encode_direct(texts, batch_size)
+
+def encode_text(text: str) -> np.ndarray:
+    return encode_texts([text])[0]
+
+# Resumes are scored on section chunks of the whole text, pooled per resume: max, mean,
+# or off (the single embedding, which only sees the start of the resume)
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "max")
+CHUNK_TAG = f"{SEM_MODEL_NAME}@{SEM_MODEL_VERSION}/chunks-v{CHUNKER_VERSION}"
+
+def embedding_fields(emb: np.ndarray, chunks: np.ndarray | None = None) -> dict:
+    """Fields stored on a candidate record for its resume embedding (and chunk matrix)."""
+    fields = {
+        "embedding": pack_vectors(np.atleast_2d(emb)),   # float16 bytes: 768 B instead of ~3.5 KB of doubles
+        "embedding_model": SEM_MODEL_NAME,
+        "embedding_version": SEM_MODEL_VERSION,
+        "embedded_at": datetime.now(timezone.utc),
+    }
+    if chunks is not None:
+        fields.update({"chunk_embeddings": pack_vectors(chunks), "chunk_count": len(chunks),
+                       "chunk_version": CHUNK_TAG})
+    return fields
+
+def embed_resumes(texts: list[str], batch_size: int = 32) -> list[dict]:
+    """embedding_fields() per resume text; whole texts and all their chunks go through one encode call."""
+    if CHUNK_POOLING == "off":
+        return [embedding_fields(emb) for emb in encode_texts(texts, batch_size)]
+    chunks = [chunk_resume(t) for t in texts]
+    embs = encode_texts(list(texts) + [c for cs in chunks for c in cs], batch_size)
+    out, offset = [], len(texts)
+    for emb, cs in zip(embs, chunks):
+        out.append(embedding_fields(emb, embs[offset:offset + len(cs)]))
+        offset += len(cs)
+    return out
+
+def decode_embedding(emb) -> np.ndarray:
+    """A stored embedding as float32: packed float16 bytes, or a list of doubles on older records
+    (rounded through float16 so both forms score identically)."""
+    if isinstance(emb, bytes):
+        return unpack_vectors(emb, SEM_DIM)[0]
+    return np.asarray(emb, dtype=np.float16).astype(np.float32)
+
+def stored_embedding(doc: dict) -> np.ndarray | None:
+    """The record's resume embedding, or None if missing or from another model."""
+    if doc.get("embedding_model") != SEM_MODEL_NAME or doc.get("embedding_version") != SEM_MODEL_VERSION:
+        return None
+    emb = doc.get("embedding")
+    if emb is None or len(emb) == 0:
+        return None
+    return decode_embedding(emb)
+
+def stored_chunks(doc: dict) -> np.ndarray | None:
+    """The record's (chunks x dim) matrix, or None if missing or from another model/chunker."""
+    if doc.get("chunk_version") != CHUNK_TAG or not doc.get("chunk_embeddings"):
+        return None
+    return unpack_vectors(doc["chunk_embeddings"], SEM_DIM)
+
+def stored_vectors(doc: dict) -> np.ndarray | None:
+    """What a record is scored with: its chunk matrix when pooling is on and it has one, else its embedding."""
+    if CHUNK_POOLING != "off":
+        chunks = stored_chunks(doc)
+        if chunks is not None:
+            return chunks
+    return stored_embedding(doc)
+
+def embedding_current(doc: dict) -> bool:
+    """Whether the record has every vector scoring uses (judged on the version fields alone); else it is due a backfill."""
+    if doc.get("embedding_model") != SEM_MODEL_NAME or doc.get("embedding_version") != SEM_MODEL_VERSION:
+        return False
+    return CHUNK_POOLING == "off" or doc.get("chunk_version") == CHUNK_TAG
+
 def coverage(jd_tech: set[str], resume_skills: set[str]) -> float:
     """Fraction of JD skills covered by the resume (0..1)."""
     if not jd_tech:
         return 0.0
     return len(jd_tech & resume_skills) / len(jd_tech)
 
+def blend_scores(sem: float, cov: float) -> tuple[float, float]:
+    """Turn semantic similarity and skill coverage (both 0..1) into rounded (similarity, success)."""
+    # blended similarity (0..100)
+    sim = 100.0 * (0.65 * sem + 0.35 * cov)
+
+    # success via logistic calibration (0..100)
+    z = 0.7 * sem + 0.3 * cov   # emphasise semantics slightly
+    success = 100.0 / (1.0 + math.exp(-4.0 * (z - 0.55)))
+    if cov == 0:
+        success = min(success, 15.0)
+
+    return round(sim, 1), round(success, 1)
+
 def combined_similarity(jd_text: str, jd_tech: set[str],
-                        resume_text: str, resume_skills: set[str]) -> tuple[float, float]:
+                        resume_text: str, resume_skills: set[str],
+                        jd_emb: np.ndarray | None = None,
+                        resume_emb: np.ndarray | None = None) -> tuple[float, float]:
     """
     Returns (similarity_score_0_100, success_rate_0_100)
     - similarity blends semantic doc similarity (65%) + JD skill coverage (35%)
     - success is a calibrated sigmoid of the same signals (probability-like)
+    Pass precomputed (normalised) embeddings to skip re-encoding the texts; resume_emb
+    may be a chunk matrix, pooled with CHUNK_POOLING.
     """
     # 1) semantic similarity (0..1)
     try:
-        model = get_sem_model()
-        jd_emb = model.encode(jd_text or "", normalize_embeddings=True)
-        rs_emb = model.encode(resume_text or "", normalize_embeddings=True)
-        sem = float(util.cos_sim(jd_emb, rs_emb))
+        if jd_emb is None:
+            jd_emb = encode_text(jd_text)
+        if resume_emb is None:
+            resume_emb = encode_text(resume_text) if CHUNK_POOLING == "off" else encode_texts(chunk_resume(resume_text))
+        vecs = np.atleast_2d(resume_emb)
+        sem = float(pool_segments(vecs @ jd_emb, np.array([0, len(vecs)]), CHUNK_POOLING)[0])
         sem = max(0.0, min(1.0, sem))
+    except EmbeddingOverloaded:
+        raise
     except Exception:
         sem = 0.0
 
     # 2) skill coverage (0..1)
     cov = coverage(jd_tech, resume_skills)
 
-    # 3) blended similarity (0..100)
-    sim = 100.0 * (0.65 * sem + 0.35 * cov)
+    return blend_scores(sem, cov)
+
+
+
+# ===========================================================================================================
+# JD analysis cache
+# ===========================================================================================================
+JD_CACHE_PATH = os.getenv("JD_CACHE_PATH", os.path.join(app.instance_path, "jd_cache.sqlite3"))
+JD_CACHE_SIZE = int(os.getenv("JD_CACHE_SIZE", "2048"))    # entries kept; 0 disables the cache
+JD_CACHE_TTL = float(os.getenv("JD_CACHE_TTL", "86400"))   # seconds
+
+jd_cache = JDCache(JD_CACHE_PATH, JD_CACHE_SIZE, JD_CACHE_TTL)
+
+def jd_analysis_version() -> str:
+    # JD vectors come from the live backend: switching it recomputes them rather than mixing
+    return f"{skill_extractor_version()}|{SEM_MODEL_NAME}-v{SEM_MODEL_VERSION}-{EMBED_BACKEND}"
+
+def score_version() -> str:
+    """What cached scores and rankings depend on: the JD analysis plus how resumes are pooled."""
+    pooling = "off" if CHUNK_POOLING == "off" else f"{CHUNK_POOLING}-c{CHUNKER_VERSION}"
+    return f"{jd_analysis_version()}|pool-{pooling}"
+
+def analyze_jds(jd_texts: list[str]) -> list[tuple[set[str], np.ndarray | None]]:
+    """
+    Lowercased skills and embedding per JD, from the shared cache when possible;
+    the misses are extracted and encoded together in one batch.
+    """
+    # keyed on the normalised text, but analysed as written, exactly as without the cache
+    keys, version = [jd_fingerprint(t) for t in jd_texts], jd_analysis_version()
+    out: list = [None] * len(jd_texts)
+    if JD_CACHE_SIZE > 0:
+        out = [jd_cache.get(key, version) for key in keys]
+
+    missing = [i for i, hit in enumerate(out) if hit is None]
+    if missing:
+        todo = [jd_texts[i] for i in missing]
+        with metrics.span("ner"):
+            skills = extract_skills_batch(todo)
+        try:
+            with metrics.span("embed"):
+                embs = list(encode_texts(todo))
+        except EmbeddingOverloaded:
+            raise
+        except Exception:
+            embs = [None] * len(todo)
+        for i, tech, emb in zip(missing, skills, embs):
+            out[i] = ({s.lower() for s in tech}, emb)
+            # a failed encode is retried next time rather than cached
+            if JD_CACHE_SIZE > 0 and emb is not None:
+                jd_cache.put(keys[i], version, out[i][0], emb)
+    return out
+
+def analyze_jd(jd_text: str) -> tuple[set[str], np.ndarray | None]:
+    return analyze_jds([jd_text])[0]
+
+# ===========================================================================================================
+# Scoring engine
+# ===========================================================================================================
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "50"))     # candidates shown per company search
+HISTORY_TOP_N = 20                                    # candidates kept per stored run
+
+MATCH_SCAN_BATCH = int(os.getenv("MATCH_SCAN_BATCH", "2000"))  # candidates pulled and scored per round-trip
+BACKFILL_PER_SEARCH = 1000                                      # stale records queued per search, at most
+
+# Only what scoring and the results page need; resume_text never leaves Mongo on the match path
+MATCH_PROJECTION = {"name": 1, "resume_id": 1, "resume_filename": 1, "resume_sha256": 1, "skills": 1,
+                    "embedding": 1, "embedding_model": 1, "embedding_version": 1}
+if CHUNK_POOLING != "off":
+    MATCH_PROJECTION.update({"chunk_embeddings": 1, "chunk_version": 1})
+
+def drop_vectors(doc: dict):
+    """Strip the vectors from a scored record; kept entries only need the display fields."""
+    doc.pop("embedding", None)
+    doc.pop("chunk_embeddings", None)
+
+def chunked(iterable, size: int):
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+# Local memory-mapped copy of the scoring vectors, shared by all workers through the page cache,
+# so a full scan doesn't pull them from Mongo (VECTOR_SNAPSHOT=0 to disable). Built by
+# `flask vector-snapshot`; after that every scan appends whatever was embedded since.
+VECTOR_SNAPSHOT = os.getenv("VECTOR_SNAPSHOT", "1") == "1"
+VECTOR_SNAPSHOT_PATH = os.getenv("VECTOR_SNAPSHOT_PATH", os.path.join(app.instance_path, "vectors"))
+SNAPSHOT_LAG = 60   # seconds re-read behind the watermark, for records written after their embedded_at
+
+vector_snapshot = VectorSnapshot(VECTOR_SNAPSHOT_PATH, SEM_DIM) if VECTOR_SNAPSHOT else None
+
+# A scan served from the snapshot fetches everything but the vectors
+SCAN_PROJECTION = {**{f: 1 for f in MATCH_PROJECTION if f not in ("embedding", "chunk_embeddings")},
+                   "chunk_version": 1}
+VECTOR_PROJECTION = {"embedding": 1, "embedding_model": 1, "embedding_version": 1,
+                     "chunk_embeddings": 1, "chunk_version": 1, "embedded_at": 1}
+
+def vector_tag() -> str:
+    """What the snapshot holds; a change (model, chunking on/off) starts a new generation."""
+    return CHUNK_TAG if CHUNK_POOLING != "off" else f"{SEM_MODEL_NAME}@{SEM_MODEL_VERSION}"
+
+def refresh_vector_snapshot(users_col, rebuild: bool = False, blocking: bool = True) -> int:
+    """Append the records embedded since the snapshot's watermark; returns how many were read."""
+    with vector_snapshot.writer(vector_tag(), rebuild=rebuild, blocking=blocking) as w:
+        if w is None:
+            return 0   # another process is already refreshing it
+        query = {"embedding_model": SEM_MODEL_NAME, "embedding_version": SEM_MODEL_VERSION}
+        if w.since is not None:
+            since = datetime.fromtimestamp(w.since - SNAPSHOT_LAG, timezone.utc).replace(tzinfo=None)
+            query["embedded_at"] = {"$gte": since}
+        read = 0
+        cursor = users_col.find(query, VECTOR_PROJECTION).sort("embedded_at", 1).batch_size(MATCH_SCAN_BATCH)
+        for batch in chunked(cursor, MATCH_SCAN_BATCH):
+            for d in batch:
+                vecs = stored_vectors(d)
+                if vecs is not None:
+                    w.add(d["_id"], d.get("embedded_at") or datetime(1970, 1, 1), vecs)
+            w.commit()
+            read += len(batch)
+        return read
+
+def current_snapshot(users_col):
+    """The snapshot view a scan should read, caught up with Mongo; None if there's no usable snapshot."""
+    if vector_snapshot is None or vector_snapshot.open().meta["tag"] != vector_tag():
+        return None
+    refresh_vector_snapshot(users_col, blocking=False)
+    return vector_snapshot.open()
+
+def snapshot_vectors(users_col, view, batch: list[dict]) -> list[np.ndarray | None]:
+    """stored_vectors() for a batch, read from the snapshot; records it lacks are fetched from Mongo."""
+    vecs = view.vectors_of(view.lookup([d["_id"] for d in batch]))
+    missing = [d["_id"] for d, v in zip(batch, vecs) if v is None and d.get("embedding_model")]
+    if missing:
+        fetched = {d["_id"]: stored_vectors(d) for d in users_col.find({"_id": {"$in": missing}}, VECTOR_PROJECTION)}
+        vecs = [fetched.get(d["_id"]) if v is None else v for d, v in zip(batch, vecs)]
+    return vecs
+
+def scan_pool(users_col, query: dict | None = None):
+    """
+    The whole pool (or the records matching `query`) as (docs, CandidateMatrix) batches of MATCH_SCAN_BATCH records.
+    Vectors come from the local snapshot when there is one. Records without a current
+    embedding score on skills alone (or, lacking chunks, on their single embedding) and
+    are queued for backfill instead of being encoded here.
+    """
+    stale = []
+    zero = np.zeros(SEM_DIM, dtype=np.float32)
+    view = current_snapshot(users_col)
+    projection = MATCH_PROJECTION if view is None else SCAN_PROJECTION
+    cursor = users_col.find(query or {}, projection).batch_size(MATCH_SCAN_BATCH)
+    for batch in chunked(cursor, MATCH_SCAN_BATCH):
+        vectors = [stored_vectors(d) for d in batch] if view is None else snapshot_vectors(users_col, view, batch)
+        embs = []
+        for d, emb in zip(batch, vectors):
+            if not embedding_current(d) and len(stale) < BACKFILL_PER_SEARCH:
+                stale.append(d["_id"])
+            embs.append(zero if emb is None else emb)
+            drop_vectors(d)
+        yield batch, CandidateMatrix.build(zip(batch, embs, (d.get("skills") for d in batch)), SEM_DIM,
+                                           CHUNK_POOLING)
+
+    if stale:
+        queue_backfill(stale)
+
+def group_key(doc: dict):
+    """Records sharing one PDF rank as a single entry."""
+    return doc.get("resume_sha256") or doc["_id"]
+
+def stream_top_k(users_col, jd_emb: np.ndarray | None, jd_tech: set[str],
+                 k: int) -> list[tuple[list[dict], float, float]]:
+    """
+    Exact top-k over the whole pool, streamed batch by batch into a bounded heap, so
+    memory does not grow with the collection. Each entry holds every record sharing that PDF.
+    """
+    top = StreamingTopK(k)
+    for batch, matrix in scan_pool(users_col):
+        sim, success = matrix.score(jd_emb, jd_tech)
+        top.add_batch(sim, success, batch, [group_key(d) for d in batch])
+    return top.results()
+
+def rank_candidates(users_col, jd_emb: np.ndarray | None, jd_tech: set[str],
+                    k: int) -> list[tuple[list[dict], float, float]]:
+    """Best k resumes for a JD: ANN shortlist + exact scores for large pools, else a streamed exact scan."""
+    shortlist = ann_shortlist_matrix(users_col, jd_emb)
+    if shortlist is not None:
+        return shortlist.top_k(jd_emb, jd_tech, k)
+    return stream_top_k(users_col, jd_emb, jd_tech, k)
+
+
+
+# ===========================================================================================================
+# Score caches
+# ===========================================================================================================
+# Records embedded up to this long before a ranking was computed are re-checked when it is reused,
+# so a record written a little after its embedded_at timestamp is not missed
+MATCH_CACHE_LAG = timedelta(minutes=5)
+
+# Fields needed to show a ranked resume (what a cached ranking is re-hydrated with)
+DISPLAY_PROJECTION = {"name": 1, "resume_id": 1, "resume_filename": 1, "resume_sha256": 1}
+
+def cached_pair_score(jd_fp: str, resume_id: ObjectId, version: str) -> dict | None:
+    return database.pair_scores().find_one(
+        {"jd_fp": jd_fp, "resume_id": resume_id, "model_version": version},
+        {"_id": 0, "similarity_score": 1, "success_rate": 1, "matched": 1},
+    )
+
+def store_pair_score(jd_fp: str, resume_id: ObjectId, version: str,
+                     similarity_score: float, success_rate: float, matched: list[str]):
+    database.pair_scores().update_one(
+        {"jd_fp": jd_fp, "resume_id": resume_id, "model_version": version},
+        {"$set": {"similarity_score": similarity_score, "success_rate": success_rate,
+                  "matched": matched, "created_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+def invalidate_resume_scores(candidate_ids: list[ObjectId], resume_ids: list[ObjectId]):
+    """Forget cached scores and rankings involving resumes that were replaced or deleted."""
+    if resume_ids:
+        database.pair_scores().delete_many({"resume_id": {"$in": resume_ids}})
+    if candidate_ids:
+        database.match_rankings().delete_many({"entries.ids": {"$in": candidate_ids}})
+        # a standing query that lost a ranked resume no longer knows its full top-k
+        database.saved_searches().update_many(
+            {"results.candidate_id": {"$in": candidate_ids}},
+            {"$pull": {"results": {"candidate_id": {"$in": candidate_ids}}}, "$set": {"needs_refresh": True}},
+        )
+
+def extend_ranking(users_col, cached: dict, jd_emb: np.ndarray, jd_tech: set[str],
+                   k: int) -> list[tuple[list[dict], float, float]] | None:
+    """
+    A cached top-k brought up to date by scoring only records embedded (or, failing
+    that, created) since it was computed. None when that can't be done exactly (a ranked resume was deleted or
+    now scores lower, so whoever should replace it is unknown) and a full run is needed.
+    """
+    entries = cached["entries"]
+    ranked_ids = [i for e in entries for i in e["ids"]]
+    shown = {d["_id"]: d for d in users_col.find({"_id": {"$in": ranked_ids}}, DISPLAY_PROJECTION)}
+    if len(shown) < len(ranked_ids):
+        return None
+
+    # group key -> [docs, similarity, success, rank key], in ranking order
+    groups = {}
+    for e in entries:
+        key = int(rank_key(np.array([e["sim"]]), np.array([e["success"]]))[0])
+        groups[e["gk"]] = [[shown[i] for i in e["ids"]], e["sim"], e["success"], key]
+    where = {i: e["gk"] for e in entries for i in e["ids"]}
+
+    # new records: embedded since, or written since without an embedding (the full scan scores those too)
+    fresh = list(users_col.find({"$or": [
+        {"embedded_at": {"$gte": cached["since"]}},
+        {"embedded_at": None, "_id": {"$gte": ObjectId.from_datetime(cached["since"])}},
+    ]}, MATCH_PROJECTION).sort("_id", 1))
+    if fresh:
+        zero = np.zeros(SEM_DIM, dtype=np.float32)
+        embs = [stored_vectors(d) for d in fresh]
+        matrix = CandidateMatrix.build(
+            zip(fresh, (zero if e is None else e for e in embs), (d.get("skills") for d in fresh)), SEM_DIM,
+            CHUNK_POOLING)
+        sim, success = matrix.score(jd_emb, jd_tech)
+        keys = rank_key(sim, success)
+        for d, m, s, key in zip(fresh, sim.tolist(), success.tolist(), keys.tolist()):
+            drop_vectors(d)
+            gk = group_key(d)
+            if d["_id"] in where:
+                if where[d["_id"]] != gk or key < groups[gk][3]:
+                    return None
+                groups[gk][1:] = [m, s, key]
+            elif gk in groups:
+                groups[gk][0].append(d)
+            else:
+                groups[gk] = [[d], m, s, key]
+
+    # stable sort: on equal scores earlier-ranked (older) resumes stay ahead, as in a full scan
+    best = sorted(groups.values(), key=lambda g: g[3], reverse=True)[:k]
+    return [(docs, m, s) for docs, m, s, _ in best]
+
+def cached_rank_candidates(users_col, jd_text: str, jd_emb: np.ndarray | None, jd_tech: set[str],
+                           k: int) -> list[tuple[list[dict], float, float]]:
+    """rank_candidates(), reusing and extending the last ranking computed for the same JD."""
+    if jd_emb is None:
+        return rank_candidates(users_col, jd_emb, jd_tech, k)
+
+    cache_id = f"{jd_fingerprint(jd_text)}:{score_version()}:{k}"
+    started = datetime.now(timezone.utc)
+    cached = database.match_rankings().find_one({"_id": cache_id})
+    top = extend_ranking(users_col, cached, jd_emb, jd_tech, k) if cached else None
+    if top is None:
+        top = rank_candidates(users_col, jd_emb, jd_tech, k)
+
+    database.match_rankings().replace_one({"_id": cache_id}, {
+        "entries": [{"gk": group_key(docs[0]), "ids": [d["_id"] for d in docs],
+                     "sim": m, "success": s} for docs, m, s in top],
+        "since": started - MATCH_CACHE_LAG,
+        "updated_at": started,
+    }, upsert=True)
+    return top
+
+
+
+# ===========================================================================================================
+# Saved searches (standing queries kept current as resumes arrive)
+# ===========================================================================================================
+SAVED_SEARCH_TOP_K = int(os.getenv("SAVED_SEARCH_TOP_K", "20"))
+
+def saved_result_rows(top: list[tuple[list[dict], float, float]], k: int) -> list[dict]:
+    """Ranked groups flattened to one stored row per candidate record, best first."""
+    rows = []
+    for group, sim, success in top:
+        key = int(rank_key(np.array([sim]), np.array([success]))[0])
+        for d in group:
+            rows.append({
+                "candidate_id": d["_id"],
+                "candidate_name": d.get("name", "Unknown"),
+                "resume_id": str(d.get("resume_id")),
+                "match_score": sim,
+                "success_rate": success,
+                "rank": key,
+            })
+    return rows[:k]
+
+def rank_floor(rows: list[dict], k: int) -> int:
+    """Rank a new resume must beat to enter a saved top-k (-1 while it has free slots)."""
+    return min(r["rank"] for r in rows) if len(rows) >= k else -1
+
+def refresh_saved_search(search: dict) -> dict:
+    """Re-analyse the JD with the current models and recompute its top-k from the whole pool."""
+    jd_tech, jd_emb = analyze_jd(search["jd_text"])
+    if jd_emb is None:
+        return search
+    top = cached_rank_candidates(database.candidates(), search["jd_text"], jd_emb, jd_tech, search["k"])
+    rows = saved_result_rows(top, search["k"])
+    fields = {
+        "jd_tech": sorted(jd_tech),
+        "jd_embedding": [float(x) for x in jd_emb],
+        "model_version": score_version(),
+        "results": rows,
+        "floor": rank_floor(rows, search["k"]),
+        "needs_refresh": False,
+        "updated_at": datetime.now(timezone.utc),
+    }
+    database.saved_searches().update_one({"_id": search["_id"]}, {"$set": fields})
+    return {**search, **fields}
+
+def saved_search_stale(search: dict) -> bool:
+    return bool(search.get("active")) and (search.get("needs_refresh") or search.get("model_version") != score_version())
+
+def queue_saved_search_refresh(search_ids: list[ObjectId]):
+    """Queue the recomputation of stale saved searches (once per search)."""
+    ingest_queue.enqueue_many("refresh_saved_search", [
+        ({"search_id": str(sid)}, f"saved:{sid}") for sid in search_ids
+    ])
+
+def update_saved_searches(docs: list[dict]):
+    """
+    Score newly written candidate records against every active standing query and
+    insert them into the saved top-k lists they make it into. One matrix product over
+    the stored JD embeddings: the cost grows with the number of saved queries, not the pool.
+    """
+    rows = [(d, stored_vectors(d)) for d in docs]
+    rows = [(d, e) for d, e in rows if e is not None]
+    if not rows:
+        return
+    searches = list(database.saved_searches().find(
+        {"active": True, "model_version": score_version()},
+        {"jd_embedding": 1, "jd_tech": 1, "k": 1, "floor": 1},
+    ))
+    if not searches:
+        return
+
+    matrix = CandidateMatrix.build(((d, e, d.get("skills")) for d, e in rows), SEM_DIM, CHUNK_POOLING)
+    queries = np.asarray([s["jd_embedding"] for s in searches], dtype=np.float32)
+    sem = matrix.semantic_many(queries).T   # resumes x searches
+
+    now = datetime.now(timezone.utc)
+    ops, touched = [], []
+    for j, search in enumerate(searches):
+        sim, success = blend_scores_vec(sem[:, j], matrix.coverage(set(search["jd_tech"])))
+        keys = rank_key(sim, success)
+        entering = np.flatnonzero(keys > search.get("floor", -1))
+        for i in entering:
+            d = matrix.payloads[i]
+            row = saved_result_rows([([d], float(sim[i]), float(success[i]))], 1)[0]
+            ops.append(UpdateOne(
+                {"_id": search["_id"], "results.candidate_id": {"$ne": d["_id"]}},
+                {"$push": {"results": {"$each": [row], "$sort": {"rank": -1}, "$slice": search["k"]}},
+                 "$set": {"updated_at": now}},
+            ))
+        if len(entering):
+            touched.append(search["_id"])
+    if not ops:
+        return
+    saved = database.saved_searches()
+    saved.bulk_write(ops, ordered=False)
+    # the entry bar moves up once a list is full
+    saved.update_many({"_id": {"$in": touched}}, [{"$set": {"floor": {"$cond": [
+        {"$gte": [{"$size": "$results"}, "$k"]}, {"$min": "$results.rank"}, -1,
+    ]}}}])
+
+
+
+# ===========================================================================================================
+# Batch matching (many JDs x the whole pool)
+# ===========================================================================================================
+BATCH_MAX_JDS = int(os.getenv("BATCH_MAX_JDS", "500"))
+
+def parse_batch_jds(items) -> list[tuple[str, str]]:
+    """(id, text) pairs from a list of strings or {"id", "text"} objects."""
+    if not isinstance(items, list) or not items:
+        raise ValueError("job_descriptions must be a non-empty list")
+    if len(items) > BATCH_MAX_JDS:
+        raise ValueError(f"at most {BATCH_MAX_JDS} job descriptions per batch")
+    jds = []
+    for i, item in enumerate(items):
+        jd_id, text = (str(item.get("id", i)), item.get("text")) if isinstance(item, dict) else (str(i), item)
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError(f"job description {jd_id} is empty")
+        jds.append((jd_id, text.strip()))
+    return jds
+
+def candidate_json(doc: dict, sim: float, success: float, jd_tech: set[str]) -> dict:
+    return {
+        "candidate_id": str(doc["_id"]),
+        "candidate_name": doc.get("name", "Unknown"),
+        "resume_id": str(doc.get("resume_id")),
+        "resume_filename": doc.get("resume_filename"),
+        "match_score": sim,
+        "success_rate": success,
+        "matched": sorted(jd_tech & {s.lower() for s in (doc.get("skills") or [])}),
+    }
+
+def batch_match(users_col, jds: list[tuple[str, str]], k: int, best_fit: int = 0):
+    """
+    Rank the whole pool against many JDs in a single scan, yielding NDJSON-ready dicts:
+    a "start" header, a "candidate" line with its best-fit JDs for every record as soon
+    as its batch is scored (when best_fit > 0), "progress" after each batch, then one
+    "jd" line with the top-k per JD and a final "done".
+    """
+    ids = [jd_id for jd_id, _ in jds]
+    analyses = analyze_jds([text for _, text in jds])
+    techs = [tech for tech, _ in analyses]
+    zero = np.zeros(SEM_DIM, dtype=np.float32)
+    jd_embs = np.vstack([zero if emb is None else emb for _, emb in analyses])
+    yield {"type": "start", "top_k": k, "jds": [
+        {"id": jd_id, "skills": sorted(tech), "encoded": emb is not None}
+        for jd_id, (tech, emb) in zip(ids, analyses)
+    ]}
+
+    tops = [StreamingTopK(k) for _ in jds]
+    best_fit = min(best_fit, len(jds))
+    scanned = 0
+    for batch, matrix in scan_pool(users_col):
+        sim, success = matrix.score_many(jd_embs, techs)    # JDs x candidates
+        keys = [group_key(d) for d in batch]
+        for j, top in enumerate(tops):
+            top.add_batch(sim[j], success[j], batch, keys)
+        if best_fit:
+            order = np.argsort(-rank_key(sim, success), axis=0, kind="stable")[:best_fit]
+            for i, d in enumerate(batch):
+                yield {
+                    "type": "candidate",
+                    "candidate_id": str(d["_id"]),
+                    "candidate_name": d.get("name", "Unknown"),
+                    "resume_id": str(d.get("resume_id")),
+                    "best_fit": [{"jd": ids[j], "match_score": float(sim[j, i]),
+                                  "success_rate": float(success[j, i])} for j in order[:, i]],
+                }
+        scanned += len(batch)
+        yield {"type": "progress", "scanned": scanned}
+
+    for jd_id, tech, top in zip(ids, techs, tops):
+        results = [candidate_json(d, m, s, tech) for group, m, s in top.results() for d in group]
+        yield {"type": "jd", "jd": jd_id, "results": results[:k]}
+    yield {"type": "done", "scanned": scanned, "jds": len(jds)}
+
+
+
+# ===========================================================================================================
+# Candidate comparison grid (several resumes x several JDs)
+# ===========================================================================================================
+COMPARE_MAX_JDS = int(os.getenv("COMPARE_MAX_JDS", "20"))
+JD_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)   # a line of dashes between pasted JDs
+
+def split_jds(text: str) -> list[str]:
+    return [part.strip() for part in JD_SEPARATOR.split(text or "") if part.strip()]
+
+def compare_grid(docs: list[dict], jd_texts: list[str]) -> list[dict]:
+    """
+    Every resume against every JD in one pass: JDs analysed together, stored resume
+    embeddings reused (missing ones encoded in one batch), one scores matrix.
+    Returns one entry per JD with its resumes ranked best first.
+    """
+    analyses = analyze_jds(jd_texts)
+    techs = [tech for tech, _ in analyses]
+    zero = np.zeros(SEM_DIM, dtype=np.float32)
+    jd_embs = np.vstack([zero if emb is None else emb for _, emb in analyses])
+
+    embs = [stored_vectors(d) for d in docs]
+    missing = [i for i, emb in enumerate(embs) if emb is None]
+    if missing:
+        try:
+            encoded = [stored_vectors(f) for f in embed_resumes([resume_text_for(docs[i])[0] for i in missing])]
+        except EmbeddingOverloaded:
+            raise
+        except Exception:
+            encoded = [zero] * len(missing)
+        for i, emb in zip(missing, encoded):
+            embs[i] = emb
+
+    matrix = CandidateMatrix.build(zip(docs, embs, (d.get("skills") for d in docs)), SEM_DIM, CHUNK_POOLING)
+    sim, success = matrix.score_many(jd_embs, techs)
+
+    grid = []
+    for j, (text, tech) in enumerate(zip(jd_texts, techs)):
+        results = []
+        for i, d in enumerate(docs):
+            res_skills = {s.lower() for s in (d.get("skills") or [])}
+            results.append({
+                "name": d.get("name"),
+                "resume_id": str(d.get("resume_id")),
+                "resume_filename": d.get("resume_filename"),
+                "score": float(sim[j, i]),
+                "success_rate": float(success[j, i]),
+                "matched": sorted(tech & res_skills),
+            })
+        results.sort(key=lambda r: (r["success_rate"], r["score"]), reverse=True)
+        grid.append({
+            "jd_text": text,
+            "jd_preview": (text[:140] + "…") if len(text) > 140 else text,
+            "jd_tech": sorted(tech),
+            "results": results,
+        })
+    return grid
 
-    # 4) success via logistic calibration (0..100)
-    z = 0.7 * sem + 0.3 * cov   # emphasise semantics slightly
-    success = 100.0 / (1.0 + math.exp(-4.0 * (z - 0.55)))
-    if cov == 0:
-        success = min(success, 15.0)
 
-    return round(sim, 1), round(success, 1)
+
+# ===========================================================================================================
+# Match API (filters + cursor pagination, shared by the JSON API and results.html)
+# ===========================================================================================================
+API_VERSION = 1
+API_MAX_TOP_K = int(os.getenv("API_MAX_TOP_K", "500"))
+API_MAX_PAGE_SIZE = 100
+MATCH_PAGE_SIZE = int(os.getenv("MATCH_PAGE_SIZE", "20"))   # rows per results.html page
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps({"r": row["rank"], "id": row["tiebreak"]}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(data["r"]), str(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("invalid cursor")
+
+def parse_match_params(params) -> dict:
+    """Validated ranking/paging options from a JSON body or form: raises ValueError with a message."""
+    def number(name, lo, hi, cast=float, default=None):
+        value = params.get(name)
+        if value in (None, ""):
+            return default
+        try:
+            if not isinstance(value, (str, int, float)):
+                raise TypeError
+            value = cast(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number")
+        if not lo <= value <= hi:
+            raise ValueError(f"{name} must be between {lo} and {hi}")
+        return value
+
+    skills = params.get("required_skills") or []
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    if not isinstance(skills, list):
+        raise ValueError("required_skills must be a list or a comma-separated string")
+    cursor = params.get("cursor") or None
+    return {
+        "top_k": number("top_k", 1, API_MAX_TOP_K, int, MATCH_TOP_K),
+        "min_success_rate": number("min_success_rate", 0, 100),
+        "min_match_score": number("min_match_score", 0, 100),
+        "required_skills": sorted({str(s).strip().lower() for s in skills if str(s).strip()}),
+        "limit": number("limit", 1, API_MAX_PAGE_SIZE, int, MATCH_PAGE_SIZE),
+        "cursor": decode_cursor(cursor) if cursor else None,
+    }
+
+def filtered_top_k(users_col, jd_emb: np.ndarray | None, jd_tech: set[str], params: dict):
+    """stream_top_k() over the records that pass the filters; required skills are matched in Mongo."""
+    query = {"skills": {"$all": params["required_skills"]}} if params["required_skills"] else {}
+    top = StreamingTopK(params["top_k"])
+    for batch, matrix in scan_pool(users_col, query):
+        sim, success = matrix.score(jd_emb, jd_tech)
+        keep = np.ones(len(batch), dtype=bool)
+        if params["min_success_rate"] is not None:
+            keep &= success >= params["min_success_rate"]
+        if params["min_match_score"] is not None:
+            keep &= sim >= params["min_match_score"]
+        idx = np.flatnonzero(keep)
+        top.add_batch(sim[idx], success[idx], [batch[i] for i in idx], [group_key(batch[i]) for i in idx])
+    return top.results()
+
+def ranked_rows(jd_text: str, jd_tech: set[str], jd_emb: np.ndarray | None, params: dict) -> list[dict]:
+    """
+    The filtered top_k as result rows in a total order (best first, ties by candidate id),
+    so a cursor taken from one page stays valid however the pool changes afterwards.
+    """
+    users_col = database.candidates()
+    if params["required_skills"] or params["min_success_rate"] is not None or params["min_match_score"] is not None:
+        top = filtered_top_k(users_col, jd_emb, jd_tech, params)
+    else:
+        top = cached_rank_candidates(users_col, jd_text, jd_emb, jd_tech, params["top_k"])
+    rows = []
+    for group, sim, success in top:
+        key = int(rank_key(np.array([sim]), np.array([success]))[0])
+        for d in group:
+            row = candidate_json(d, sim, success, jd_tech)
+            rows.append({**row, "rank": key, "tiebreak": row["candidate_id"]})
+    rows.sort(key=lambda r: (-r["rank"], r["tiebreak"]))
+    return rows[:params["top_k"]]
+
+def page_rows(rows: list[dict], cursor: tuple[int, str] | None, limit: int) -> tuple[list[dict], str | None]:
+    """One page of ranked rows after `cursor`, plus the cursor for the next page (None on the last)."""
+    if cursor is not None:
+        after = (-cursor[0], cursor[1])
+        rows = [r for r in rows if (-r["rank"], r["tiebreak"]) > after]
+    page = rows[:limit]
+    return page, (encode_cursor(page[-1]) if len(rows) > limit else None)
+
+def api_rows(page: list[dict]) -> list[dict]:
+    """Rows as returned by the API: internal ordering fields dropped."""
+    return [{k: v for k, v in r.items() if k not in ("rank", "tiebreak")} for r in page]
+
+
+
+# ===========================================================================================================
+# ANN index (shortlisting for large candidate pools)
+# ===========================================================================================================
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", os.path.join(app.instance_path, "ann_index.npz"))
+ANN_MIN_CANDIDATES = int(os.getenv("ANN_MIN_CANDIDATES", "50000"))  # below this /match scans exactly
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))          # recall/latency knob: buckets scanned per query
+ANN_SHORTLIST = int(os.getenv("ANN_SHORTLIST", "2000"))  # candidates re-scored exactly per query
+ANN_SAVE_INTERVAL = 60                                   # seconds between index snapshots
+
+_ann_index = None
+_ann_saved_at = 0.0
+# held by every reader and writer of _ann_index: add/remove/train/compact resize or rewrite
+# the arrays a concurrent search reads (re-entrant: sync trains and saves under it)
+_ann_lock = threading.RLock()
+
+def _ann_model_tag() -> str:
+    return f"{vector_tag()}/{'single' if CHUNK_POOLING == 'off' else 'chunk-mean'}"
+
+def ann_vectors(doc: dict) -> np.ndarray | None:
+    """
+    What the index holds for a record: one vector, the mean of the vectors it is scored
+    with. Its similarity is the record's mean-pooled score, so the shortlist is recalled on
+    every chunk rather than the truncated whole-resume embedding, at one row per resume;
+    the shortlist is then re-scored exactly with the chunks (max pooling included).
+    """
+    vecs = stored_vectors(doc)
+    if vecs is None:
+        return None
+    return np.atleast_2d(vecs).mean(axis=0, keepdims=True)
+
+def reset_ann_index():
+    """Forget the process-wide index and its snapshot, e.g. after the pool was replaced wholesale."""
+    global _ann_index, _ann_saved_at
+    with _ann_lock:
+        _ann_index, _ann_saved_at = None, 0.0
+        if os.path.exists(ANN_INDEX_PATH):
+            os.remove(ANN_INDEX_PATH)
+
+def get_ann_index(users_col) -> IVFIndex:
+    """
+    Process-wide index: loaded from disk once, then caught up with newly embedded resumes.
+    Callers hold _ann_lock for as long as they use the returned index.
+    """
+    global _ann_index
+    with _ann_lock:
+        if _ann_index is None:
+            try:
+                index = IVFIndex.load(ANN_INDEX_PATH)
+                if index.meta.get("model") != _ann_model_tag():
+                    index = None
+            except (OSError, ValueError, KeyError):
+                index = None
+            _ann_index = index or IVFIndex(SEM_DIM)
+            _ann_index.meta["model"] = _ann_model_tag()
+        sync_ann_index(_ann_index, users_col)
+        return _ann_index
+
+def sync_ann_index(index: IVFIndex, users_col):
+    """Insert resumes embedded since the index's watermark (uploads from any worker, backfills)."""
+    query = {"embedding_model": SEM_MODEL_NAME, "embedding_version": SEM_MODEL_VERSION}
+    since = index.meta.get("embedded_since")
+    if since:
+        # keyset on (embedded_at, _id): the last record synced is not read (and re-added) again
+        at, last_id = datetime.fromisoformat(since), ObjectId(index.meta["embedded_since_id"])
+        query["$or"] = [{"embedded_at": {"$gt": at}}, {"embedded_at": at, "_id": {"$gt": last_id}}]
+
+    with _ann_lock:
+        ids, vecs, counts, last = [], [], [], None
+        for d in users_col.find(query, VECTOR_PROJECTION).sort([("embedded_at", 1), ("_id", 1)]):
+            v = ann_vectors(d)
+            if v is not None:
+                ids.append(str(d["_id"]))
+                vecs.append(v)
+                counts.append(len(v))
+            last = d if d.get("embedded_at") else last
+        if not ids:
+            return
+        index.add(ids, np.vstack(vecs), counts)
+        if last is not None:
+            index.meta["embedded_since"] = last["embedded_at"].isoformat()
+            index.meta["embedded_since_id"] = str(last["_id"])
+        if index.centroids is None and len(index) >= ANN_MIN_CANDIDATES:
+            train_ann_index(index)
+        save_ann_index(force=False)
+
+def train_ann_index(index: IVFIndex):
+    with _ann_lock:
+        live = np.flatnonzero(index.alive[:len(index.ids)])
+        nlist = max(2, int(np.sqrt(len(live))))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(live, size=min(len(live), 32 * nlist), replace=False)
+        index.train(index.vectors[sample], nlist)
+
+def save_ann_index(force: bool = True):
+    global _ann_saved_at
+    with _ann_lock:   # save() may compact the arrays
+        if _ann_index is None:
+            return
+        if not force and time.monotonic() - _ann_saved_at < ANN_SAVE_INTERVAL:
+            return
+        try:
+            _ann_index.save(ANN_INDEX_PATH)
+            _ann_saved_at = time.monotonic()
+        except OSError as e:
+            print(f"Could not save ANN index: {e}")
+
+atexit.register(save_ann_index)
+
+def ann_shortlist_matrix(users_col, jd_emb: np.ndarray | None) -> CandidateMatrix | None:
+    """
+    CandidateMatrix of the ANN_SHORTLIST resumes nearest to the JD, or None when the
+    pool is small enough for an exact scan. Ids that no longer exist are dropped from the index.
+    """
+    # the record count is metadata: small pools never load or sync the index
+    if jd_emb is None or users_col.estimated_document_count() < ANN_MIN_CANDIDATES:
+        return None
+    with _ann_lock:
+        index = get_ann_index(users_col)
+        if len(index) < ANN_MIN_CANDIDATES:
+            return None
+        hits = [vid for vid, _ in index.search(jd_emb, ANN_SHORTLIST, nprobe=ANN_NPROBE)]
+
+    docs = list(users_col.find({"_id": {"$in": [ObjectId(h) for h in hits]}}, MATCH_PROJECTION))
+    found = {str(d["_id"]) for d in docs}
+    gone = [h for h in hits if h not in found]
+    if gone:
+        with _ann_lock:
+            index.remove(gone)
+
+    # keep collection order so ties rank exactly as in the full scan
+    docs.sort(key=lambda d: d["_id"])
+    rows = ((g, stored_vectors(g[0]), g[0].get("skills")) for g in group_duplicates(docs))
+    return CandidateMatrix.build(((g, e, sk) for g, e, sk in rows if e is not None), SEM_DIM, CHUNK_POOLING)
+
+
+
+# ===========================================================================================================
+# Resume storage (content-addressed, reference-counted)
+# ===========================================================================================================
+def resume_fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def store_resume_file(data: bytes, filename: str, sha: str) -> ObjectId:
+    """GridFS id for these bytes: an existing blob with the same hash gains a reference, else a new one."""
+    fs = database.resume_fs()
+    existing = fs.find_one({"metadata.sha256": sha})
+    if existing is None:
+        return fs.put(data, filename=filename, metadata={"sha256": sha, "refcount": 1})
+    files = database.get_client()["candidates"]["fs.files"]
+    # blobs stored before reference counting belong to exactly one record
+    files.update_one({"_id": existing._id, "metadata.refcount": {"$exists": False}},
+                     {"$set": {"metadata.refcount": 1}})
+    files.update_one({"_id": existing._id}, {"$inc": {"metadata.refcount": 1}})
+    return existing._id
+
+def release_resume_file(file_id: ObjectId):
+    """Drop one reference to a GridFS blob, deleting it with the last one."""
+    files = database.get_client()["candidates"]["fs.files"]
+    after = files.find_one_and_update({"_id": file_id}, {"$inc": {"metadata.refcount": -1}},
+                                      projection={"metadata": 1},
+                                      return_document=ReturnDocument.AFTER)
+    if after and after.get("metadata", {}).get("refcount", 0) <= 0:
+        database.resume_fs().delete(file_id)
+        if resume_cache is not None:
+            resume_cache.discard(resume_file_key(after))
+
+# Hot PDFs served by /fetch_resume are kept on local disk (RESUME_CACHE_MB=0 to disable)
+RESUME_CACHE_PATH = os.getenv("RESUME_CACHE_PATH", os.path.join(app.instance_path, "resume_cache"))
+RESUME_CACHE_MB = int(os.getenv("RESUME_CACHE_MB", "256"))
+RESUME_MAX_AGE = int(os.getenv("RESUME_MAX_AGE", "3600"))   # browsers revalidate (ETag) after this
+resume_cache = ResumeFileCache(RESUME_CACHE_PATH, RESUME_CACHE_MB << 20) if RESUME_CACHE_MB > 0 else None
+
+def resume_file_key(file_doc: dict) -> str:
+    """Content hash of a GridFS blob (its id for blobs stored before hashing): the ETag and cache key."""
+    return (file_doc.get("metadata") or {}).get("sha256") or str(file_doc["_id"])
+
+def reusable_artefacts(sha: str) -> dict | None:
+    """Text, skills and embedding already extracted from an identical PDF, if any."""
+    doc = database.candidates().find_one(
+        {"resume_sha256": sha, "embedding_model": SEM_MODEL_NAME, "embedding_version": SEM_MODEL_VERSION},
+        {"resume_text": 1, "skills": 1, "embedding": 1, "embedding_model": 1,
+         "embedding_version": 1, "embedded_at": 1, "chunk_embeddings": 1, "chunk_count": 1, "chunk_version": 1},
+    )
+    if doc is None:
+        return None
+    doc.pop("_id")
+    # the copy is new to every embedded_at watermark (ANN index, cached rankings)
+    if "embedded_at" in doc:
+        doc["embedded_at"] = datetime.now(timezone.utc)
+    return doc
+
+def group_duplicates(docs: list[dict]) -> list[list[dict]]:
+    """Records sharing one PDF, in first-seen order, so each unique resume is scored once."""
+    groups: dict[object, list[dict]] = {}
+    for d in docs:
+        groups.setdefault(group_key(d), []).append(d)
+    return list(groups.values())
+
+
+
+# ===========================================================================================================
+# Resume ingestion (runs in `flask ingest-worker` processes)
+# ===========================================================================================================
+INGEST_QUEUE_PATH = os.getenv("INGEST_QUEUE_PATH", os.path.join(app.instance_path, "ingest_queue.sqlite3"))
+ingest_queue = ingest.get_queue(INGEST_QUEUE_PATH)
+
+@ingest.handler("ingest_resume")
+def ingest_resume(payload: dict) -> dict:
+    """Parse an uploaded PDF, extract skills, embed it and write the candidate record."""
+    resume_id = ObjectId(payload["file_id"])
+    sha = payload.get("sha256")
+
+    # An identical PDF may have finished processing since this job was queued
+    artefacts = reusable_artefacts(sha) if sha else None
+    if artefacts is None:
+        # 1) Read PDF text. A PDFExtractionError fails the job; all but timeouts are not retried
+        fobj = database.resume_fs().get(resume_id)
+        pdf_text = extract_pdf_bytes(fobj.read())
+        fobj.close()
+
+        # 2) Auto-extract skills from PDF text
+        skills = sorted(list(extract_skills(pdf_text)))
+
+        # 3) Embed the resume once so matching never has to re-encode it
+        resume_text = pdf_text
+        try:
+            emb_fields = embed_resumes([resume_text])[0]
+        except Exception:
+            emb_fields = {}  # picked up later by `flask backfill-embeddings`
+        artefacts = {"resume_text": resume_text, "skills": skills, **emb_fields}
+
+    # 4) Write the record; keyed on owner + file so a retried job can't duplicate it
+    record = database.candidates().find_one_and_update(
+        {"resume_id": resume_id, "email": payload["email"]},
+        {"$set": {
+            "name": payload["name"],
+            "email": payload["email"],
+            "resume_id": resume_id,
+            "resume_filename": payload["filename"],
+            "resume_sha256": sha,
+            **artefacts,
+        }, "$setOnInsert": {"upload_id": payload.get("upload_id")}},
+        upsert=True,
+        projection={"_id": 1, "upload_id": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if record.get("upload_id") != payload.get("upload_id"):
+        # the same owner uploaded this PDF twice before either job ran: one record, one reference
+        release_resume_file(resume_id)
+    # a retried or repeated job may have replaced an existing record
+    invalidate_resume_scores([record["_id"]], [resume_id])
+    update_saved_searches([{"_id": record["_id"], "name": payload["name"], "resume_id": resume_id, **artefacts}])
+    return {"candidate_id": str(record["_id"]), "skills": len(artefacts["skills"])}
+
+def upload_record_written(payload: dict) -> bool:
+    """Whether an upload's candidate record exists, i.e. owns the reference the upload took on its PDF."""
+    return database.candidates().find_one(
+        {"resume_id": ObjectId(payload["file_id"]), "email": payload["email"]}, {"_id": 1}) is not None
+
+@ingest.on_dead_letter("ingest_resume")
+def release_failed_upload(payload: dict):
+    """An upload that failed for good drops its reference, so the PDF doesn't stay in GridFS forever."""
+    if not upload_record_written(payload):
+        release_resume_file(ObjectId(payload["file_id"]))
+
+def reacquire_failed_upload(payload: dict) -> bool:
+    """Take back the reference release_failed_upload() dropped, before the job is retried; False if the PDF is gone."""
+    if upload_record_written(payload):
+        return True
+    files = database.get_client()["candidates"]["fs.files"]
+    return files.update_one({"_id": ObjectId(payload["file_id"])},
+                            {"$inc": {"metadata.refcount": 1}}).matched_count > 0
+
+
+
+def resume_text_for(doc: dict) -> tuple[str, bool]:
+    """(resume text, whether it had to be re-extracted from the GridFS PDF)."""
+    text = (doc.get("resume_text") or "").strip()
+    if text:
+        return text, False
+    metrics.GRIDFS_FALLBACKS.inc(metrics.route())
+    try:
+        with metrics.span("gridfs_fallback"):
+            fobj = database.resume_fs().get(doc["resume_id"])
+            text = extract_pdf_bytes(fobj.read())
+            fobj.close()
+        return text, True
+    except Exception:
+        return "", False
+
+def queue_backfill(candidate_ids: list[ObjectId]):
+    """Queue text/embedding backfill for records the match path had to skip (once per record)."""
+    ingest_queue.enqueue_many("backfill_resume", [
+        ({"candidate_id": str(cid)}, f"backfill:{cid}") for cid in candidate_ids
+    ])
+
+@ingest.handler("backfill_resume")
+def backfill_resume(payload: dict) -> dict:
+    """Fill in a record's missing resume_text and/or current embedding."""
+    users_col = database.candidates()
+    doc = users_col.find_one({"_id": ObjectId(payload["candidate_id"])},
+                             {"resume_text": 1, "resume_id": 1, "embedding": 1, "embedding_model": 1,
+                              "embedding_version": 1, "chunk_embeddings": 1, "chunk_version": 1})
+    if doc is None:
+        return {"skipped": "deleted"}
+    if embedding_current(doc) and doc.get("resume_text"):
+        return {"skipped": "current"}
+
+    text, refetched = resume_text_for(doc)
+    fields = embed_resumes([text])[0]
+    if refetched:
+        fields["resume_text"] = text
+    users_col.update_one({"_id": doc["_id"]}, {"$set": fields})
+    invalidate_resume_scores([doc["_id"]], [doc["resume_id"]])
+    return {"refetched_text": refetched}
+
+@ingest.handler("refresh_saved_search")
+def refresh_saved_search_job(payload: dict) -> dict:
+    """Recompute a stale saved search's top-k from the whole pool."""
+    search = database.saved_searches().find_one({"_id": ObjectId(payload["search_id"])}, {"jd_embedding": 0})
+    if search is None:
+        return {"skipped": "deleted"}
+    if not saved_search_stale(search):
+        return {"skipped": "current"}
+    return {"results": len(refresh_saved_search(search).get("results", []))}
 
 
 
@@ -127,9 +1304,7 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(email):
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True) # Replace this with your own MongoDB url
-    db = client["login"]
-    user_data = db.users.find_one({"email": email})
+    user_data = database.users().find_one({"email": email})
     if user_data:
         return User(email=user_data["email"], user_type=user_data["user_type"])
 
@@ -148,6 +1323,137 @@ class RegistrationForm(FlaskForm):
 
 
 
+# ===========================================================================================================
+# Embedding service
+# ===========================================================================================================
+@app.errorhandler(EmbeddingOverloaded)
+def embedding_overloaded(e):
+    # shed load instead of queueing without bound; clients should retry shortly
+    if request.path.startswith("/api/"):
+        resp = jsonify({"error": "overloaded, retry shortly"})
+    else:
+        resp = Response("The matching service is busy, please retry in a moment.", mimetype="text/plain")
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "1"
+    return resp
+
+
+# /internal/* and /metrics answer only the addresses in INTERNAL_ALLOW_IPS (addresses or CIDRs,
+# loopback by default) or a request carrying "Authorization: Bearer $INTERNAL_TOKEN". A request
+# that came through a proxy (X-Forwarded-For) needs the token: its peer address is the proxy's.
+INTERNAL_ALLOW_IPS = [ipaddress.ip_network(n.strip(), strict=False)
+                      for n in os.getenv("INTERNAL_ALLOW_IPS", "127.0.0.1,::1").split(",") if n.strip()]
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "")
+
+def internal_request_allowed() -> bool:
+    if INTERNAL_TOKEN and hmac.compare_digest(request.headers.get("Authorization", "").encode(),
+                                              f"Bearer {INTERNAL_TOKEN}".encode()):
+        return True
+    if "X-Forwarded-For" in request.headers:
+        return False
+    try:
+        addr = ipaddress.ip_address(request.remote_addr or "")
+    except ValueError:
+        return False
+    return any(addr in net for net in INTERNAL_ALLOW_IPS)
+
+def internal_only(view):
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        if not internal_request_allowed():
+            abort(403)
+        return view(*args, **kwargs)
+    return guarded
+
+
+@app.route("/internal/embedding-stats")
+@internal_only
+def embedding_stats():
+    """Micro-batcher queue depth, batch sizes and rejections for this worker process."""
+    return jsonify({"pid": os.getpid(), "batching": EMBED_BATCHING, "max_batch": EMBED_MAX_BATCH,
+                    "max_wait_ms": EMBED_MAX_WAIT_MS, **embedding_batcher.stats()})
+
+
+# ===========================================================================================================
+# Metrics & request profiling
+# ===========================================================================================================
+# Per-request stage breakdown: "header" adds a Server-Timing header, "log" prints one line per
+# request (only those slower than REQUEST_PROFILE_MIN_MS); both may be given, comma-separated
+REQUEST_PROFILE = {m.strip() for m in os.getenv("REQUEST_PROFILE", "").split(",") if m.strip()}
+REQUEST_PROFILE_MIN_MS = float(os.getenv("REQUEST_PROFILE_MIN_MS", "0"))
+
+@app.before_request
+def start_trace():
+    metrics.begin(request.endpoint or "unmatched")
+
+
+@app.after_request
+def finish_trace(resp):
+    done = metrics.end(request.method, resp.status_code)
+    if done is None:
+        return resp
+    trace, total = done
+    if "header" in REQUEST_PROFILE:
+        resp.headers["Server-Timing"] = trace.server_timing(total)
+    if "log" in REQUEST_PROFILE and total * 1000 >= REQUEST_PROFILE_MIN_MS:
+        print(trace.log_line(request.method, request.path, resp.status_code, total))
+    return resp
+
+
+@app.teardown_request
+def drop_trace(exc):
+    # an unhandled error skips after_request; don't let the trace leak into this thread's next request
+    metrics.end(request.method, 500)
+
+
+@before_render_template.connect_via(app)
+def render_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def render_finished(sender, template, context, **extra):
+    started = g.pop("render_started", None)
+    if started is not None:
+        metrics.record("render", time.perf_counter() - started)
+
+
+@metrics.register_collector
+def embedding_batcher_metrics():
+    s = embedding_batcher.stats()
+    return [
+        ("matchwise_embedding_queue_depth", "gauge", "Encode calls waiting for the batcher.", s["queue_depth"]),
+        ("matchwise_embedding_requests_total", "counter", "Encode calls sent to the batcher.", s["requests"]),
+        ("matchwise_embedding_texts_total", "counter", "Texts encoded by the batcher.", s["texts"]),
+        ("matchwise_embedding_batches_total", "counter", "Model calls made by the batcher.", s["batches"]),
+        ("matchwise_embedding_rejected_total", "counter", "Encode calls rejected as overloaded.", s["rejected"]),
+        ("matchwise_embedding_failures_total", "counter", "Batches whose model call failed.", s["failures"]),
+        ("matchwise_embedding_queue_wait_seconds_total", "counter", "Time encode calls spent queued.",
+         s["queue_wait_seconds"]),
+        ("matchwise_embedding_encode_seconds_total", "counter", "Time spent in batched model calls.",
+         s["encode_seconds"]),
+    ]
+
+
+@metrics.register_collector
+def resume_cache_metrics():
+    if resume_cache is None:
+        return []
+    s = resume_cache.stats()
+    return [
+        ("matchwise_resume_cache_hits_total", "counter", "Resume downloads served from local disk.", s["hits"]),
+        ("matchwise_resume_cache_misses_total", "counter", "Resume downloads read from GridFS.", s["misses"]),
+        ("matchwise_resume_cache_evictions_total", "counter", "Cached resume files evicted.", s["evictions"]),
+    ]
+
+
+@app.route("/metrics")
+@internal_only
+def metrics_endpoint():
+    """Prometheus text exposition for this worker process."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 # ===========================================================================================================
 # Routes: Auth
 # ===========================================================================================================
@@ -155,9 +1461,7 @@ class RegistrationForm(FlaskForm):
 def login():
     form = LoginForm()
     if form.validate_on_submit():
-        client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-        db = client["login"]
-        user = db.users.find_one({"email": form.email.data})
+        user = database.users().find_one({"email": form.email.data})
         matched = bcrypt.check_password_hash(user['password'], form.password.data)
         
         if user and matched:
@@ -183,9 +1487,7 @@ def register():
         }
 
         # Insert the new user data into database
-        client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-        db = client["login"]
-        db.users.insert_one(new_user)
+        database.users().insert_one(new_user)
 
         print("CREATED")
         return redirect(url_for('login'))
@@ -233,6 +1535,72 @@ def upload_form():
 
 
 
+# ===========================================================================================================
+# History views (keyset pages + aggregate summaries)
+# ===========================================================================================================
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "25"))
+HISTORY_SUMMARY_WEEKS = int(os.getenv("HISTORY_SUMMARY_WEEKS", "12"))
+WEEK_MS = 7 * 86400 * 1000
+EPOCH_MONDAY = datetime(1970, 1, 5)   # weeks are bucketed Monday to Sunday, UTC
+
+# Only what the tables show; a company run brings its top 3 rather than all stored results
+COMPARE_HISTORY_PROJECTION = {"compared_at": 1, "resume_id": 1, "resume_filename": 1, "jd_text": 1, "jd_tech": 1,
+                              "matched_skills": 1, "similarity_score": 1, "success_rate": 1}
+MATCH_HISTORY_PROJECTION = {"ran_at": 1, "jd_text": 1, "jd_tech": 1, "results": {"$slice": 3}}
+
+def encode_history_cursor(doc: dict, field: str) -> str:
+    raw = json.dumps({"t": doc[field].isoformat(), "id": str(doc["_id"])}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_history_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(data["t"]), ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("invalid cursor")
+
+def history_page(col, field: str, projection: dict, cursor: str | None) -> tuple[list[dict], str | None]:
+    """
+    One page of the user's history, newest first, continuing after `cursor`. The
+    (email, field, _id) index serves the sort, so a page costs the same however deep it is.
+    """
+    query = {"email": current_user.id}
+    if cursor:
+        at, oid = decode_history_cursor(cursor)
+        query["$or"] = [{field: {"$lt": at}}, {field: at, "_id": {"$lt": oid}}]
+    docs = list(col.find(query, projection).sort([(field, -1), ("_id", -1)]).limit(HISTORY_PAGE_SIZE + 1))
+    more = len(docs) > HISTORY_PAGE_SIZE
+    docs = docs[:HISTORY_PAGE_SIZE]
+    return docs, encode_history_cursor(docs[-1], field) if more and docs[-1].get(field) else None
+
+def history_summary(col, field: str, success_expr, skills_field: str) -> dict:
+    """Runs per week, average success rate and the most frequent skills over recent weeks, in one aggregation."""
+    since = datetime.now(timezone.utc) - timedelta(weeks=HISTORY_SUMMARY_WEEKS)
+    week = {"$subtract": [f"${field}", {"$mod": [{"$subtract": [f"${field}", EPOCH_MONDAY]}, WEEK_MS]}]}
+    out = next(col.aggregate([
+        {"$match": {"email": current_user.id, field: {"$gte": since}}},
+        {"$facet": {
+            "weeks": [{"$group": {"_id": week, "runs": {"$sum": 1}}}, {"$sort": {"_id": 1}}],
+            "totals": [{"$group": {"_id": None, "runs": {"$sum": 1}, "avg_success": {"$avg": success_expr}}}],
+            "skills": [{"$unwind": f"${skills_field}"},
+                       {"$group": {"_id": f"${skills_field}", "count": {"$sum": 1}}},
+                       {"$sort": {"count": -1, "_id": 1}}, {"$limit": 10}],
+        }},
+    ]), {})
+    totals = (out.get("totals") or [{}])[0]
+    return {
+        "weeks": [{"week": w["_id"], "runs": w["runs"]} for w in out.get("weeks", [])],
+        "runs": totals.get("runs", 0),
+        "avg_success": round(totals["avg_success"], 1) if totals.get("avg_success") is not None else None,
+        "skills": [{"skill": s["_id"], "count": s["count"]} for s in out.get("skills", [])],
+        "since_weeks": HISTORY_SUMMARY_WEEKS,
+    }
+
+def jd_preview(text: str | None, n: int) -> str:
+    text = (text or "").strip()
+    return (text[:n] + "…") if len(text) > n else text
+
+
 # ===========================================================================================================
 # Routes: Candidate – Upload, Compare, History
 # ===========================================================================================================
@@ -240,7 +1608,7 @@ def upload_form():
 @login_required
 def upload():
     if request.method == "GET":
-        return render_template("upload.html")
+        return render_template("upload.html", job_id=request.args.get("job"), resumes=my_resumes())
 
     # Use the authenticated user
     email = current_user.id
@@ -249,43 +1617,109 @@ def upload():
     resume_file = request.files.get("resume")
     if not resume_file:
         flash("Please choose a PDF to upload.", "warning")
-        return render_template("upload.html")
-
-    # 1) Read PDF text
-    try:
-        pdf_text = extract_pdf_text(resume_file)
-    except Exception as e:
+        return render_template("upload.html", resumes=my_resumes())
+
+    with metrics.span("read_upload"):
+        data = resume_file.stream.read(pdf_extractor.max_bytes + 1)
+    if len(data) > pdf_extractor.max_bytes:
+        flash(f"That PDF is too large (the limit is {pdf_extractor.max_bytes / (1 << 20):.3g} MB).", "danger")
+        return render_template("upload.html", resumes=my_resumes())
+    if not data.startswith(b"%PDF"):
         flash("Could not read that PDF. Please upload a text-based PDF.", "danger")
-        return render_template("upload.html")
+        return render_template("upload.html", resumes=my_resumes())
+
+    # Identical bytes share one GridFS blob and one set of extracted artefacts
+    sha = resume_fingerprint(data)
+    users = database.candidates()
+    with metrics.span("dedupe"):
+        duplicate = users.find_one({"email": email, "resume_sha256": sha}, {"_id": 1})
+    if duplicate:
+        flash("You have already uploaded this resume.", "info")
+        return redirect(url_for("upload"))
+
+    with metrics.span("gridfs_store"):
+        resume_id = store_resume_file(data, resume_file.filename, sha)
+    with metrics.span("reuse_lookup"):
+        artefacts = reusable_artefacts(sha)
+    if artefacts is not None:
+        record = {
+            "name": name,
+            "email": email,
+            "resume_id": resume_id,
+            "resume_filename": resume_file.filename,
+            "resume_sha256": sha,
+            **artefacts,
+        }
+        with metrics.span("store_record"):
+            users.insert_one(record)
+        with metrics.span("saved_searches"):
+            update_saved_searches([record])
+        flash("Resume uploaded and skills extracted automatically.", "success")
+        return redirect(url_for("upload"))
+
+    # New content: hand parsing, NER and embedding to the ingest workers
+    with metrics.span("enqueue"):
+        job_id = ingest_queue.enqueue("ingest_resume", {
+            "upload_id": uuid.uuid4().hex,
+            "file_id": str(resume_id),
+            "sha256": sha,
+            "email": email,
+            "name": name,
+            "filename": resume_file.filename,
+        })
+
+    flash("Resume uploaded. We're extracting your skills now.", "success")
+    return redirect(url_for("upload", job=job_id))
+
+
+def my_resumes() -> list[dict]:
+    """The current candidate's resumes for the upload page."""
+    docs = database.candidates().find({"email": current_user.id}, {"resume_id": 1, "resume_filename": 1})
+    return [{"id": str(d["resume_id"]), "label": d.get("resume_filename") or str(d["resume_id"])} for d in docs]
+
 
-    # 2) Load spaCy
+@app.route("/candidate/resume/delete/<resume_id>", methods=["POST"])
+@login_required
+def delete_resume(resume_id):
+    if current_user.user_type != 'candidate':
+        abort(403)
     try:
-        nlp = spacy.load("model_upgrade")
+        rid = ObjectId(resume_id)
     except Exception:
-        nlp = spacy.load("en_core_web_sm")
-
-    # 3) Auto-extract skills from PDF text
-    skills = sorted(list(extract_tech(nlp, pdf_text)))
-
-    # 4) Save file to GridFS + record to Mongo
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-    fs = GridFS(db)
-
-    resume_id = fs.put(resume_file, filename=resume_file.filename)
-
-    users = db["candidates"]
-    users.insert_one({
-        "name": name,
-        "email": email,
-        "skills": skills,
-        "resume_id": resume_id,
-        "resume_filename": resume_file.filename,
-        "resume_text": (pdf_text or "")[:50000]
+        abort(404)
+
+    doc = database.candidates().find_one_and_delete({"email": current_user.id, "resume_id": rid})
+    if not doc:
+        abort(404)
+    release_resume_file(rid)
+    invalidate_resume_scores([doc["_id"]], [rid])
+    with _ann_lock:
+        if _ann_index is not None:
+            _ann_index.remove([str(doc["_id"])])
+
+    flash("Resume deleted.", "success")
+    return redirect(url_for("upload"))
+
+
+@app.route("/upload/status/<job_id>")
+@login_required
+def upload_status(job_id):
+    job = ingest_queue.get(job_id)
+    if not job or job["payload"].get("email") != current_user.id:
+        abort(404)
+    return jsonify({
+        "job_id": job_id,
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "error": job["error"] if job["status"] == ingest.FAILED else None,
+        "reason": failure_reason(job["error"]) if job["status"] == ingest.FAILED else None,
     })
 
-    flash("Resume uploaded and skills extracted automatically.", "success")
-    return redirect(url_for("upload"))
+
+def failure_reason(error: str | None) -> str | None:
+    """What to tell the uploader about a failed job (errors are stored as "Type: code: detail")."""
+    m = re.match(r"PDFExtractionError: (\w+)", error or "")
+    return pdf_extract.MESSAGES.get(m.group(1)) if m else None
 
 
 @app.route('/candidate/compare', methods=['GET', 'POST'])
@@ -294,18 +1728,11 @@ def candidate_compare():
     if current_user.user_type != 'candidate':
         abort(403)
 
-    # Load spaCy
-    try:
-        nlp = spacy.load("model_upgrade")
-    except Exception:
-        nlp = spacy.load("en_core_web_sm")
-
     # Fetch only this user's resumes for the dropdown
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-    users = db["candidates"]
+    users = database.candidates()
 
-    my_docs = list(users.find({"email": current_user.id}))
+    with metrics.span("load_resumes"):
+        my_docs = list(users.find({"email": current_user.id}))
     options = []
     for d in my_docs:
         rid = str(d.get("resume_id"))
@@ -316,45 +1743,83 @@ def candidate_compare():
             jd_text = request.form.get('job_description', '').strip()
             chosen = request.form.get('resume_id', '').strip()
 
-            if not jd_text:
+            all_resumes = request.form.get('all_resumes') == '1'
+            jd_texts = split_jds(jd_text)
+
+            if not jd_texts:
                 flash('Please paste a job description.', 'warning')
                 return render_template('candidate_compare.html', options=options)
 
-            if not chosen:
-                flash('Please select one of your resumes.', 'warning')
+            if len(jd_texts) > COMPARE_MAX_JDS:
+                flash(f'Please compare at most {COMPARE_MAX_JDS} job descriptions at once.', 'warning')
                 return render_template('candidate_compare.html', options=options, jd_text=jd_text)
 
-            # Fetch the selected resume
-            try:
-                rid_obj = ObjectId(chosen)
-            except Exception:
-                flash('Invalid resume selection.', 'danger')
+            if not chosen and not all_resumes:
+                flash('Please select one of your resumes.', 'warning')
                 return render_template('candidate_compare.html', options=options, jd_text=jd_text)
 
-            doc = users.find_one({"email": current_user.id, "resume_id": rid_obj})
-            if not doc:
-                flash('That resume was not found in your account.', 'danger')
-                return render_template('candidate_compare.html', options=options, jd_text=jd_text)
+            if all_resumes:
+                if not my_docs:
+                    flash('Please upload a resume first.', 'warning')
+                    return render_template('candidate_compare.html', options=options, jd_text=jd_text)
+                doc = None
+            else:
+                # Fetch the selected resume
+                try:
+                    rid_obj = ObjectId(chosen)
+                except Exception:
+                    flash('Invalid resume selection.', 'danger')
+                    return render_template('candidate_compare.html', options=options, jd_text=jd_text)
+
+                doc = next((d for d in my_docs if d.get("resume_id") == rid_obj), None)
+                if not doc:
+                    flash('That resume was not found in your account.', 'danger')
+                    return render_template('candidate_compare.html', options=options, jd_text=jd_text)
+
+            # Several JDs and/or every resume: score the whole grid in one batched pass
+            if all_resumes or len(jd_texts) > 1:
+                with metrics.span("score"):
+                    grid = compare_grid(my_docs if all_resumes else [doc], jd_texts)
+                now = datetime.now(timezone.utc)
+                with metrics.span("history_write"):
+                    database.compare_history().insert_many([{
+                        "email": current_user.id,
+                        "resume_id": ObjectId(r["resume_id"]),
+                        "resume_filename": r["resume_filename"],
+                        "jd_text": g["jd_text"][:4000],
+                        "jd_tech": g["jd_tech"],
+                        "matched_skills": r["matched"],
+                        "similarity_score": r["score"],
+                        "success_rate": r["success_rate"],
+                        "compared_at": now,
+                    } for g in grid for r in g["results"]])
+                return render_template('candidate_compare.html', options=options, jd_text=jd_text,
+                                       all_resumes=all_resumes, grid=grid)
 
             # lowercased sets + semantic + coverage
-            jd_tech = {s.lower() for s in extract_tech(nlp, jd_text)}
+            with metrics.span("jd_analysis"):
+                jd_tech, jd_emb = analyze_jd(jd_text)
             res_skills = {s.lower() for s in (doc.get('skills') or [])}
 
-            # resume_text (fallback to GridFS if missing)
-            resume_text = (doc.get("resume_text") or "").strip()
-            if not resume_text:
-                try:
-                    fs = GridFS(client["candidates"])
-                    fobj = fs.get(doc["resume_id"])
-                    pdf_bytes = fobj.read()
-                    fobj.close()
-                    resume_text = extract_text(BytesIO(pdf_bytes)) or ""
-                except Exception:
-                    resume_text = ""
-
-            similarity_score, success_rate = combined_similarity(
-                jd_text, jd_tech, resume_text, res_skills
-            )
+            # A resubmitted pair is served from the score cache
+            jd_fp, version = jd_fingerprint(jd_text), score_version()
+            with metrics.span("score_cache"):
+                cached = cached_pair_score(jd_fp, doc["resume_id"], version)
+            if cached:
+                similarity_score, success_rate = cached["similarity_score"], cached["success_rate"]
+                matched = cached["matched"]
+            else:
+                # resume_text (fallback to GridFS if missing)
+                resume_text, _ = resume_text_for(doc)
+
+                with metrics.span("score"):
+                    similarity_score, success_rate = combined_similarity(
+                        jd_text, jd_tech, resume_text, res_skills,
+                        jd_emb=jd_emb, resume_emb=stored_vectors(doc),
+                    )
+                matched = sorted(list(jd_tech & res_skills))
+                if jd_emb is not None:
+                    store_pair_score(jd_fp, doc["resume_id"], version, similarity_score, success_rate, matched)
 
             result = {
                 "name": doc.get("name"),
@@ -363,7 +1828,7 @@ def candidate_compare():
                 "resume_filename": doc.get("resume_filename"),
                 "score": similarity_score,      # uses new blend
                 "success_rate": success_rate,   # probability-like
-                "matched": sorted(list(jd_tech & res_skills)),
+                "matched": matched,
             }
 
             # Save compare history
@@ -378,7 +1843,8 @@ def candidate_compare():
                 "success_rate": success_rate,
                 "compared_at": datetime.now(timezone.utc)  # store as UTC datetime
             }
-            db["compare_history"].insert_one(history)
+            with metrics.span("history_write"):
+                database.compare_history().insert_one(history)
 
 
             return render_template(
@@ -398,25 +1864,25 @@ def candidate_history():
     if current_user.user_type != 'candidate':
         abort(403)
 
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-
-    records = list(
-        db["compare_history"]
-        .find({"email": current_user.id})
-        .sort("compared_at", -1)
-    )
+    col = database.compare_history()
+    try:
+        records, next_cursor = history_page(col, "compared_at", COMPARE_HISTORY_PROJECTION,
+                                            request.args.get("cursor"))
+    except ValueError:
+        return redirect(url_for('candidate_history'))
+    summary = None
+    if request.args.get("summary") == "1":
+        summary = history_summary(col, "compared_at", "$success_rate", "matched_skills")
 
     # normalise for template
     for r in records:
         r["_id"] = str(r.get("_id"))
         rid = r.get("resume_id")
         r["resume_id_str"] = str(rid) if rid else None
-        # short preview for the JD
-        jdt = (r.get("jd_text") or "").strip()
-        r["jd_preview"] = (jdt[:140] + "…") if len(jdt) > 140 else jdt
+        r["jd_preview"] = jd_preview(r.pop("jd_text", None), 140)
 
-    return render_template("candidate_history.html", records=records)
+    return render_template("candidate_history.html", records=records, next_cursor=next_cursor,
+                           first_page=not request.args.get("cursor"), summary=summary)
 
 
 @app.route('/candidate/history/clear', methods=['POST'])
@@ -425,10 +1891,7 @@ def clear_candidate_history():
     if current_user.user_type != 'candidate':
         abort(403)
 
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-
-    db["compare_history"].delete_many({"email": current_user.id})
+    database.compare_history().delete_many({"email": current_user.id})
 
     flash("Your comparison history has been cleared.", "success")
     return redirect(url_for('candidate_history'))
@@ -450,82 +1913,63 @@ def match():
             flash("Please paste a job description.", "warning")
             return render_template('job_desc.html')
 
-        # Load spaCy
         try:
-            nlp = spacy.load("model_upgrade")
-        except Exception:
-            nlp = spacy.load("en_core_web_sm")
+            params = parse_match_params(request.form)
+        except ValueError as e:
+            flash(f"Invalid filter: {e}", "warning")
+            return render_template('job_desc.html')
 
-        # Extract JD technologies (set of lowercased strings)
-        jd_tech = {s.lower() for s in extract_tech(nlp, job_description)}
+        # JD technologies (lowercased) and embedding, computed once per distinct JD;
+        # resumes carry their own stored embedding
+        with metrics.span("jd_analysis"):
+            jd_tech, jd_emb = analyze_jd(job_description)
 
-        client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-        db = client["candidates"]
-        users_col = db["candidates"]
-        fs = GridFS(db)
+        # Same engine as the JSON API: rank (a repeated JD only scores new resumes), then one page
+        with metrics.span("rank"):
+            rows = ranked_rows(job_description, jd_tech, jd_emb, params)
+        page, next_cursor = page_rows(rows, params["cursor"], params["limit"])
 
         matched_resumes = []
-        for user in users_col.find({}):
-            resume_skills = {s.lower() for s in (user.get("skills") or [])}
-
-            # Get stored resume text (fallback to GridFS read if missing)
-            resume_text = (user.get("resume_text") or "").strip()
-            if not resume_text:
-                try:
-                    fobj = fs.get(user["resume_id"])
-                    pdf_bytes = fobj.read()
-                    fobj.close()
-                    resume_text = extract_text(BytesIO(pdf_bytes)) or ""
-                except Exception:
-                    resume_text = ""
-
-            # Compute blended scores
-            similarity_score, success_rate = combined_similarity(
-                job_description,
-                jd_tech,
-                resume_text,
-                resume_skills
-            )
-
+        for r in page:
             matched_resumes.append({
-                "candidate_name": user.get("name", "Unknown"),
-                "match_score": similarity_score,
-                "success_rate": success_rate,
+                "candidate_name": r["candidate_name"],
+                "match_score": r["match_score"],
+                "success_rate": r["success_rate"],
                 "job": {
                     "description": job_description,
                     "skills": sorted(list(jd_tech)),
                 },
-                "resume_url": url_for('fetch_resume', resume_id=str(user.get("resume_id"))),
+                "resume_url": url_for('fetch_resume', resume_id=r["resume_id"], candidate=r["candidate_id"]),
             })
 
-        # Sort by success then similarity
-        matched_resumes = sorted(
-            matched_resumes,
-            key=lambda r: (r["success_rate"], r["match_score"]),
-            reverse=True
-        )
-
-        # Keep only the essentials + limit top 20 to keep docs small
-        history_results = []
-        for r in matched_resumes[:20]:
-            history_results.append({
-                "candidate_name": r.get("candidate_name"),
-                "resume_id": r.get("resume_url").rsplit("/", 1)[-1] if r.get("resume_url") else None,
-                "resume_filename": None,
-                "match_score": r.get("match_score"),
-                "success_rate": r.get("success_rate"),
-                "jd_skills": r.get("job", {}).get("skills", []),
-            })
-
-        db["company_match_history"].insert_one({
-            "email": current_user.id,
-            "jd_text": job_description[:3000],
-            "jd_tech": sorted(list(jd_tech)),
-            "results": history_results,
-            "ran_at": datetime.now(timezone.utc),
-        })
-
-        return render_template("results.html", matched_resumes=matched_resumes)
+        # Record the run once, from its first page: keep only the essentials + limit top 20
+        if params["cursor"] is None:
+            history_results = []
+            for r in rows[:HISTORY_TOP_N]:
+                history_results.append({
+                    "candidate_name": r["candidate_name"],
+                    "candidate_id": r["candidate_id"],
+                    "resume_id": r["resume_id"],
+                    "resume_filename": r["resume_filename"],
+                    "match_score": r["match_score"],
+                    "success_rate": r["success_rate"],
+                    "jd_skills": sorted(list(jd_tech)),
+                })
+
+            with metrics.span("history_write"):
+                database.company_match_history().insert_one({
+                    "email": current_user.id,
+                    "jd_text": job_description[:3000],
+                    "jd_tech": sorted(list(jd_tech)),
+                    "results": history_results,
+                    "ran_at": datetime.now(timezone.utc),
+                })
+
+        # rank numbers continue across pages
+        first_rank = rows.index(page[0]) + 1 if page else 1
+        return render_template("results.html", matched_resumes=matched_resumes, first_rank=first_rank,
+                               total=len(rows), next_cursor=next_cursor, job_description=job_description,
+                               filters=request.form)
 
     # GET
     return render_template('job_desc.html')
@@ -537,30 +1981,53 @@ def company_history():
     if current_user.user_type != 'company':
         abort(403)
 
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-
-    runs = list(
-        db["company_match_history"]
-        .find({"email": current_user.id})
-        .sort("ran_at", -1)
-    )
+    col = database.company_match_history()
+    try:
+        runs, next_cursor = history_page(col, "ran_at", MATCH_HISTORY_PROJECTION, request.args.get("cursor"))
+    except ValueError:
+        return redirect(url_for('company_history'))
+    summary = None
+    if request.args.get("summary") == "1":
+        # success rate of each run's best candidate; skills are the ones the JDs asked for
+        summary = history_summary(col, "ran_at", {"$arrayElemAt": ["$results.success_rate", 0]}, "jd_tech")
 
     # normalise for template
     for r in runs:
         r["_id"] = str(r.get("_id"))
-        jdt = (r.get("jd_text") or "").strip()
-        r["jd_preview"] = (jdt[:180] + "…") if len(jdt) > 180 else jdt
-        # pre-compute “top 3” for the table
-        top = (r.get("results") or [])[:3]
+        r["jd_preview"] = jd_preview(r.pop("jd_text", None), 180)
+        # the projection already cut results to the top 3
         r["top3"] = [{
             "candidate_name": t.get("candidate_name"),
             "match_score": t.get("match_score"),
             "success_rate": t.get("success_rate"),
             "resume_id": t.get("resume_id"),
-        } for t in top]
+            "candidate_id": t.get("candidate_id"),
+        } for t in r.pop("results", None) or []]
 
-    return render_template("company_history.html", runs=runs)
+    return render_template("company_history.html", runs=runs, next_cursor=next_cursor,
+                           first_page=not request.args.get("cursor"), summary=summary)
+
+
+@app.route('/company/history/<entry_id>/results')
+@login_required
+def company_history_results(entry_id):
+    """Every stored result of one run, fetched when its "Full run" row is opened."""
+    if current_user.user_type != 'company':
+        abort(403)
+    try:
+        run = database.company_match_history().find_one({"_id": ObjectId(entry_id), "email": current_user.id},
+                                                        {"results": 1})
+    except InvalidId:
+        run = None
+    if run is None:
+        abort(404)
+    return jsonify({"results": [{
+        "candidate_name": t.get("candidate_name"),
+        "match_score": t.get("match_score"),
+        "success_rate": t.get("success_rate"),
+        "resume_url": url_for('fetch_resume', resume_id=t["resume_id"], candidate=t.get("candidate_id"))
+                      if t.get("resume_id") else None,
+    } for t in run.get("results") or []]})
 
 
 
@@ -570,49 +2037,462 @@ def clear_company_history():
     if current_user.user_type != 'company':
         abort(403)
 
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-
-    db["company_match_history"].delete_many({"email": current_user.id})
+    database.company_match_history().delete_many({"email": current_user.id})
 
     flash("Company match history cleared.", "success")
     return redirect(url_for('company_history'))
 
 
+@app.route('/company/saved', methods=['GET', 'POST'])
+@login_required
+def saved_searches():
+    if current_user.user_type != 'company':
+        abort(403)
+
+    if request.method == 'POST':
+        job_description = (request.form.get('job_description') or "").strip()
+        if not job_description:
+            flash("Please paste a job description.", "warning")
+            return render_template('job_desc.html')
+        now = datetime.now(timezone.utc)
+        search = {
+            "email": current_user.id,
+            "jd_text": job_description[:3000],
+            "k": SAVED_SEARCH_TOP_K,
+            "active": True,
+            "created_at": now,
+        }
+        search["_id"] = database.saved_searches().insert_one(search).inserted_id
+        refresh_saved_search(search)
+        flash("Search saved. New resumes will be ranked against it as they are uploaded.", "success")
+        return redirect(url_for('saved_searches'))
+
+    searches = list(database.saved_searches().find({"email": current_user.id}, {"jd_embedding": 0})
+                    .sort("created_at", -1))
+    # stale lists are recomputed by the ingest workers; until then the page shows the current rows
+    stale = [s["_id"] for s in searches if saved_search_stale(s)]
+    if stale:
+        queue_saved_search_refresh(stale)
+    for s in searches:
+        s["refreshing"] = s["_id"] in stale
+        s["_id"] = str(s["_id"])
+        jdt = (s.get("jd_text") or "").strip()
+        s["jd_preview"] = (jdt[:180] + "…") if len(jdt) > 180 else jdt
+
+    return render_template("saved_searches.html", searches=searches)
+
+
+@app.route('/company/saved/<search_id>/toggle', methods=['POST'])
+@login_required
+def toggle_saved_search(search_id):
+    if current_user.user_type != 'company':
+        abort(403)
+    try:
+        oid = ObjectId(search_id)
+    except InvalidId:
+        abort(404)
+    search = database.saved_searches().find_one({"_id": oid, "email": current_user.id}, {"active": 1})
+    if not search:
+        abort(404)
+    # a paused search misses uploads, so it is recomputed when resumed
+    database.saved_searches().update_one({"_id": search["_id"]}, {"$set": {
+        "active": not search.get("active"), "needs_refresh": True,
+    }})
+    return redirect(url_for('saved_searches'))
+
+
+@app.route('/company/saved/<search_id>/delete', methods=['POST'])
+@login_required
+def delete_saved_search(search_id):
+    if current_user.user_type != 'company':
+        abort(403)
+    try:
+        oid = ObjectId(search_id)
+    except InvalidId:
+        abort(404)
+    database.saved_searches().delete_one({"_id": oid, "email": current_user.id})
+    flash("Saved search deleted.", "success")
+    return redirect(url_for('saved_searches'))
+
+
+@app.route('/api/v1/match', methods=['POST'])
+@csrf.exempt  # JSON only, see batch_match_api()
+@login_required
+def match_api():
+    """Ranked candidates for one JD, filtered and cursor-paginated."""
+    if current_user.user_type != 'company':
+        abort(403)
+    if not request.is_json:
+        abort(415)
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "the request body must be a JSON object"}), 400
+    job_description = body.get("job_description")
+    if not isinstance(job_description, str) or not job_description.strip():
+        return jsonify({"error": "job_description is required"}), 400
+    job_description = job_description.strip()
+    try:
+        params = parse_match_params(body)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    jd_tech, jd_emb = analyze_jd(job_description)
+    rows = ranked_rows(job_description, jd_tech, jd_emb, params)
+    page, next_cursor = page_rows(rows, params["cursor"], params["limit"])
+    return jsonify({
+        "api_version": API_VERSION,
+        "jd_skills": sorted(jd_tech),
+        "total": len(rows),
+        "results": api_rows(page),
+        "next_cursor": next_cursor,
+    })
+
+
+@app.route('/api/v1/compare', methods=['POST'])
+@csrf.exempt  # JSON only, see batch_match_api()
+@login_required
+def compare_api():
+    """The candidate's resumes (all, or `resume_ids`) against one or more JDs, filtered and cursor-paginated."""
+    if current_user.user_type != 'candidate':
+        abort(403)
+    if not request.is_json:
+        abort(415)
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "the request body must be a JSON object"}), 400
+    try:
+        jds = parse_batch_jds(body.get("job_descriptions"))
+        if len(jds) > COMPARE_MAX_JDS:
+            raise ValueError(f"at most {COMPARE_MAX_JDS} job descriptions per request")
+        params = parse_match_params(body)
+        query = {"email": current_user.id}
+        if body.get("resume_ids"):
+            query["resume_id"] = {"$in": [ObjectId(r) for r in body["resume_ids"]]}
+    except (TypeError, ValueError, InvalidId) as e:
+        return jsonify({"error": str(e)}), 400
+
+    docs = list(database.candidates().find(query))
+    if not docs:
+        return jsonify({"error": "no matching resumes"}), 404
+    grid = compare_grid(docs, [text for _, text in jds])
+    skills = {str(d.get("resume_id")): {s.lower() for s in (d.get("skills") or [])} for d in docs}
+
+    rows = []
+    for (jd_id, _), g in zip(jds, grid):
+        for r in g["results"]:
+            if params["min_success_rate"] is not None and r["success_rate"] < params["min_success_rate"]:
+                continue
+            if params["min_match_score"] is not None and r["score"] < params["min_match_score"]:
+                continue
+            if not set(params["required_skills"]) <= skills[r["resume_id"]]:
+                continue
+            key = int(rank_key(np.array([r["score"]]), np.array([r["success_rate"]]))[0])
+            rows.append({"jd": jd_id, "jd_skills": g["jd_tech"], **r, "rank": key,
+                         "tiebreak": f"{jd_id}:{r['resume_id']}"})
+    rows.sort(key=lambda r: (-r["rank"], r["tiebreak"]))
+    rows = rows[:params["top_k"]]
+    page, next_cursor = page_rows(rows, params["cursor"], params["limit"])
+    return jsonify({
+        "api_version": API_VERSION,
+        "total": len(rows),
+        "results": api_rows(page),
+        "next_cursor": next_cursor,
+    })
+
+
+@app.route('/api/match/batch', methods=['POST'])
+@app.route('/api/v1/match/batch', methods=['POST'])
+@csrf.exempt  # JSON only: a cross-site form can't send application/json without a CORS preflight
+@login_required
+def batch_match_api():
+    """Many JDs against the whole pool, streamed back as NDJSON (see batch_match())."""
+    if current_user.user_type != 'company':
+        abort(403)
+    if not request.is_json:
+        abort(415)
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "the request body must be a JSON object"}), 400
+    try:
+        jds = parse_batch_jds(body.get("job_descriptions"))
+        k = int(body.get("top_k", MATCH_TOP_K))
+        if not 1 <= k <= API_MAX_TOP_K:
+            raise ValueError(f"top_k must be between 1 and {API_MAX_TOP_K}")
+        best_fit = max(0, int(body.get("best_fit", 0)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    lines = (json.dumps(item) + "\n" for item in batch_match(database.candidates(), jds, k, best_fit))
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+
 # ===========================================================================================================
 # Routes: Shared / Utilities
 # ===========================================================================================================
+def download_name(file_doc: dict) -> str:
+    """
+    Name a PDF downloads under: the resume_filename of the record it is fetched for
+    (`?candidate=<id>`, else the signed-in user's own record). A shared blob's own
+    filename is whichever upload stored it first.
+    """
+    query = None
+    if request.args.get("candidate"):
+        try:
+            query = {"_id": ObjectId(request.args["candidate"])}
+        except InvalidId:
+            pass
+    if query is None and current_user.is_authenticated:
+        query = {"email": current_user.id}
+    record = database.candidates().find_one({**query, "resume_id": file_doc["_id"]},
+                                            {"resume_filename": 1}) if query else None
+    return (record or {}).get("resume_filename") or file_doc.get("filename") or f"{file_doc['_id']}.pdf"
+
 @app.route('/fetch_resume/<resume_id>')
 def fetch_resume(resume_id):
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-    fs = GridFS(db)
-
-    # Lookup doc to get stored filename
-    doc = db["candidates"].find_one({"resume_id": ObjectId(resume_id)})
-    filename = (doc.get("resume_filename") if doc else None) or f"{resume_id}.pdf"
+    # One files lookup gives the name, size, hash and upload date; chunks are read only if needed
+    try:
+        file_doc = database.get_client()["candidates"]["fs.files"].find_one({"_id": ObjectId(resume_id)})
+    except InvalidId:
+        file_doc = None
+    if file_doc is None:
+        abort(404)
+    key, length = resume_file_key(file_doc), file_doc["length"]
+    last_modified = file_doc.get("uploadDate")
+
+    resp = Response(mimetype="application/pdf")
+    resp.set_etag(key)
+    resp.last_modified = last_modified
+    resp.cache_control.private = True
+    resp.cache_control.max_age = RESUME_MAX_AGE
+    if not is_resource_modified(request.environ, etag=key, last_modified=last_modified):
+        resp.status_code = 304
+        return resp
+
+    # Body: the local copy, else GridFS chunk by chunk (a full download fills the local copy)
+    cached = resume_cache.open(key, length) if resume_cache is not None else None
+    if cached is not None:
+        body = wrap_file(request.environ, cached, 256 * 1024)
+    else:
+        grid_out = GridOut(database.get_client()["candidates"]["fs"], file_document=file_doc)
+        if resume_cache is not None and not request.range:
+            body = resume_cache.fill(key, length, iter(grid_out.readchunk, b""))
+        else:
+            body = wrap_file(request.environ, grid_out, file_doc.get("chunkSize", 255 * 1024))
+    resp.response = body
+    resp.direct_passthrough = True
+    resp.content_length = length
 
-    resume_file = fs.get(ObjectId(resume_id))
-    return send_file(resume_file, mimetype='application/pdf', as_attachment=True, download_name=filename)
+    filename = download_name(file_doc)
+    try:
+        filename.encode("ascii")
+        resp.headers.set("Content-Disposition", "attachment", filename=filename)
+    except UnicodeEncodeError:
+        ascii_name = filename.encode("ascii", "ignore").decode() or f"{resume_id}.pdf"
+        resp.headers.set("Content-Disposition", "attachment", filename=ascii_name,
+                         **{"filename*": f"UTF-8''{quote(filename)}"})
+    # Range / If-Range handling (206, 416) against the complete length
+    return resp.make_conditional(request, accept_ranges=True, complete_length=length)
 
 
 @app.route('/history/delete/<entry_id>', methods=['POST'])
 @login_required
 def delete_history_entry(entry_id):
-    client = MongoClient(os.getenv("MongoDBURL"), tls=True, tlsAllowInvalidCertificates=True)
-    db = client["candidates"]
-
     if current_user.user_type == 'candidate':
-        db["compare_history"].delete_one({"_id": ObjectId(entry_id), "email": current_user.id})
+        database.compare_history().delete_one({"_id": ObjectId(entry_id), "email": current_user.id})
         return redirect(url_for('candidate_history'))
 
     if current_user.user_type == 'company':
-        db["company_match_history"].delete_one({"_id": ObjectId(entry_id), "email": current_user.id})
+        database.company_match_history().delete_one({"_id": ObjectId(entry_id), "email": current_user.id})
         return redirect(url_for('company_history'))
 
     abort(403)
 
 
+# ===========================================================================================================
+# CLI: Maintenance
+# ===========================================================================================================
+@app.cli.command("backfill-embeddings")
+@click.option("--batch-size", default=64, show_default=True, help="Resumes encoded per model call.")
+def backfill_embeddings(batch_size):
+    """Compute resume embeddings for records that lack a current one."""
+    users_col = database.candidates()
+
+    stale = {"$or": [
+        {"embedding_model": {"$ne": SEM_MODEL_NAME}},
+        {"embedding_version": {"$ne": SEM_MODEL_VERSION}},
+    ]}
+    if CHUNK_POOLING != "off":
+        stale["$or"].append({"chunk_version": {"$ne": CHUNK_TAG}})
+
+    def flush(batch):
+        ops = []
+        for (doc_id, _, text, refetched), fields in zip(batch, embed_resumes([t for _, _, t, _ in batch])):
+            if refetched:
+                fields["resume_text"] = text
+            ops.append(UpdateOne({"_id": doc_id}, {"$set": fields}))
+        users_col.bulk_write(ops, ordered=False)
+        invalidate_resume_scores([doc_id for doc_id, _, _, _ in batch], [rid for _, rid, _, _ in batch])
+        return len(ops)
+
+    done = 0
+    batch = []
+    for doc in users_col.find(stale, {"resume_text": 1, "resume_id": 1}):
+        text, refetched = resume_text_for(doc)
+        batch.append((doc["_id"], doc.get("resume_id"), text, refetched))
+        if len(batch) >= batch_size:
+            done += flush(batch)
+            batch = []
+    if batch:
+        done += flush(batch)
+
+    chunks = "" if CHUNK_POOLING == "off" else f", chunks v{CHUNKER_VERSION}"
+    click.echo(f"Backfilled {done} resume embeddings ({SEM_MODEL_NAME} v{SEM_MODEL_VERSION}{chunks}).")
+
+
+@app.cli.command("vector-snapshot")
+@click.option("--rebuild", is_flag=True, help="Start a new generation from scratch instead of catching up.")
+def vector_snapshot_command(rebuild):
+    """Build or catch up the memory-mapped vector snapshot that full /match scans read."""
+    if vector_snapshot is None:
+        raise click.ClickException("The vector snapshot is disabled (VECTOR_SNAPSHOT=0).")
+    t = time.perf_counter()
+    read = refresh_vector_snapshot(database.candidates(), rebuild=rebuild)
+    meta = vector_snapshot.open().meta
+    click.echo(f"{meta['records']} records / {meta['vectors']} vectors in generation {meta['gen']} ({meta['tag']}); "
+               f"read {read} from MongoDB in {time.perf_counter() - t:.1f}s.")
+
+
+@app.cli.command("ann-rebuild")
+@click.option("--nlist", type=int, default=None, help="Number of IVF buckets (default: sqrt of pool size).")
+def ann_rebuild(nlist):
+    """Rebuild the ANN index from Mongo, retrain its buckets and save it."""
+    global _ann_index
+    users_col = database.candidates()
+
+    with _ann_lock:
+        _ann_index = IVFIndex(SEM_DIM)
+        _ann_index.meta["model"] = _ann_model_tag()
+        sync_ann_index(_ann_index, users_col)
+        if len(_ann_index) >= 2:
+            if nlist:
+                live = np.flatnonzero(_ann_index.alive[:len(_ann_index.ids)])
+                _ann_index.train(_ann_index.vectors[live], nlist)
+            else:
+                train_ann_index(_ann_index)
+        save_ann_index()
+    click.echo(f"Indexed {len(_ann_index)} resumes in {_ann_index.nlist} buckets -> {ANN_INDEX_PATH}")
+
+
+@app.cli.command("ingest-worker")
+@click.option("--processes", default=2, show_default=True, help="Worker processes to run.")
+def ingest_worker(processes):
+    """Process queued resume uploads until interrupted."""
+    click.echo(f"Starting {processes} ingest workers on {INGEST_QUEUE_PATH}")
+    ingest.run_workers(INGEST_QUEUE_PATH, processes, handlers_module=__name__)
+
+
+@app.cli.command("ingest-dead-letters")
+@click.option("--retry", "retry_id", default=None, help="Re-queue this dead-lettered job.")
+def ingest_dead_letters(retry_id):
+    """List resume uploads that failed every attempt, or re-queue one."""
+    if retry_id:
+        dead = ingest_queue.dead_letter(retry_id)
+        if dead is None:
+            raise click.ClickException("No such dead-lettered job.")
+        if dead["kind"] == "ingest_resume" and not reacquire_failed_upload(dead["payload"]):
+            raise click.ClickException("The PDF was deleted with the failed job; it has to be uploaded again.")
+        outcome = ingest_queue.retry_dead_letter(retry_id)
+        if outcome == ingest.PENDING:
+            click.echo("A newer job for the same record is already queued; dropped the dead letter.")
+        else:
+            click.echo("Re-queued.")
+        return
+    for d in ingest_queue.dead_letters():
+        failed = datetime.fromtimestamp(d["failed_at"], timezone.utc).isoformat(timespec="seconds")
+        click.echo(f"{d['job_id']}  {failed}  {d['payload'].get('filename')}  {d['error']}")
+
+
+@app.cli.command("build-gazetteer")
+@click.option("--min-count", default=3, show_default=True, help="Resumes a skill must appear on to be kept.")
+def build_gazetteer(min_count):
+    """Write skills already stored in Mongo to the gazetteer file, most frequent first."""
+    rows = database.candidates().aggregate([
+        {"$unwind": "$skills"},
+        {"$group": {"_id": {"$toLower": "$skills"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gte": min_count}}},
+        {"$sort": {"n": -1}},
+    ], allowDiskUse=True)
+    terms = []
+    for row in rows:
+        term = normalize_skill(row["_id"])
+        if len(term) >= 2 and re.search(r"[a-z]", term) and term not in terms:
+            terms.append(term)
+    os.makedirs(os.path.dirname(GAZETTEER_PATH), exist_ok=True)
+    with open(GAZETTEER_PATH, "w", encoding="utf-8") as f:
+        f.write(f"# generated by `flask build-gazetteer --min-count {min_count}`\n")
+        f.writelines(t + "\n" for t in terms)
+    click.echo(f"Wrote {len(terms)} skills to {GAZETTEER_PATH}")
+
+
+@app.cli.command("reextract-skills")
+@click.option("--batch-size", default=256, show_default=True, help="Resumes processed per batch.")
+def reextract_skills(batch_size):
+    """Recompute stored resume skills with the current SKILL_EXTRACTOR."""
+    users_col = database.candidates()
+    done = 0
+    for batch in chunked(users_col.find({}, {"resume_text": 1, "resume_id": 1}), batch_size):
+        texts = [resume_text_for(doc)[0] for doc in batch]
+        ops = [UpdateOne({"_id": doc["_id"]}, {"$set": {"skills": sorted(sk)}})
+               for doc, sk in zip(batch, extract_skills_batch(texts))]
+        users_col.bulk_write(ops, ordered=False)
+        done += len(ops)
+    # cached scores used the old skills
+    database.pair_scores().delete_many({})
+    database.match_rankings().delete_many({})
+    click.echo(f"Re-extracted skills for {done} resumes ({SKILL_EXTRACTOR}).")
+
+
+@app.cli.command("jd-cache")
+@click.option("--clear", is_flag=True, help="Drop every entry and reset the counters.")
+def jd_cache_command(clear):
+    """Show JD analysis cache counters, or clear the cache."""
+    if clear:
+        jd_cache.clear()
+        click.echo("JD cache cleared.")
+        return
+    stats = jd_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / lookups if lookups else 0.0
+    click.echo(" ".join(f"{k}={v}" for k, v in sorted(stats.items())) + f" hit_rate={rate:.1%}")
+
+
+@app.cli.command("batch-match")
+@click.argument("source", type=click.Path(exists=True))
+@click.option("--top-k", default=50, show_default=True, help="Candidates kept per JD.")
+@click.option("--best-fit", default=0, show_default=True, help="Also list each candidate's N best-fitting JDs.")
+@click.option("--out", type=click.File("w"), default="-", help="NDJSON output file (default: stdout).")
+def batch_match_command(source, top_k, best_fit, out):
+    """Rank the pool against every JD in SOURCE: a directory of .txt files or a .jsonl of {"id", "text"}."""
+    if os.path.isdir(source):
+        items = []
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".txt"):
+                with open(os.path.join(source, name), encoding="utf-8") as f:
+                    items.append({"id": os.path.splitext(name)[0], "text": f.read()})
+    else:
+        with open(source, encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+    try:
+        jds = parse_batch_jds(items)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    for item in batch_match(database.candidates(), jds, top_k, best_fit):
+        out.write(json.dumps(item) + "\n")
+        if item["type"] == "progress":
+            click.echo(f"scanned {item['scanned']}", err=True)
+
+
 # ===========================================================================================================
 # Entrypoint
 # ===========================================================================================================
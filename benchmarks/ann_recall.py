@@ -0,0 +1,76 @@
+"""
+Recall / latency of the IVF index against exact search.
+
+    python -m benchmarks.ann_recall --n 200000 --nprobe 4 8 16 32
+    python -m benchmarks.ann_recall --index instance/ann_index.npz   # real resume embeddings
+"""
+import argparse
+import time
+import numpy as np
+
+from ann_index import IVFIndex
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors drawn around random topic centres, roughly like resume embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    x = centres[rng.integers(0, clusters, size=n)] + 0.8 * rng.normal(size=(n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=100_000, help="synthetic corpus size")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--clusters", type=int, default=200, help="topic centres in the synthetic corpus")
+    ap.add_argument("--index", help="use the vectors of a saved index instead of synthetic data")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=50, help="recall@k")
+    ap.add_argument("--shortlist", type=int, default=2000, help="ANN results per query (ANN_SHORTLIST)")
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    args = ap.parse_args()
+
+    if args.index:
+        saved = IVFIndex.load(args.index)
+        corpus = saved.vectors[saved.alive]
+    else:
+        corpus = synthetic_corpus(args.n, args.dim, args.clusters)
+    n, dim = corpus.shape
+
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.choice(n, size=args.queries, replace=False)]
+    queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    index = IVFIndex(dim)
+    t0 = time.perf_counter()
+    index.add([str(i) for i in range(n)], corpus)
+    nlist = max(2, int(np.sqrt(n)))
+    sample = corpus[rng.choice(n, size=min(n, 32 * nlist), replace=False)]
+    index.train(sample, nlist)
+    print(f"corpus={n} dim={dim} nlist={index.nlist} build={time.perf_counter() - t0:.1f}s")
+
+    t0 = time.perf_counter()
+    exact = []
+    for q in queries:
+        sims = corpus @ q
+        top = np.argpartition(-sims, args.k - 1)[:args.k]
+        exact.append({str(i) for i in top})
+    exact_ms = 1000 * (time.perf_counter() - t0) / len(queries)
+    print(f"exact scan: {exact_ms:.2f} ms/query")
+
+    print(f"{'nprobe':>6} {'recall@' + str(args.k):>10} {'ms/query':>9} {'speedup':>8}")
+    for nprobe in args.nprobe:
+        hits = 0
+        t0 = time.perf_counter()
+        results = [index.search(q, args.shortlist, nprobe=nprobe) for q in queries]
+        ms = 1000 * (time.perf_counter() - t0) / len(queries)
+        for truth, res in zip(exact, results):
+            hits += len(truth & {vid for vid, _ in res})
+        recall = hits / (args.k * len(queries))
+        print(f"{nprobe:>6} {recall:>10.3f} {ms:>9.2f} {exact_ms / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Encode throughput/latency of the embedding backends, and their parity with PyTorch.
+
+    python -m benchmarks.embedding_backends                                # the bundled examples
+    python -m benchmarks.embedding_backends ./pool --backends torch onnx-int8
+    python -m benchmarks.embedding_backends --from-db 2000 --queries ./requisitions
+
+Parity is measured against the torch backend on the same texts: cosine between the two
+vectors of each text, and for every query the overlap of the top-k resumes each backend ranks.
+Queries are the .txt files of QUERIES (default: those of SOURCE).
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+# Only the model helpers are needed: no model warm-up or index checks on import
+os.environ.setdefault("WARM_MODELS", "0")
+os.environ.setdefault("ENSURE_INDEXES", "0")
+
+import database  # noqa: E402
+from app import EMBED_MAX_BATCH, load_sem_model  # noqa: E402
+from benchmarks.skill_extractors import EXAMPLES_DIR, load_texts  # noqa: E402
+
+
+def encode(model, texts: list[str], batch_size: int) -> np.ndarray:
+    return model.encode(texts, normalize_embeddings=True, batch_size=batch_size,
+                        convert_to_numpy=True).astype(np.float32)
+
+
+def sample_resumes(n: int) -> list[str]:
+    docs = database.candidates().aggregate([
+        {"$match": {"resume_text": {"$nin": [None, ""]}}},
+        {"$sample": {"size": n}},
+        {"$project": {"resume_text": 1}},
+    ])
+    return [d["resume_text"] for d in docs]
+
+
+def throughput(model, texts: list[str], batch_size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        encode(model, texts, batch_size)
+        best = min(best, time.perf_counter() - t)
+    return len(texts) / best
+
+
+def latencies(model, texts: list[str], runs: int) -> np.ndarray:
+    """Milliseconds per single-text encode, as on the /match path."""
+    out = []
+    for i in range(runs):
+        t = time.perf_counter()
+        encode(model, [texts[i % len(texts)]], 1)
+        out.append((time.perf_counter() - t) * 1000)
+    return np.asarray(out)
+
+
+def top_k_overlap(q_ref: np.ndarray, c_ref: np.ndarray, q_other: np.ndarray, c_other: np.ndarray,
+                  k: int) -> float:
+    ref = np.argsort(-(q_ref @ c_ref.T), axis=1)[:, :k]
+    other = np.argsort(-(q_other @ c_other.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref, other)]))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("source", nargs="?", default=EXAMPLES_DIR, help="directory of .pdf / .txt files")
+    ap.add_argument("--from-db", type=int, default=0, metavar="N", help="sample N stored resumes instead")
+    ap.add_argument("--queries", help="directory of JD .txt files (default: the .txt files of SOURCE)")
+    ap.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    ap.add_argument("--batch-size", type=int, default=EMBED_MAX_BATCH)
+    ap.add_argument("--repeat", type=int, default=3, help="timed throughput runs (best is reported)")
+    ap.add_argument("--latency-runs", type=int, default=50)
+    ap.add_argument("--k", type=int, default=20, help="top-k overlap")
+    args = ap.parse_args()
+
+    docs = load_texts(args.source)
+    corpus = sample_resumes(args.from_db) if args.from_db else [t for _, t in docs]
+    query_docs = load_texts(args.queries) if args.queries else docs
+    queries = [t for name, t in query_docs if name.lower().endswith(".txt")] or corpus[:20]
+    if not corpus:
+        raise SystemExit("No texts to encode")
+    k = min(args.k, len(corpus))
+    print(f"{len(corpus)} documents, {len(queries)} queries, batch size {args.batch_size}\n")
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    ref = None
+    print(f"{'backend':<10} {'load s':>7} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'cos mean':>9} {'cos min':>8} {f'top{k} overlap':>13}")
+    for backend in backends:
+        t = time.perf_counter()
+        try:
+            model = load_sem_model(backend)
+        except Exception as e:
+            print(f"{backend:<10} unavailable: {e}")
+            continue
+        load_s = time.perf_counter() - t
+
+        rate = throughput(model, corpus, args.batch_size, args.repeat)
+        p50, p95 = np.percentile(latencies(model, queries, args.latency_runs), [50, 95])
+        c_emb, q_emb = encode(model, corpus, args.batch_size), encode(model, queries, args.batch_size)
+        if ref is None:
+            ref = (c_emb, q_emb)
+        cos = np.sum(c_emb * ref[0], axis=1)
+        overlap = top_k_overlap(ref[1], ref[0], q_emb, c_emb, k)
+        print(f"{backend:<10} {load_s:>7.1f} {rate:>9.1f} {p50:>8.1f} {p95:>8.1f} "
+              f"{cos.mean():>9.4f} {cos.min():>8.4f} {overlap:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
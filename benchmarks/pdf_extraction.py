@@ -0,0 +1,138 @@
+"""
+Throughput and latency of the PDF extraction engine against plain pdfminer extract_text().
+
+    python -m benchmarks.pdf_extraction                             # bundled examples + synthetic PDFs
+    python -m benchmarks.pdf_extraction ./pool --workers 2 4 8 --pages 1 3 60
+
+The baseline is what extract_pdf_bytes() used to do: extract_text() on the whole document,
+in-process, then cut to the 50,000-character resume_text cap. "single" times one document at
+a time through the engine (page ranges in parallel for long documents), "batch" pushes the
+whole set through extract_many(). Parity is the share of documents whose text is identical.
+"""
+import argparse
+import os
+import time
+from io import BytesIO
+
+import numpy as np
+from pdfminer.high_level import extract_text
+
+from pdf_extract import RESUME_TEXT_CHARS, PDFExtractionError, PDFExtractor
+from training_data import train_data
+
+EXAMPLES_DIR = "resume and job description examples"
+
+
+def make_pdf(text: str, lines_per_page: int = 60) -> bytes:
+    """A minimal text-based PDF (Helvetica, one text object per page) that pdfminer can parse."""
+    def esc(line: str) -> str:
+        return line.encode("latin-1", "replace").decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({esc(line)}) Tj T*" for line in page) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = BytesIO(), []
+    out.write(b"%PDF-1.4\n")
+    for n, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{n} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def synthetic_pdf(pages: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    sentences = [text for text, _ in train_data]
+    return make_pdf("\n".join(rng.choice(sentences, size=pages * 60)))
+
+
+def load_pdfs(source: str) -> list[tuple[str, bytes]]:
+    out = []
+    for name in sorted(os.listdir(source)):
+        if name.lower().endswith(".pdf"):
+            with open(os.path.join(source, name), "rb") as f:
+                out.append((name, f.read()))
+    return out
+
+
+def baseline(data: bytes) -> str | None:
+    try:
+        return (extract_text(BytesIO(data)) or "")[:RESUME_TEXT_CHARS]
+    except Exception:
+        return None
+
+
+def engine_single(extractor: PDFExtractor, data: bytes) -> str | None:
+    try:
+        return extractor.extract(data)
+    except PDFExtractionError:
+        return None
+
+
+def timed(fn, docs: list[bytes]) -> tuple[list, np.ndarray, float]:
+    """Outputs, per-document latencies (ms) and total seconds of running fn over docs one at a time."""
+    outs, lat = [], []
+    started = time.perf_counter()
+    for data in docs:
+        t = time.perf_counter()
+        outs.append(fn(data))
+        lat.append((time.perf_counter() - t) * 1000)
+    return outs, np.asarray(lat), time.perf_counter() - started
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("source", nargs="?", default=EXAMPLES_DIR, help="directory of PDFs")
+    ap.add_argument("--pages", type=int, nargs="+", default=[1, 2, 10, 40], help="synthetic PDF page counts")
+    ap.add_argument("--copies", type=int, default=4, help="synthetic PDFs per page count")
+    ap.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    ap.add_argument("--max-pages", type=int, default=50)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args()
+
+    docs = [data for _, data in load_pdfs(args.source)]
+    docs += [synthetic_pdf(p, seed) for p in args.pages for seed in range(args.copies)]
+    if not docs:
+        raise SystemExit("No PDFs to extract")
+    print(f"{len(docs)} PDFs, {sum(map(len, docs)) / 1e6:.1f} MB\n")
+
+    ref, lat, total = timed(baseline, docs)
+    print(f"{'engine':<22} {'docs/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'parity':>7}")
+    print(f"{'extract_text':<22} {len(docs) / total:>8.1f} {np.percentile(lat, 50):>8.1f} "
+          f"{np.percentile(lat, 95):>8.1f} {lat.max():>8.1f} {'-':>7}")
+
+    def parity(outs) -> float:
+        return float(np.mean([a == b for a, b in zip(outs, ref)]))
+
+    for workers in args.workers:
+        extractor = PDFExtractor(workers=workers, max_pages=args.max_pages, timeout=args.timeout)
+        try:
+            extractor.extract(docs[0])   # start the pool outside the timings
+            outs, lat, total = timed(lambda d: engine_single(extractor, d), docs)
+            print(f"{f'single, {workers} workers':<22} {len(docs) / total:>8.1f} {np.percentile(lat, 50):>8.1f} "
+                  f"{np.percentile(lat, 95):>8.1f} {lat.max():>8.1f} {parity(outs):>7.2f}")
+
+            t = time.perf_counter()
+            outs = [None if isinstance(o, Exception) else o for o in extractor.extract_many(docs)]
+            total = time.perf_counter() - t
+            print(f"{f'batch, {workers} workers':<22} {len(docs) / total:>8.1f} {'':>8} {'':>8} {'':>8} "
+                  f"{parity(outs):>7.2f}")
+        finally:
+            extractor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Throughput and agreement of the skill extractors (NER vs gazetteer vs merged).
+
+    python -m benchmarks.skill_extractors                      # the bundled example resumes / JDs
+    python -m benchmarks.skill_extractors ./pool --repeat 3    # a directory of PDFs and .txt files
+
+Agreement is measured against NER, the current default: precision/recall of the
+other extractor's skills taking NER's as the reference, and mean Jaccard.
+"""
+import argparse
+import os
+import time
+
+# Only the extraction helpers are needed: no model warm-up or Mongo round-trip on import
+os.environ.setdefault("WARM_MODELS", "0")
+os.environ.setdefault("ENSURE_INDEXES", "0")
+
+from app import extract_pdf_bytes, extract_tech_batch, get_gazetteer, nlp_registry  # noqa: E402
+from skill_gazetteer import normalize_skill  # noqa: E402
+
+EXAMPLES_DIR = "resume and job description examples"
+
+
+def load_texts(source: str) -> list[tuple[str, str]]:
+    texts = []
+    for name in sorted(os.listdir(source)):
+        path = os.path.join(source, name)
+        if name.lower().endswith(".pdf"):
+            with open(path, "rb") as f:
+                texts.append((name, extract_pdf_bytes(f.read())))
+        elif name.lower().endswith(".txt"):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                texts.append((name, f.read()))
+    return texts
+
+
+def timed(fn, texts: list[str], repeat: int) -> tuple[list[set[str]], float]:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(texts)
+        best = min(best, time.perf_counter() - t)
+    return out, best
+
+
+def agreement(reference: list[set[str]], other: list[set[str]]) -> tuple[float, float, float]:
+    tp = sum(len(r & o) for r, o in zip(reference, other))
+    n_ref = sum(len(r) for r in reference)
+    n_other = sum(len(o) for o in other)
+    jaccard = [len(r & o) / len(r | o) if r | o else 1.0 for r, o in zip(reference, other)]
+    return (tp / n_other if n_other else 0.0, tp / n_ref if n_ref else 0.0, sum(jaccard) / len(jaccard))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("source", nargs="?", default=EXAMPLES_DIR, help="directory of .pdf / .txt files")
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per extractor (best is reported)")
+    ap.add_argument("--show", action="store_true", help="print per-document differences")
+    args = ap.parse_args()
+
+    docs = load_texts(args.source)
+    if not docs:
+        raise SystemExit(f"No .pdf or .txt files in {args.source}")
+    names, texts = [n for n, _ in docs], [t for _, t in docs]
+    chars = sum(len(t) for t in texts)
+
+    nlp = nlp_registry.get()
+    gazetteer = get_gazetteer()
+    print(f"{len(texts)} documents, {chars:,} chars; gazetteer of {gazetteer.size} terms\n")
+
+    ner, t_ner = timed(lambda xs: [{normalize_skill(s) for s in d} for d in extract_tech_batch(nlp, xs)],
+                       texts, args.repeat)
+    gaz, t_gaz = timed(gazetteer.extract_batch, texts, args.repeat)
+    merged = [a | b for a, b in zip(ner, gaz)]
+
+    print(f"{'extractor':<10} {'docs/s':>10} {'chars/s':>12} {'skills/doc':>11}")
+    for label, out, secs in (("ner", ner, t_ner), ("gazetteer", gaz, t_gaz), ("merged", merged, t_ner + t_gaz)):
+        per_doc = sum(len(s) for s in out) / len(out)
+        print(f"{label:<10} {len(texts) / secs:>10.1f} {chars / secs:>12,.0f} {per_doc:>11.1f}")
+
+    p, r, j = agreement(ner, gaz)
+    print(f"\ngazetteer vs ner: precision {p:.2f}  recall {r:.2f}  mean jaccard {j:.2f}")
+
+    if args.show:
+        for name, a, b in zip(names, ner, gaz):
+            print(f"\n{name}\n  ner only:       {sorted(a - b)}\n  gazetteer only: {sorted(b - a)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+End-to-end performance suite. Builds a synthetic pool of resumes and JDs (from the
+vocabulary of the spaCy training snippets) in an in-memory MongoDB stand-in (mongomock),
+then times the hot paths: PDF text extraction, skill extraction, combined_similarity(),
+upload + ingestion, the /match and /candidate/compare requests, and the history pages.
+
+    python -m benchmarks.suite --scale 1000 10000 --out bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.suite --compare bench-a1b2c3d.json bench-e4f5a6b.json
+
+Each benchmark reports p50/p95/p99 latency, throughput and the process's peak RSS so far.
+Absolute numbers include the stand-in's own overhead; compare runs made on the same machine.
+The semantic model and spaCy pipeline are the real ones, loaded as configured (EMBED_BACKEND,
+SKILL_EXTRACTOR, ...). Resume vectors are computed for `--unique` texts and shared across the pool.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import numpy as np
+
+# Everything the app writes locally goes to a scratch directory
+_scratch = tempfile.mkdtemp(prefix="matchwise-bench-")
+os.environ.setdefault("WARM_MODELS", "0")
+os.environ.setdefault("ENSURE_INDEXES", "0")
+for var, name in (("JD_CACHE_PATH", "jd_cache.sqlite3"), ("INGEST_QUEUE_PATH", "ingest_queue.sqlite3"),
+                  ("ANN_INDEX_PATH", "ann_index.npz"), ("VECTOR_SNAPSHOT_PATH", "vectors"),
+                  ("RESUME_CACHE_PATH", "resume_cache")):
+    os.environ[var] = os.path.join(_scratch, name)
+
+try:
+    import mongomock
+    import mongomock.gridfs
+except ImportError:
+    raise SystemExit("The benchmark suite runs against mongomock: pip install mongomock")
+
+import database  # noqa: E402
+
+_client = mongomock.MongoClient()
+mongomock.gridfs.enable_gridfs_integration()
+database.get_client = lambda: _client
+
+from werkzeug.datastructures import FileStorage  # noqa: E402
+
+import app as webapp  # noqa: E402
+from benchmarks.pdf_extraction import make_pdf  # noqa: E402
+import ingest  # noqa: E402
+from training_data import train_data  # noqa: E402
+
+COMPANY = "bench-company@bench.local"
+CANDIDATE = "cand0@bench.local"
+
+
+# -- synthetic data -----------------------------------------------------------------------------------------
+def vocabulary() -> tuple[list[str], list[str]]:
+    """(technology terms, sentences) from the NER training snippets."""
+    techs = sorted({text[s:e].strip() for text, ann in train_data for s, e, _ in ann["entities"]})
+    return techs, [text for text, _ in train_data]
+
+
+def synth_resume(rng, techs: list[str], sentences: list[str], i: int) -> tuple[str, list[str]]:
+    skills = list(rng.choice(techs, size=int(rng.integers(4, 15)), replace=False))
+    lines = [f"Candidate {i}", f"cand{i}@bench.local", "", "Professional Summary",
+             *rng.choice(sentences, size=2), "", "Technical Skills", ", ".join(skills), "", "Work Experience"]
+    for job in range(int(rng.integers(2, 5))):
+        lines += [f"Software Engineer, Company {rng.integers(1000)} ({2012 + 3 * job} - {2015 + 3 * job})",
+                  *(f"- {s}" for s in rng.choice(sentences, size=int(rng.integers(3, 7))))]
+    lines += ["", "Education", "B.Sc. Computer Science", "", "Projects", *rng.choice(sentences, size=2)]
+    return "\n".join(lines), skills
+
+
+def synth_jd(rng, techs: list[str], sentences: list[str]) -> str:
+    wanted = rng.choice(techs, size=int(rng.integers(3, 9)), replace=False)
+    return "\n".join(["We are hiring a software engineer to join our platform team.",
+                      *rng.choice(sentences, size=int(rng.integers(2, 6))),
+                      "Requirements: " + ", ".join(wanted)])
+
+
+def build_pool(n: int, unique: int, history: int, seed: int) -> dict:
+    """Reset the stand-in and the local caches, then load n candidates plus users and history."""
+    for name in _client.list_database_names():
+        _client.drop_database(name)
+    webapp.jd_cache.clear()
+    webapp.reset_ann_index()   # else the next scale would search the previous pool's vectors
+    if webapp.vector_snapshot is not None:
+        webapp.refresh_vector_snapshot(database.candidates(), rebuild=True)
+
+    rng = np.random.default_rng(seed)
+    techs, sentences = vocabulary()
+    base = [synth_resume(rng, techs, sentences, i) for i in range(min(n, unique))]
+    fields = []
+    for start in range(0, len(base), 256):
+        fields += webapp.embed_resumes([text for text, _ in base[start:start + 256]], batch_size=64)
+
+    now = datetime.now(timezone.utc)
+    users_col = database.candidates()
+    for start in range(0, n, 5000):
+        docs = []
+        for i in range(start, min(n, start + 5000)):
+            text, skills = base[i % len(base)]
+            docs.append({
+                "name": f"Candidate {i}", "email": f"cand{i}@bench.local",
+                "resume_id": webapp.ObjectId(), "resume_filename": f"resume_{i}.pdf",
+                "resume_sha256": hashlib.sha256(f"bench-{seed}-{i}".encode()).hexdigest(),
+                "resume_text": text, "skills": sorted({s.lower() for s in skills}),
+                **fields[i % len(base)], "embedded_at": now,
+            })
+        users_col.insert_many(docs)
+
+    database.users().insert_many([{"email": COMPANY, "user_type": "company"},
+                                  {"email": CANDIDATE, "user_type": "candidate"}])
+    jds = [synth_jd(rng, techs, sentences) for _ in range(200)]
+    database.company_match_history().insert_many([{
+        "email": COMPANY, "jd_text": jds[i % len(jds)], "jd_tech": [], "ran_at": now - timedelta(minutes=i),
+        "results": [{"candidate_name": f"Candidate {j}", "resume_id": str(webapp.ObjectId()),
+                     "match_score": 50.0, "success_rate": 50.0} for j in range(webapp.HISTORY_TOP_N)],
+    } for i in range(history)])
+    database.compare_history().insert_many([{
+        "email": CANDIDATE, "resume_id": webapp.ObjectId(), "resume_filename": "resume_0.pdf",
+        "jd_text": jds[i % len(jds)], "jd_tech": [], "matched_skills": [], "similarity_score": 50.0,
+        "success_rate": 50.0, "compared_at": now - timedelta(minutes=i),
+    } for i in range(history)])
+    if webapp.vector_snapshot is not None:
+        webapp.refresh_vector_snapshot(users_col)
+    return {"jds": jds, "resumes": base, "rng": rng, "techs": techs, "sentences": sentences}
+
+
+# -- measurement --------------------------------------------------------------------------------------------
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+
+def measure(fn, runs: int, warmup: int = 1) -> dict:
+    for i in range(warmup):
+        fn(-1 - i)
+    lat = []
+    started = time.perf_counter()
+    for i in range(runs):
+        t = time.perf_counter()
+        fn(i)
+        lat.append((time.perf_counter() - t) * 1000)
+    total = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    return {"runs": runs, "p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3),
+            "mean_ms": round(float(np.mean(lat)), 3), "throughput_per_s": round(runs / total, 2),
+            "peak_rss_mb": round(peak_rss_mb(), 1)}
+
+
+def client_as(email: str):
+    client = webapp.app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = email
+        sess["_fresh"] = True
+    return client
+
+
+def expect(resp, *codes):
+    if resp.status_code not in codes:
+        raise RuntimeError(f"HTTP {resp.status_code} from {resp.request.path}")
+
+
+def benchmarks(data: dict, runs: int) -> dict:
+    jds, resumes, rng = data["jds"], data["resumes"], data["rng"]
+    pdfs = [make_pdf(text) for text, _ in resumes[:runs + 2]]
+    company, candidate = client_as(COMPANY), client_as(CANDIDATE)
+    jd_tech, jd_emb = webapp.analyze_jd(jds[0])
+    doc = database.candidates().find_one({"email": CANDIDATE})
+
+    def upload(i):
+        # a fresh PDF each time, so the content-addressed fast path doesn't skip ingestion
+        text, _ = synth_resume(rng, data["techs"], data["sentences"], 10_000_000 + i)
+        pdf = make_pdf(text)
+        expect(candidate.post("/upload", data={"resume": (BytesIO(pdf), f"upload_{i}.pdf")},
+                              content_type="multipart/form-data"), 302)
+        while ingest.run_one(webapp.ingest_queue):
+            pass
+
+    return {
+        "extract_pdf_text": lambda i: webapp.extract_pdf_text(
+            FileStorage(BytesIO(pdfs[i % len(pdfs)]), filename="resume.pdf", content_type="application/pdf")),
+        "extract_tech": lambda i: webapp.extract_tech(webapp.nlp_registry.get(), resumes[i % len(resumes)][0]),
+        "extract_skills": lambda i: webapp.extract_skills(resumes[i % len(resumes)][0]),
+        "combined_similarity": lambda i: webapp.combined_similarity(
+            jds[0], jd_tech, doc["resume_text"], set(doc["skills"]),
+            jd_emb=jd_emb, resume_emb=webapp.stored_vectors(doc)),
+        "combined_similarity_encode": lambda i: webapp.combined_similarity(
+            jds[i % len(jds)], jd_tech, resumes[i % len(resumes)][0], set(doc["skills"])),
+        "upload_ingest": upload,
+        # a JD not seen before: analysis, full ranking, history write
+        "match_cold": lambda i: expect(company.post("/match", data={"job_description": jds[(i + 1) % len(jds)]}), 200),
+        # the same JD again: cached analysis and ranking
+        "match_warm": lambda i: expect(company.post("/match", data={"job_description": jds[0]}), 200),
+        "candidate_compare": lambda i: expect(candidate.post("/candidate/compare", data={
+            "job_description": jds[i % len(jds)], "resume_id": str(doc["resume_id"])}), 200),
+        "company_history": lambda i: expect(company.get("/company/history"), 200),
+        "candidate_history": lambda i: expect(candidate.get("/candidate/history"), 200),
+    }
+
+
+def run_scale(n: int, args) -> dict:
+    t = time.perf_counter()
+    data = build_pool(n, args.unique, args.history, args.seed)
+    out = {"candidates": n, "setup_s": round(time.perf_counter() - t, 2), "benchmarks": {}}
+    print(f"\n== {n:,} candidates (setup {out['setup_s']}s)")
+    print(f"{'benchmark':<28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'peak MB':>8}")
+    for name, fn in benchmarks(data, args.runs).items():
+        if args.only and name not in args.only:
+            continue
+        runs = max(3, args.runs // 4) if name.startswith("match_cold") and n >= 100_000 else args.runs
+        try:
+            res = measure(fn, runs)
+        except Exception as e:   # one broken path shouldn't hide the rest
+            res = {"error": f"{type(e).__name__}: {e}"}
+            print(f"{name:<28} error: {res['error']}")
+        else:
+            print(f"{name:<28} {res['p50_ms']:>9.2f} {res['p95_ms']:>9.2f} {res['p99_ms']:>9.2f} "
+                  f"{res['throughput_per_s']:>9.1f} {res['peak_rss_mb']:>8.0f}")
+        out["benchmarks"][name] = res
+    return out
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path: str, after_path: str):
+    """p50/p95 of two result files side by side; ratios below 1.0 mean the second run is faster."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{(before.get('commit') or '?')[:10]} -> {(after.get('commit') or '?')[:10]}")
+    for scale, res in after["scales"].items():
+        old = before["scales"].get(scale)
+        if not old:
+            continue
+        print(f"\n== {int(scale):,} candidates")
+        print(f"{'benchmark':<28} {'p50 before':>11} {'p50 after':>10} {'ratio':>6} {'p95 ratio':>10}")
+        for name, b in res["benchmarks"].items():
+            a = old["benchmarks"].get(name, {})
+            if "p50_ms" not in a or "p50_ms" not in b:
+                continue
+            print(f"{name:<28} {a['p50_ms']:>11.2f} {b['p50_ms']:>10.2f} {b['p50_ms'] / a['p50_ms']:>6.2f} "
+                  f"{b['p95_ms'] / a['p95_ms']:>10.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", type=int, nargs="+", default=[1000, 10_000], help="candidate pool sizes")
+    ap.add_argument("--runs", type=int, default=20, help="timed runs per benchmark")
+    ap.add_argument("--unique", type=int, default=1000, help="distinct resume texts (and vectors) in the pool")
+    ap.add_argument("--history", type=int, default=200, help="stored match / compare runs per user")
+    ap.add_argument("--only", nargs="+", help="run just these benchmarks")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write results as JSON")
+    ap.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files and exit")
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    webapp.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {k: os.getenv(k) for k in ("EMBED_BACKEND", "EMBED_BATCHING", "CHUNK_POOLING", "SKILL_EXTRACTOR",
+                                              "VECTOR_SNAPSHOT", "MATCH_SCAN_BATCH", "ANN_MIN_CANDIDATES")},
+        "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "scales": {},
+    }
+    for n in args.scale:
+        results["scales"][str(n)] = run_scale(n, args)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
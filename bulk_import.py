@@ -0,0 +1,178 @@
+"""
+Bulk resume import: a directory or tarball of PDFs straight into MongoDB.
+
+    python bulk_import.py ./pool --email recruiter@company.com
+    python bulk_import.py pool.tar.gz --email recruiter@company.com --workers 8 --batch-size 512
+
+PDF text extraction runs in a process pool (with the app's size, page and time
+limits), skills are extracted in batches
+and embeddings are encoded in large batches; records go in with insert_many.
+Progress is appended to a state file after every batch, so an interrupted run
+can simply be started again: files already imported (by content hash, in the
+state file or in Mongo) are skipped.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tarfile
+import time
+from datetime import datetime, timezone
+
+from app import extract_skills_batch, embed_resumes, pdf_extractor, store_resume_file, update_saved_searches
+import database
+
+
+def iter_pdfs(source: str):
+    """Yield (name, bytes) for every PDF under a directory or inside a tarball."""
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for fn in sorted(files):
+                if fn.lower().endswith(".pdf"):
+                    path = os.path.join(root, fn)
+                    with open(path, "rb") as f:
+                        yield os.path.relpath(path, source), f.read()
+        return
+    with tarfile.open(source) as tar:
+        for member in tar:
+            if member.isfile() and member.name.lower().endswith(".pdf"):
+                yield member.name, tar.extractfile(member).read()
+
+
+def batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def name_from_filename(name: str) -> str:
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return stem.replace("_", " ").replace("-", " ").strip().title() or "Unknown"
+
+
+class StageTimer:
+    """Accumulates wall time and document counts per pipeline stage."""
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+        self.docs: dict[str, int] = {}
+
+    def add(self, stage: str, started: float, docs: int):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - started
+        self.docs[stage] = self.docs.get(stage, 0) + docs
+
+    def report(self) -> str:
+        lines = []
+        for stage, secs in self.seconds.items():
+            n = self.docs[stage]
+            lines.append(f"  {stage:<10} {n:>8} docs  {secs:8.1f}s  {n / secs if secs else 0:8.1f} docs/s")
+        return "\n".join(lines)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("source", help="directory or .tar/.tar.gz of PDFs")
+    ap.add_argument("--email", required=True, help="account the imported resumes belong to")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="PDF extraction processes")
+    ap.add_argument("--batch-size", type=int, default=256, help="files per extract/NER/embed/write batch")
+    ap.add_argument("--state", default=None, help="progress file (default: <source>.import-state.jsonl)")
+    args = ap.parse_args()
+
+    state_path = args.state or os.path.abspath(args.source).rstrip(os.sep) + ".import-state.jsonl"
+    done: set[str] = set()
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            done = {json.loads(line)["sha256"] for line in f if line.strip()}
+
+    users_col = database.candidates()
+    timer = StageTimer()
+    imported = skipped = failed = 0
+    started = time.perf_counter()
+
+    pdf_extractor.workers = args.workers
+    with open(state_path, "a") as state:
+        for batch in batched(iter_pdfs(args.source), args.batch_size):
+            # 1) Skip anything already imported by this or an earlier run
+            t = time.perf_counter()
+            hashed = [(name, data, hashlib.sha256(data).hexdigest()) for name, data in batch]
+            seen = {d["resume_sha256"] for d in users_col.find(
+                {"resume_sha256": {"$in": [h for _, _, h in hashed]}}, {"resume_sha256": 1})}
+            todo, batch_hashes = [], set()
+            for name, data, sha in hashed:
+                if sha in done or sha in seen or sha in batch_hashes:
+                    skipped += 1
+                    continue
+                batch_hashes.add(sha)
+                todo.append((name, data, sha))
+            timer.add("dedupe", t, len(batch))
+            if not todo:
+                continue
+
+            # 2) PDF text across the process pool
+            t = time.perf_counter()
+            texts = pdf_extractor.extract_many([data for _, data, _ in todo])
+            timer.add("extract", t, len(todo))
+            readable = []
+            for item, text in zip(todo, texts):
+                if isinstance(text, Exception):
+                    failed += 1
+                    state.write(json.dumps({"sha256": item[2], "file": item[0], "status": "unreadable",
+                                            "reason": text.code}) + "\n")
+                else:
+                    readable.append((*item, text))
+            if not readable:
+                state.flush()
+                continue
+
+            # 3) Skills, batched through the configured extractor
+            t = time.perf_counter()
+            skills = extract_skills_batch([text for *_, text in readable])
+            timer.add("skills", t, len(readable))
+
+            # 4) Embeddings in one large batch
+            t = time.perf_counter()
+            emb_fields = embed_resumes([text for *_, text in readable], batch_size=128)
+            timer.add("embed", t, len(readable))
+
+            # 5) GridFS blobs (an identical PDF already stored gains a reference) + one insert_many
+            t = time.perf_counter()
+            now = datetime.now(timezone.utc)
+            records = []
+            for (name, data, sha, text), sk, emb in zip(readable, skills, emb_fields):
+                resume_id = store_resume_file(data, os.path.basename(name), sha)
+                records.append({
+                    "name": name_from_filename(name),
+                    "email": args.email,
+                    "skills": sorted(sk),
+                    "resume_id": resume_id,
+                    "resume_filename": os.path.basename(name),
+                    "resume_text": text,
+                    "resume_sha256": sha,
+                    "imported_at": now,
+                    **emb,
+                })
+            users_col.insert_many(records, ordered=False)
+            update_saved_searches(records)
+            timer.add("write", t, len(records))
+
+            for name, _, sha, _ in readable:
+                state.write(json.dumps({"sha256": sha, "file": name, "status": "imported"}) + "\n")
+            state.flush()
+            imported += len(records)
+
+            elapsed = time.perf_counter() - started
+            print(f"{imported} imported, {skipped} skipped, {failed} unreadable "
+                  f"({imported / elapsed:.1f} docs/s overall)", flush=True)
+
+    print(f"Done: {imported} imported, {skipped} skipped, {failed} unreadable "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(timer.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Shared MongoDB access: one pooled client per process plus accessors for the app's collections."""
+import os
+import threading
+from gridfs import GridFS
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+
+import metrics
+
+# Cached scores and rankings not touched for this long are dropped by MongoDB
+SCORE_CACHE_TTL = int(os.getenv("SCORE_CACHE_TTL", str(7 * 86400)))
+
+_client: MongoClient | None = None
+_client_pid: int | None = None
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # A client must not cross a fork; pre-fork workers build their own on first use
+    global _client, _client_pid, _lock
+    _client, _client_pid = None, None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_client() -> MongoClient:
+    """The process-wide client. Pool size and timeouts come from MONGO_* env vars."""
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = MongoClient(
+                os.getenv("MongoDBURL"),  # Replace this with your own MongoDB url
+                tls=os.getenv("MONGO_TLS", "1") == "1",
+                tlsAllowInvalidCertificates=True,
+                maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+                minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+                maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_MS", "300000")),
+                connectTimeoutMS=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+                serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+                socketTimeoutMS=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000")),
+                waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+                connect=False,  # no sockets until first use, so a pre-fork parent stays clean
+                event_listeners=[metrics.MongoCommandListener()],
+            )
+            _client_pid = os.getpid()
+    return _client
+
+
+# ===========================================================================================================
+# Collections
+# ===========================================================================================================
+def users() -> Collection:
+    """login.users: accounts (email, bcrypt password, user_type)."""
+    return get_client()["login"]["users"]
+
+def candidates() -> Collection:
+    """candidates.candidates: one record per uploaded resume."""
+    return get_client()["candidates"]["candidates"]
+
+def compare_history() -> Collection:
+    """candidates.compare_history: candidate resume-vs-JD comparisons."""
+    return get_client()["candidates"]["compare_history"]
+
+def company_match_history() -> Collection:
+    """candidates.company_match_history: company search runs with their top results."""
+    return get_client()["candidates"]["company_match_history"]
+
+def pair_scores() -> Collection:
+    """candidates.pair_scores: cached resume-vs-JD scores from /candidate/compare."""
+    return get_client()["candidates"]["pair_scores"]
+
+def match_rankings() -> Collection:
+    """candidates.match_rankings: cached /match rankings per JD, extended as resumes arrive."""
+    return get_client()["candidates"]["match_rankings"]
+
+def saved_searches() -> Collection:
+    """candidates.saved_searches: standing company queries whose top-k is kept current on upload."""
+    return get_client()["candidates"]["saved_searches"]
+
+def resume_fs() -> GridFS:
+    """GridFS bucket holding the uploaded resume PDFs."""
+    return GridFS(get_client()["candidates"])
+
+
+def drop_index_if_exists(coll: Collection, keys: list[tuple[str, int]]):
+    """Drop an index by key pattern; fine if it is missing or another process dropped it first."""
+    name = "_".join(f"{field}_{direction}" for field, direction in keys)
+    if name not in coll.index_information():
+        return
+    try:
+        coll.drop_index(name)
+    except OperationFailure:
+        if name in coll.index_information():
+            raise
+
+
+def ensure_indexes():
+    """Create the indexes the routes rely on (no-op when they already exist)."""
+    users().create_index([("email", ASCENDING)])
+    candidates().create_index([("email", ASCENDING)])
+    candidates().create_index([("resume_id", ASCENDING)])
+    candidates().create_index([("resume_sha256", ASCENDING)])
+    candidates().create_index([("embedded_at", ASCENDING)])
+    compare_history().create_index([("email", ASCENDING), ("compared_at", DESCENDING), ("_id", DESCENDING)])
+    company_match_history().create_index([("email", ASCENDING), ("ran_at", DESCENDING), ("_id", DESCENDING)])
+    pair_scores().create_index([("jd_fp", ASCENDING), ("resume_id", ASCENDING), ("model_version", ASCENDING)],
+                               unique=True)
+    pair_scores().create_index([("resume_id", ASCENDING)])
+    pair_scores().create_index([("created_at", ASCENDING)], expireAfterSeconds=SCORE_CACHE_TTL)
+    match_rankings().create_index([("entries.ids", ASCENDING)])
+    saved_searches().create_index([("email", ASCENDING), ("created_at", DESCENDING)])
+    saved_searches().create_index([("active", ASCENDING)])
+    saved_searches().create_index([("results.candidate_id", ASCENDING)])
+    match_rankings().create_index([("updated_at", ASCENDING)], expireAfterSeconds=SCORE_CACHE_TTL)
+    # prefixes of the history indexes above: dropped so writes stop maintaining them
+    drop_index_if_exists(compare_history(), [("email", ASCENDING), ("compared_at", DESCENDING)])
+    drop_index_if_exists(company_match_history(), [("email", ASCENDING), ("ran_at", DESCENDING)])
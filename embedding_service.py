@@ -0,0 +1,112 @@
+"""
+In-process embedding service: encode requests from every request thread are queued,
+gathered into micro-batches (up to `max_batch` texts, waiting at most `max_wait_ms`
+for more to arrive) and run as a single model call on one worker thread.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class EmbeddingOverloaded(RuntimeError):
+    """The encode queue is full; the caller should back off and retry."""
+
+
+class MicroBatcher:
+    def __init__(self, encode_fn, max_batch: int = 64, max_wait_ms: float = 5.0,
+                 max_queue: int = 1024, timeout: float = 30.0):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.requests = self.texts = self.batches = self.rejected = self.failures = 0
+        self.max_batch_seen = 0
+        self.queue_wait_seconds = 0.0
+        self.encode_seconds = 0.0
+
+    def _ensure_worker(self):
+        # threads don't survive a fork: each worker process starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Embeddings for `texts`, computed in a shared batch. Raises EmbeddingOverloaded when full."""
+        if not texts:
+            return self.encode_fn([])
+        self._ensure_worker()
+        future: Future = Future()
+        try:
+            self._queue.put((list(texts), future, time.perf_counter()), block=False)
+        except queue.Full:
+            self.rejected += 1
+            raise EmbeddingOverloaded(f"embedding queue full ({self._queue.maxsize} requests waiting)")
+        self.requests += 1
+        return future.result(timeout=self.timeout)
+
+    def _gather(self) -> list[tuple]:
+        """Block for one request, then take more until the batch is full or max_wait has passed."""
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            texts = [t for item in batch for t in item[0]]
+            started = time.perf_counter()
+            self.queue_wait_seconds += sum(started - item[2] for item in batch)
+            try:
+                embs = self.encode_fn(texts)
+            except Exception as e:
+                self.failures += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.encode_seconds += time.perf_counter() - started
+            self.batches += 1
+            self.texts += len(texts)
+            self.max_batch_seen = max(self.max_batch_seen, len(texts))
+            offset = 0
+            for item_texts, future, _ in batch:
+                future.set_result(embs[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "queue_wait_seconds": round(self.queue_wait_seconds, 3),
+            "encode_seconds": round(self.encode_seconds, 3),
+        }
@@ -0,0 +1,291 @@
+"""
+Background job queue for resume ingestion.
+
+Uploads only store the raw PDF and enqueue a job; a pool of worker processes
+(`flask --app app ingest-worker`) parses, extracts skills, embeds and writes the
+candidate record. The local backend keeps jobs in a SQLite file, so nothing
+beyond MongoDB is needed to run it.
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+# Job states reported to the upload page
+QUEUED, PROCESSING, DONE, FAILED = "queued", "processing", "done", "failed"
+# retry_dead_letter() outcome when an equivalent job is already waiting
+PENDING = "pending"
+
+MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF = 5.0          # seconds, doubled on every retry
+VISIBILITY_TIMEOUT = 600.0   # a job "processing" longer than this is presumed lost and re-queued
+
+# kind -> callable(payload) -> result dict; filled in with @handler by the app
+HANDLERS = {}
+# kind -> callable(payload) run once a job of that kind is dead-lettered, to free what it holds
+DEAD_LETTER_HANDLERS = {}
+
+
+def handler(kind: str):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def on_dead_letter(kind: str):
+    def register(fn):
+        DEAD_LETTER_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class LocalJobQueue:
+    """SQLite-backed queue with retries, a visibility timeout and a dead-letter table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._db() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    claimed_at REAL,
+                    error TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    error TEXT,
+                    failed_at REAL NOT NULL
+                );
+            """)
+            # dedupe_key: at most one pending job per key (e.g. one backfill per record)
+            try:
+                conn.execute("ALTER TABLE jobs ADD COLUMN dedupe_key TEXT")
+            except sqlite3.OperationalError:
+                pass  # already there
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_key ON jobs (dedupe_key) "
+                "WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'processing')"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _db(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, payload: dict, dedupe_key: str | None = None) -> str:
+        return self.enqueue_many(kind, [(payload, dedupe_key)])[0]
+
+    def enqueue_many(self, kind: str, items: list[tuple[dict, str | None]]) -> list[str]:
+        """Queue (payload, dedupe_key) pairs in one transaction; keys already pending are skipped."""
+        now = time.time()
+        rows = [(uuid.uuid4().hex, kind, json.dumps(payload), QUEUED, now, now, now, key)
+                for payload, key in items]
+        with self._db() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (id, kind, payload, status, available_at, created_at, updated_at, dedupe_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        return [r[0] for r in rows]
+
+    def claim(self) -> dict | None:
+        """Atomically take the oldest ready job (or one whose worker vanished) and mark it processing."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = ? AND available_at <= ?) "
+                "OR (status = ? AND claimed_at < ?) ORDER BY created_at LIMIT 1",
+                (QUEUED, now, PROCESSING, now - VISIBILITY_TIMEOUT),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, claimed_at = ?, updated_at = ? WHERE id = ?",
+                (PROCESSING, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            job = dict(row)
+            job["attempts"] += 1
+            job["payload"] = json.loads(job["payload"])
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, result: dict | None = None):
+        with self._db() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (DONE, json.dumps(result or {}), time.time(), job_id),
+            )
+
+    def fail(self, job: dict, error: str, retry: bool = True) -> bool:
+        """
+        Re-queue with backoff, or dead-letter once MAX_ATTEMPTS is used up (at once if not `retry`).
+        Returns whether the job was dead-lettered.
+        """
+        now = time.time()
+        with self._db() as conn:
+            if retry and job["attempts"] < MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (QUEUED, now + RETRY_BACKOFF * 2 ** (job["attempts"] - 1), error, now, job["id"]),
+                )
+                return False
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (FAILED, error, now, job["id"]),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO dead_letters (job_id, kind, payload, error, failed_at) VALUES (?, ?, ?, ?, ?)",
+                (job["id"], job["kind"], json.dumps(job["payload"]), error, now),
+            )
+        return True
+
+    def get(self, job_id: str) -> dict | None:
+        with self._db() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def dead_letters(self) -> list[dict]:
+        with self._db() as conn:
+            rows = conn.execute("SELECT * FROM dead_letters ORDER BY failed_at DESC").fetchall()
+        return [dict(r, payload=json.loads(r["payload"])) for r in rows]
+
+    def dead_letter(self, job_id: str) -> dict | None:
+        with self._db() as conn:
+            row = conn.execute("SELECT * FROM dead_letters WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row, payload=json.loads(row["payload"])) if row else None
+
+    def retry_dead_letter(self, job_id: str) -> str | None:
+        """
+        Give a dead-lettered job a fresh set of attempts: QUEUED, or None if there is no such
+        dead letter. If a newer job with the same dedupe key is already pending, that one does
+        the work: the dead letter is dropped, the job stays failed, and PENDING is returned.
+        """
+        now = time.time()
+        with self._db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if not conn.execute("DELETE FROM dead_letters WHERE job_id = ?", (job_id,)).rowcount:
+                conn.execute("COMMIT")
+                return None
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE id = ?",
+                    (QUEUED, now, now, job_id),
+                )
+                outcome = QUEUED
+            except sqlite3.IntegrityError:   # jobs_pending_key: one pending job per dedupe key
+                outcome = PENDING
+            conn.execute("COMMIT")
+        return outcome
+
+
+def get_queue(path: str) -> LocalJobQueue:
+    backend = os.getenv("INGEST_QUEUE_BACKEND", "local")
+    if backend != "local":
+        raise ValueError(f"Unknown ingest queue backend: {backend}")
+    return LocalJobQueue(path)
+
+
+# ===========================================================================================================
+# Workers
+# ===========================================================================================================
+def run_one(queue: LocalJobQueue) -> bool:
+    """Process a single job if one is ready. Returns False when the queue was empty."""
+    job = queue.claim()
+    if job is None:
+        return False
+    fn = HANDLERS.get(job["kind"])
+    try:
+        if fn is None:
+            raise LookupError(f"No handler for job kind {job['kind']!r}")
+        result = fn(job["payload"])
+    except Exception as e:
+        print(f"[ingest] job {job['id']} attempt {job['attempts']} failed: {e}")
+        traceback.print_exc()
+        # errors that mark themselves `retryable = False` (e.g. an over-long PDF) would only fail again
+        if queue.fail(job, f"{type(e).__name__}: {e}", retry=getattr(e, "retryable", True)):
+            cleanup = DEAD_LETTER_HANDLERS.get(job["kind"])
+            if cleanup is not None:
+                try:
+                    cleanup(job["payload"])
+                except Exception:
+                    print(f"[ingest] cleanup of dead-lettered job {job['id']} failed")
+                    traceback.print_exc()
+    else:
+        queue.complete(job["id"], result)
+    return True
+
+
+def worker_loop(path: str, poll_interval: float = 1.0, handlers_module: str | None = None):
+    if handlers_module:
+        # registers the @handler functions: a spawned (not forked) worker starts without them
+        importlib.import_module(handlers_module)
+    queue = get_queue(path)
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        if not run_one(queue):
+            time.sleep(poll_interval)
+
+
+def run_workers(path: str, processes: int, handlers_module: str | None = None):
+    """Run `processes` worker processes until interrupted; each imports `handlers_module` first."""
+    # not daemonic: workers start their own PDF extraction pools, which daemonic processes can't
+    procs = [multiprocessing.Process(target=worker_loop, args=(path,), kwargs={"handlers_module": handlers_module})
+             for _ in range(processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
@@ -0,0 +1,182 @@
+"""
+Cache of job-description analysis: the JD's skill set and embedding, keyed on a hash
+of the normalised text. Kept in a SQLite file so every web/worker process shares it.
+Entries are evicted least-recently-used beyond `max_entries`, expire after `ttl`
+seconds, and are dropped as soon as the model version they were computed with changes.
+A lookup is a plain read: its access time and the hit counters are kept in memory and
+written back in batches, so concurrent hits never queue for SQLite's write lock.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+COUNTERS = ("hits", "misses", "evictions", "expirations", "invalidations")
+FLUSH_EVERY = 64        # lookups recorded in memory before they are written back
+FLUSH_INTERVAL = 5.0    # seconds, at most, before they are written back
+
+
+def normalize_jd(text: str) -> str:
+    """Canonical form of a pasted JD: NFKC, trimmed, runs of whitespace collapsed."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def jd_fingerprint(text: str) -> str:
+    """sha256 of the normalised JD text."""
+    return hashlib.sha256(normalize_jd(text).encode("utf-8")).hexdigest()
+
+
+class JDCache:
+    """LRU + TTL cache of (skills, embedding) per JD fingerprint."""
+
+    def __init__(self, path: str, max_entries: int = 2048, ttl: float = 86400.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}   # key -> last access not yet written
+        self._counts: Counter = Counter()      # counter increments not yet written
+        self._flushed_at = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._db() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    model_version TEXT NOT NULL,
+                    tech TEXT NOT NULL,
+                    embedding BLOB,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at);
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                );
+            """)
+            conn.executemany("INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                             [(c,) for c in COUNTERS])
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _db(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bump(conn, name: str, n: int = 1):
+        if n:
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (n, name))
+
+    def _record(self, counter: str, key: str | None = None, now: float = 0.0):
+        with self._lock:
+            self._counts[counter] += 1
+            if key is not None:
+                self._touched[key] = now
+            due = (len(self._touched) >= FLUSH_EVERY
+                   or time.monotonic() - self._flushed_at >= FLUSH_INTERVAL)
+        if due:
+            self.flush(wait=False)
+
+    def flush(self, wait: bool = True):
+        """
+        Write recorded access times and counters back. With `wait=False` a flush that would
+        have to wait for another process's write is skipped and retried on a later lookup.
+        """
+        with self._lock:
+            touched, counts = self._touched, self._counts
+            self._touched, self._counts = {}, Counter()
+            self._flushed_at = time.monotonic()
+        if not touched and not counts:
+            return
+        try:
+            conn = sqlite3.connect(self.path, timeout=30 if wait else 0, isolation_level=None)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                # rows evicted meanwhile simply don't match
+                conn.executemany("UPDATE entries SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                                 [(t, k) for k, t in touched.items()])
+                for name, n in counts.items():
+                    self._bump(conn, name, n)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            if wait:
+                raise
+            with self._lock:   # locked: keep them for the next flush
+                for k, t in touched.items():
+                    self._touched[k] = max(t, self._touched.get(k, t))
+                self._counts.update(counts)
+
+    def get(self, key: str, model_version: str) -> tuple[set[str], np.ndarray | None] | None:
+        now = time.time()
+        with self._db() as conn:
+            row = conn.execute(
+                "SELECT model_version, tech, embedding, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        # a stale entry is left for put() to overwrite (which counts the invalidations) or LRU to evict
+        if row is not None and row[0] != model_version:
+            row = None
+        elif row is not None and now - row[3] > self.ttl:
+            self._record("expirations")
+            row = None
+        if row is None:
+            self._record("misses")
+            return None
+        self._record("hits", key, now)
+        emb = np.frombuffer(row[2], dtype=np.float32).copy() if row[2] is not None else None
+        return set(json.loads(row[1])), emb
+
+    def put(self, key: str, model_version: str, tech: set[str], emb: np.ndarray | None):
+        now = time.time()
+        blob = np.asarray(emb, dtype=np.float32).tobytes() if emb is not None else None
+        self.flush(wait=False)   # LRU eviction below should see recent hits
+        with self._db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # a new model makes every older entry useless: drop them all at once
+            stale = conn.execute("DELETE FROM entries WHERE model_version != ?", (model_version,)).rowcount
+            self._bump(conn, "invalidations", stale)
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, model_version, tech, embedding, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_version, json.dumps(sorted(tech)), blob, now, now),
+            )
+            evicted = conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._bump(conn, "evictions", evicted)
+            conn.execute("COMMIT")
+
+    def stats(self) -> dict:
+        """Counters across all processes (others' latest lookups may not be written back yet)."""
+        self.flush()
+        with self._db() as conn:
+            out = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            out["entries"] = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._touched, self._counts = {}, Counter()
+        with self._db() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE counters SET value = 0")
@@ -0,0 +1,214 @@
+"""
+Per-process latency and counter metrics, rendered in the Prometheus text format at /metrics.
+
+A request carries a Trace (in a context variable): `span(stage)` times a stage of it into
+the `matchwise_stage_seconds{route,stage}` histogram and onto the trace, and the MongoDB
+command listener counts round-trips against it. A span costs two perf_counter() calls and
+a locked bucket increment, so the instrumentation stays on in production.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+# Seconds; spans both a cache hit and a cold model load
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Route label for work done outside a request (ingest workers, CLI commands)
+BACKGROUND = "background"
+
+
+def _labels(names: tuple, values: tuple, **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    esc = (lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+def _num(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter",
+                *(f"{self.name}{_labels(self.labels, k)} {_num(v)}" for k, v in items)]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series: dict[tuple, list] = {}   # labels -> per-bucket counts + [sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in items:
+            total = 0
+            for le, n in zip(self.buckets, series):
+                total += n
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le=_num(le))} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {total}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("matchwise_request_seconds", "Request latency.", ("route", "method", "status"))
+STAGE_SECONDS = Histogram("matchwise_stage_seconds", "Time spent per stage of a request.", ("route", "stage"))
+MONGO_COMMANDS = Counter("matchwise_mongo_commands_total", "MongoDB round-trips.", ("route", "command"))
+MONGO_SECONDS = Counter("matchwise_mongo_command_seconds_total", "Time spent in MongoDB round-trips.",
+                        ("route", "command"))
+MONGO_FAILURES = Counter("matchwise_mongo_command_failures_total", "Failed MongoDB commands.", ("command",))
+MODEL_LOADS = Counter("matchwise_model_loads_total", "Models loaded into this process.", ("model",))
+GRIDFS_FALLBACKS = Counter("matchwise_gridfs_fallbacks_total",
+                           "Resume texts re-extracted from the stored PDF.", ("route",))
+
+METRICS = [REQUEST_SECONDS, STAGE_SECONDS, MONGO_COMMANDS, MONGO_SECONDS, MONGO_FAILURES, MODEL_LOADS,
+           GRIDFS_FALLBACKS]
+_collectors = []
+
+
+def register_collector(fn):
+    """`fn()` returns (name, type, help, value) tuples read at scrape time, e.g. queue depths."""
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    lines = [line for metric in METRICS for line in metric.render()]
+    for fn in _collectors:
+        for name, kind, help, value in fn():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_num(value)}"]
+    return "\n".join(lines) + "\n"
+
+
+# ===========================================================================================================
+# Request traces
+# ===========================================================================================================
+class Trace:
+    __slots__ = ("route", "started", "spans", "mongo_calls", "mongo_seconds")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.perf_counter()
+        self.spans: list[tuple[str, float]] = []
+        self.mongo_calls = 0
+        self.mongo_seconds = 0.0
+
+    def stages(self) -> dict[str, float]:
+        """Seconds per stage, repeated stages summed, in the order they first ran."""
+        out: dict[str, float] = {}
+        for stage, seconds in self.spans:
+            out[stage] = out.get(stage, 0.0) + seconds
+        return out
+
+    def server_timing(self, total: float) -> str:
+        """The trace as a Server-Timing header value (durations in ms)."""
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages().items()]
+        parts.append(f'mongo;dur={self.mongo_seconds * 1000:.1f};desc="{self.mongo_calls} calls"')
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def log_line(self, method: str, path: str, status: int, total: float) -> str:
+        parts = [f"[profile] {method} {path} {status} total={total * 1000:.1f}ms",
+                 *(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.stages().items()),
+                 f"mongo={self.mongo_calls}/{self.mongo_seconds * 1000:.1f}ms"]
+        return " ".join(parts)
+
+
+_trace: ContextVar[Trace | None] = ContextVar("matchwise_trace", default=None)
+
+
+def begin(route: str) -> Trace:
+    trace = Trace(route)
+    _trace.set(trace)
+    return trace
+
+
+def current() -> Trace | None:
+    return _trace.get()
+
+
+def end(method: str, status: int) -> tuple[Trace, float] | None:
+    """Close the current trace: (trace, total seconds), recorded under the request histogram."""
+    trace = _trace.get()
+    if trace is None:
+        return None
+    _trace.set(None)
+    total = time.perf_counter() - trace.started
+    REQUEST_SECONDS.observe(total, trace.route, method, str(status))
+    return trace, total
+
+
+def route() -> str:
+    trace = _trace.get()
+    return trace.route if trace is not None else BACKGROUND
+
+
+def record(stage: str, seconds: float):
+    trace = _trace.get()
+    STAGE_SECONDS.observe(seconds, trace.route if trace is not None else BACKGROUND, stage)
+    if trace is not None:
+        trace.spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts every MongoDB command against the route (and trace) that issued it."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_FAILURES.inc(event.command_name)
+        self._record(event.command_name, event.duration_micros / 1e6)
+
+    @staticmethod
+    def _record(command: str, seconds: float):
+        # pymongo calls listeners on the thread that ran the command, so the context is the caller's
+        trace = _trace.get()
+        name = trace.route if trace is not None else BACKGROUND
+        MONGO_COMMANDS.inc(name, command)
+        MONGO_SECONDS.inc(name, command, amount=seconds)
+        if trace is not None:
+            trace.mongo_calls += 1
+            trace.mongo_seconds += seconds
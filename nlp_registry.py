@@ -0,0 +1,95 @@
+"""Process-wide spaCy pipeline for skill extraction, loaded once and hot-swapped on retrain."""
+import os
+import threading
+import time
+import spacy
+
+import metrics
+
+MODEL_PATH = "model_upgrade"        # written by train.py
+FALLBACK_MODEL = "en_core_web_sm"
+
+# extract_tech() only reads doc.ents, so everything but the tokenizer and NER is dead weight
+UNUSED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter", "morphologizer"]
+
+
+class NLPRegistry:
+    """
+    Holds one loaded pipeline per process.
+
+    `get()` is cheap: every `check_interval` seconds it stats the trained model's
+    meta.json and, if train.py has written a new one, loads it and swaps it in.
+    Callers that already hold the old pipeline keep using it until they finish.
+    """
+
+    def __init__(self, model_path: str = MODEL_PATH, fallback: str = FALLBACK_MODEL,
+                 check_interval: float = 5.0):
+        self.model_path = model_path
+        self.fallback = fallback
+        self.check_interval = check_interval
+        self._nlp = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._force = False
+        self.loads = 0
+
+    def _model_stamp(self) -> float | None:
+        try:
+            return os.stat(os.path.join(self.model_path, "meta.json")).st_mtime
+        except OSError:
+            return None
+
+    def _load(self, stamp):
+        with metrics.span("spacy_load"):
+            nlp = self._load_pipeline(stamp)
+        metrics.MODEL_LOADS.inc("spacy")
+        self.loads += 1
+        return nlp
+
+    def _load_pipeline(self, stamp):
+        try:
+            nlp = spacy.load(self.model_path, exclude=UNUSED_PIPES) if stamp else None
+        except Exception:
+            nlp = None
+        if nlp is None:
+            nlp = spacy.load(self.fallback, exclude=UNUSED_PIPES)
+        # NER usually carries its own tok2vec; drop the shared one if nothing listens to it
+        if "tok2vec" in nlp.pipe_names:
+            listeners = getattr(nlp.get_pipe("tok2vec"), "listening_components", [])
+            if not any(name in nlp.pipe_names for name in listeners):
+                nlp.remove_pipe("tok2vec")
+        return nlp
+
+    def get(self):
+        now = time.monotonic()
+        if self._nlp is not None and now - self._checked_at < self.check_interval:
+            return self._nlp
+        with self._lock:
+            self._checked_at = now
+            stamp = self._model_stamp()
+            # a missing stamp mid-retrain is not a reason to drop a loaded model
+            if self._nlp is None or self._force or (stamp is not None and stamp != self._stamp):
+                self._nlp = self._load(stamp)
+                self._stamp = stamp
+                self._force = False
+            return self._nlp
+
+    def reload(self):
+        """Force a reload on the next `get()`."""
+        with self._lock:
+            self._force = True
+            self._checked_at = 0.0
+
+    def warm(self):
+        """Load the pipeline and run it once so the first request doesn't pay for it."""
+        self.get()("Warm-up: Python, Flask and MongoDB.")
+
+    @property
+    def version(self) -> str:
+        """Identifies the loaded pipeline; changes whenever a new model is swapped in."""
+        nlp = self.get()
+        return f"{nlp.meta.get('name')}-{nlp.meta.get('version')}@{self._stamp or 0:.0f}"
+
+
+nlp_registry = NLPRegistry()
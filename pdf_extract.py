@@ -0,0 +1,282 @@
+"""
+Resume PDF text extraction with limits. Parsing runs in a pool of subprocesses so a
+pathological PDF can be killed at its deadline instead of pinning the worker; documents
+are checked against a byte and page limit first, long ones are split into page ranges
+extracted in parallel, and extraction stops once `max_chars` of text is collected.
+Failures are raised as PDFExtractionError with a machine-readable code.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from io import BytesIO, StringIO
+
+# Longest resume_text stored on a record; nothing past it is ever read
+RESUME_TEXT_CHARS = 50_000
+
+# Failure codes, with the message shown to the uploader
+TOO_LARGE, TOO_MANY_PAGES, ENCRYPTED, UNREADABLE, NO_TEXT, TIMEOUT = (
+    "too_large", "too_many_pages", "encrypted", "unreadable", "no_text", "timeout")
+MESSAGES = {
+    TOO_LARGE: "That PDF is too large. Please upload a smaller file.",
+    TOO_MANY_PAGES: "That PDF has too many pages for a resume.",
+    ENCRYPTED: "That PDF is password-protected. Please upload an unlocked copy.",
+    UNREADABLE: "We couldn't read that PDF. Please upload a text-based PDF.",
+    NO_TEXT: "That PDF has no text we can read (is it a scan?). Please upload a text-based PDF.",
+    TIMEOUT: "That PDF took too long to read. Please upload a simpler file.",
+}
+
+
+class PDFExtractionError(ValueError):
+    """`code` is one of the failure codes above; only timeouts are worth retrying."""
+
+    def __init__(self, code: str, detail: str = ""):
+        super().__init__(f"{code}: {detail}" if detail else code)
+        self.code = code
+        self.detail = detail
+        self.retryable = code == TIMEOUT
+
+    def __reduce__(self):
+        # raised inside pool workers, so it has to survive the trip back
+        return type(self), (self.code, self.detail)
+
+
+# ===========================================================================================================
+# Engines
+# ===========================================================================================================
+# name -> engine class with open(data), page_count(doc) and extract(doc, start, stop, max_chars).
+# Engines run inside the pool processes, so they must be registered at import time of this module.
+ENGINES = {}
+
+
+def engine(name: str):
+    def register(cls):
+        ENGINES[name] = cls
+        return cls
+    return register
+
+
+@engine("pdfminer")
+class PdfminerEngine:
+    """pdfminer.six, producing exactly what pdfminer.high_level.extract_text() does, page by page."""
+
+    @staticmethod
+    def open(data: bytes):
+        from pdfminer.pdfdocument import PDFDocument, PDFEncryptionError, PDFPasswordIncorrect
+        from pdfminer.pdfparser import PDFParser
+        try:
+            return PDFDocument(PDFParser(BytesIO(data)))
+        except (PDFPasswordIncorrect, PDFEncryptionError) as e:
+            raise PDFExtractionError(ENCRYPTED, str(e) or type(e).__name__)
+
+    @staticmethod
+    def page_count(doc) -> int:
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdftypes import resolve1
+        try:
+            return int(resolve1(doc.catalog["Pages"])["Count"])
+        except Exception:   # broken page tree: walk it instead
+            return sum(1 for _ in PDFPage.create_pages(doc))
+
+    @staticmethod
+    def extract(doc, start: int, stop: int, max_chars: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        rsrc, out = PDFResourceManager(caching=True), StringIO()
+        device = TextConverter(rsrc, out, laparams=LAParams())
+        interpreter = PDFPageInterpreter(rsrc, device)
+        for i, page in enumerate(PDFPage.create_pages(doc)):
+            if i >= stop or out.tell() >= max_chars:
+                break
+            if i >= start:
+                interpreter.process_page(page)
+        device.close()
+        return out.getvalue()
+
+
+# -- pool tasks (module-level so they pickle) ---------------------------------------------------------------
+@contextmanager
+def _parse_errors():
+    """Whatever the parser throws on a malformed file is reported as UNREADABLE."""
+    try:
+        yield
+    except PDFExtractionError:
+        raise
+    except Exception as e:
+        raise PDFExtractionError(UNREADABLE, f"{type(e).__name__}: {e}")
+
+
+def probe_task(engine_name: str, data: bytes, max_pages: int, max_chars: int, inline_pages: int):
+    """('text', text) for a document of at most `inline_pages` pages, else ('pages', n) to fan out."""
+    eng = ENGINES[engine_name]
+    with _parse_errors():
+        doc = eng.open(data)
+        pages = eng.page_count(doc)
+        if pages > max_pages:
+            raise PDFExtractionError(TOO_MANY_PAGES, f"{pages} pages (limit {max_pages})")
+        if pages <= inline_pages:
+            return "text", eng.extract(doc, 0, pages, max_chars)
+        return "pages", pages
+
+
+def range_task(engine_name: str, data: bytes, start: int, stop: int, max_chars: int) -> str:
+    eng = ENGINES[engine_name]
+    with _parse_errors():
+        return eng.extract(eng.open(data), start, stop, max_chars)
+
+
+# ===========================================================================================================
+# Extractor
+# ===========================================================================================================
+class PDFExtractor:
+    def __init__(self, engine: str = "pdfminer", workers: int = 2, max_bytes: int = 10 << 20,
+                 max_pages: int = 50, timeout: float = 20.0, max_chars: int = RESUME_TEXT_CHARS,
+                 parallel_pages: int = 8, pages_per_task: int = 4):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown PDF engine {engine!r} (expected one of {', '.join(ENGINES)})")
+        self.engine = engine
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.max_chars = max_chars
+        self.parallel_pages = parallel_pages   # documents longer than this are split into page ranges
+        self.pages_per_task = pages_per_task
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    # -- pool ---------------------------------------------------------------------------------------------
+    def _get_pool(self):
+        # started on first use, with the platform's default start method like the ingest workers
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = multiprocessing.Pool(self.workers)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _kill_pool(self, pool):
+        """Terminate a pool with a runaway task; the next call starts a new one."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.terminate()
+
+    def close(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.terminate()
+        self._pool = None
+
+    # -- extraction ---------------------------------------------------------------------------------------
+    def check_size(self, data: bytes):
+        if len(data) > self.max_bytes:
+            raise PDFExtractionError(TOO_LARGE, f"{len(data)} bytes (limit {self.max_bytes})")
+        if not data.startswith(b"%PDF"):
+            raise PDFExtractionError(UNREADABLE, "not a PDF")
+
+    def _finish(self, text: str) -> str:
+        text = text[:self.max_chars]
+        if not text.strip():
+            raise PDFExtractionError(NO_TEXT, "no extractable text")
+        return text
+
+    def extract(self, data: bytes) -> str:
+        """Text of one PDF (at most `max_chars`); raises PDFExtractionError."""
+        self.check_size(data)
+        if self.workers <= 0:   # in-process, without a deadline
+            return self._finish(probe_task(self.engine, data, self.max_pages, self.max_chars, self.max_pages)[1])
+
+        pool = self._get_pool()
+        deadline = time.monotonic() + self.timeout
+        try:
+            kind, value = self._wait(pool, pool.apply_async(
+                probe_task, (self.engine, data, self.max_pages, self.max_chars, self.parallel_pages)), deadline)
+            if kind == "text":
+                return self._finish(value)
+
+            # Long document: page ranges in parallel, collected in order so we can stop at max_chars
+            ranges = deque((s, min(s + self.pages_per_task, value)) for s in range(0, value, self.pages_per_task))
+            pending, parts, collected = deque(), [], 0
+            while ranges or pending:
+                while ranges and len(pending) < self.workers:
+                    start, stop = ranges.popleft()
+                    pending.append(pool.apply_async(range_task, (self.engine, data, start, stop, self.max_chars)))
+                part = self._wait(pool, pending.popleft(), deadline)
+                parts.append(part)
+                collected += len(part)
+                if collected >= self.max_chars:
+                    break   # ranges still in flight finish on their own; their text isn't needed
+            return self._finish("".join(parts))
+        except multiprocessing.TimeoutError:
+            self._kill_pool(pool)
+            raise PDFExtractionError(TIMEOUT, f"no result within {self.timeout:g}s")
+
+    def _wait(self, pool, result, deadline: float):
+        return result.get(timeout=max(0.0, deadline - time.monotonic()))
+
+    def extract_many(self, datas: list[bytes]) -> list:
+        """
+        Text (or the PDFExtractionError) per PDF, documents spread across the pool. Each
+        document gets `timeout` from the moment a worker starts on it; a runaway one kills
+        the pool, and the documents that were running alongside it are started again.
+        """
+        out: list = [None] * len(datas)
+        todo = deque()
+        for i, data in enumerate(datas):
+            try:
+                self.check_size(data)
+                todo.append(i)
+            except PDFExtractionError as e:
+                out[i] = e
+        if self.workers <= 0:
+            for i in todo:
+                try:
+                    out[i] = self.extract(datas[i])
+                except PDFExtractionError as e:
+                    out[i] = e
+            return out
+
+        finished: queue.Queue = queue.Queue()
+        running: dict[int, tuple[int, float]] = {}   # doc -> (submission, deadline)
+        submission = 0
+        pool = self._get_pool()
+        while todo or running:
+            while todo and len(running) < self.workers:
+                i = todo.popleft()
+                submission += 1
+                running[i] = (submission, time.monotonic() + self.timeout)
+                pool.apply_async(probe_task, (self.engine, datas[i], self.max_pages, self.max_chars, self.max_pages),
+                                 callback=lambda r, i=i, s=submission: finished.put((i, s, r, None)),
+                                 error_callback=lambda e, i=i, s=submission: finished.put((i, s, None, e)))
+            nearest = min(deadline for _, deadline in running.values())
+            try:
+                i, s, result, error = finished.get(timeout=max(0.0, nearest - time.monotonic()))
+            except queue.Empty:
+                now = time.monotonic()
+                for i, (_, deadline) in list(running.items()):
+                    if deadline <= now:
+                        out[i] = PDFExtractionError(TIMEOUT, f"no result within {self.timeout:g}s")
+                        del running[i]
+                # restart the pool and requeue whatever was running beside the runaway document
+                self._kill_pool(pool)
+                todo.extendleft(sorted(running, reverse=True))
+                running.clear()
+                pool = self._get_pool()
+                continue
+            if running.get(i, (None,))[0] != s:
+                continue   # a result from before a restart
+            del running[i]
+            if error is not None:
+                out[i] = error if isinstance(error, PDFExtractionError) else PDFExtractionError(UNREADABLE, str(error))
+                continue
+            try:
+                out[i] = self._finish(result[1])
+            except PDFExtractionError as e:
+                out[i] = e
+        return out
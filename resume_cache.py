@@ -0,0 +1,100 @@
+"""
+Local disk cache of resume PDFs served by /fetch_resume. GridFS blobs never change once
+written, so a file is keyed on its content hash and never goes stale; it is filled as a
+full download streams past, and the least recently served files are evicted beyond
+`max_bytes`. Any number of processes can share the directory: files appear by atomic
+rename and a reader keeps its open file even if it is evicted meanwhile.
+"""
+import os
+import re
+import time
+import uuid
+
+SAFE_KEY = re.compile(r"^[0-9A-Za-z_-]{1,128}$")
+
+
+class ResumeFileCache:
+    def __init__(self, path: str, max_bytes: int = 256 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+        self.hits = self.misses = self.evictions = 0
+
+    def _file(self, key: str) -> str:
+        if not SAFE_KEY.match(key):
+            raise ValueError(f"bad cache key {key!r}")
+        return os.path.join(self.path, f"{key}.pdf")
+
+    def open(self, key: str, length: int):
+        """The cached file opened for reading, or None. A size mismatch counts as a miss."""
+        path = self._file(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        if os.fstat(f.fileno()).st_size != length:
+            f.close()
+            self.misses += 1
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))   # mtime is the LRU clock
+        except OSError:
+            pass
+        self.hits += 1
+        return f
+
+    def fill(self, key: str, length: int, chunks):
+        """
+        Pass `chunks` through while writing them to the cache; the file is published only
+        if the whole body went by (an aborted download leaves nothing behind).
+        """
+        if length > self.max_bytes // 4:   # one huge file shouldn't flush everything else
+            yield from chunks
+            return
+        final = self._file(key)
+        tmp = os.path.join(self.path, f".{key}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        written = 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    written += len(chunk)
+                    yield chunk
+            if written == length:
+                os.replace(tmp, final)
+                self.evict()
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def discard(self, key: str):
+        try:
+            os.remove(self._file(key))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def evict(self):
+        """Drop the least recently served files until the cache fits in max_bytes."""
+        entries, total = [], 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".pdf"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,82 @@
+"""
+Section-aware resume chunking for multi-vector embeddings. MiniLM only reads the first
+~256 word pieces of its input, so a resume is split at its section headings (and within
+long sections at line breaks) into pieces the encoder sees in full; the chunk vectors
+are stored as one compact float16 matrix per record.
+"""
+import re
+
+import numpy as np
+from bson.binary import Binary
+
+# Bump when the splitting changes, so stored chunk matrices are recomputed
+CHUNKER_VERSION = 1
+
+CHUNK_CHARS = 800    # ~200 word pieces: safely inside MiniLM's 256-token window
+MAX_CHUNKS = 32      # caps storage at 32 x 384 x 2 bytes = 24 KiB per resume
+
+SECTION_HEADING = re.compile(
+    r"^\s*(summary|professional summary|profile|objective|about me|"
+    r"(work |professional |relevant )?experience|employment( history)?|work history|"
+    r"education|academic background|(technical |core )?skills|technologies|competencies|"
+    r"projects|personal projects|certifications?|licenses|publications|awards|honou?rs|"
+    r"achievements|languages|interests|volunteer(ing| experience)?|references)\s*:?\s*$",
+    re.I,
+)
+
+
+def split_sections(text: str) -> list[tuple[str, list[str]]]:
+    """(heading, lines) per section, in order; text before the first heading has heading ''."""
+    sections = [("", [])]
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if SECTION_HEADING.match(line):
+            sections.append((line.rstrip(":").strip().title(), []))
+        else:
+            sections[-1][1].append(line)
+    return [(h, lines) for h, lines in sections if lines]
+
+
+def _pieces(lines: list[str], size: int):
+    """Greedily pack lines into pieces of at most `size` chars; overlong lines are split on words."""
+    buf = ""
+    for line in lines:
+        while len(line) > size:
+            cut = line.rfind(" ", 0, size)
+            cut = cut if cut > 0 else size
+            if buf:
+                yield buf
+                buf = ""
+            yield line[:cut]
+            line = line[cut:].strip()
+        if buf and len(buf) + 1 + len(line) > size:
+            yield buf
+            buf = ""
+        buf = f"{buf} {line}" if buf else line
+    if buf:
+        yield buf
+
+
+def chunk_resume(text: str, size: int = CHUNK_CHARS, max_chunks: int = MAX_CHUNKS) -> list[str]:
+    """
+    Resume text as at most `max_chunks` chunks, each prefixed with its section heading
+    so a line like "5 years" keeps its context. Always at least one chunk.
+    """
+    chunks = []
+    for heading, lines in split_sections(text):
+        prefix = f"{heading}: " if heading else ""
+        chunks.extend(prefix + piece for piece in _pieces(lines, size - len(prefix)))
+        if len(chunks) >= max_chunks:
+            break
+    return chunks[:max_chunks] or [""]
+
+
+def pack_vectors(embs: np.ndarray) -> Binary:
+    """Vectors as float16 bytes (row-major) for storage on the candidate record."""
+    return Binary(np.asarray(embs, dtype=np.float16).tobytes())
+
+
+def unpack_vectors(blob: bytes, dim: int) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float16).astype(np.float32).reshape(-1, dim)
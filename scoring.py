@@ -0,0 +1,209 @@
+"""Vectorized candidate scoring: the same blend as `combined_similarity()` over many resumes at once."""
+import heapq
+import numpy as np
+
+
+def round1(values: np.ndarray) -> np.ndarray:
+    """Round to one decimal exactly like Python's round(x, 1)."""
+    out = np.round(values, 1)
+    # np.round scales by 10 first, which can flip values sitting on a .x5 boundary;
+    # redo only those few with Python's correctly-rounded round().
+    frac = np.abs(np.mod(values * 10.0, 1.0) - 0.5)
+    for i in np.flatnonzero(frac < 1e-6):
+        out.flat[i] = round(float(values.flat[i]), 1)
+    return out
+
+
+def blend_scores_vec(sem: np.ndarray, cov: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized `blend_scores()`: rounded (similarity, success) arrays on the 0..100 scale."""
+    sim = 100.0 * (0.65 * sem + 0.35 * cov)
+    z = 0.7 * sem + 0.3 * cov
+    success = 100.0 / (1.0 + np.exp(-4.0 * (z - 0.55)))
+    success = np.where(cov == 0, np.minimum(success, 15.0), success)
+    return round1(sim), round1(success)
+
+
+def rank_key(sim: np.ndarray, success: np.ndarray) -> np.ndarray:
+    """Integer sort key equivalent to ordering by (success, similarity) on rounded scores."""
+    s10 = np.rint(success * 10).astype(np.int64)
+    m10 = np.rint(sim * 10).astype(np.int64)
+    return s10 * 1001 + m10
+
+
+def pool_segments(values: np.ndarray, indptr: np.ndarray, pooling: str = "max") -> np.ndarray:
+    """
+    Max or mean of `values` (along the last axis) over each candidate's vectors
+    indptr[i]:indptr[i+1]. Every candidate must have at least one vector.
+    """
+    if values.shape[-1] == len(indptr) - 1:   # one vector each: nothing to pool
+        return values
+    if pooling == "mean":
+        return np.add.reduceat(values, indptr[:-1], axis=-1) / np.diff(indptr)
+    return np.maximum.reduceat(values, indptr[:-1], axis=-1)
+
+
+def top_k_indices(key: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k largest keys, best first.
+    Ties keep their original order, matching a stable `sorted(..., reverse=True)`.
+    """
+    n = len(key)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-key, k - 1)[:k]
+        threshold = key[part].min()
+        above = np.flatnonzero(key > threshold)
+        ties = np.flatnonzero(key == threshold)[: k - len(above)]
+        sel = np.concatenate([above, ties])
+    else:
+        sel = np.arange(n)
+    return sel[np.lexsort((sel, -key[sel]))]
+
+
+class CandidateMatrix:
+    """
+    Candidate vectors stacked into one matrix plus skill sets in CSR form. A candidate
+    has one resume embedding or several chunk embeddings (`vec_indptr` delimits them);
+    its semantic score is the max or mean (`pooling`) over its vectors.
+    """
+
+    def __init__(self, vectors: np.ndarray, vec_indptr: np.ndarray, skill_indptr: np.ndarray,
+                 skill_indices: np.ndarray, vocab: dict[str, int], payloads: list, pooling: str = "max"):
+        self.vectors = vectors
+        self.vec_indptr = vec_indptr
+        self.skill_indptr = skill_indptr
+        self.skill_indices = skill_indices
+        self.vocab = vocab
+        self.payloads = payloads
+        self.pooling = pooling
+        self._skill_rows = np.repeat(np.arange(len(payloads)), np.diff(skill_indptr))
+
+    def __len__(self):
+        return len(self.payloads)
+
+    @classmethod
+    def build(cls, rows, dim: int, pooling: str = "max") -> "CandidateMatrix":
+        """
+        rows: iterable of (payload, vectors, skills), where vectors is one unit-length
+        embedding or a (chunks x dim) matrix of them.
+        Skills are lowercased and de-duplicated, as the scalar path does.
+        """
+        payloads, vecs, vec_indptr, indptr, indices = [], [], [0], [0], []
+        vocab: dict[str, int] = {}
+        for payload, emb, skills in rows:
+            payloads.append(payload)
+            emb = np.atleast_2d(emb)
+            vecs.append(emb if len(emb) else np.zeros((1, dim), dtype=np.float32))
+            vec_indptr.append(vec_indptr[-1] + len(vecs[-1]))
+            for s in {s.lower() for s in (skills or [])}:
+                indices.append(vocab.setdefault(s, len(vocab)))
+            indptr.append(len(indices))
+        matrix = np.vstack(vecs).astype(np.float32) if vecs else np.zeros((0, dim), dtype=np.float32)
+        return cls(matrix, np.asarray(vec_indptr, dtype=np.int64), np.asarray(indptr, dtype=np.int64),
+                   np.asarray(indices, dtype=np.int32), vocab, payloads, pooling)
+
+    def semantic(self, jd_emb: np.ndarray | None) -> np.ndarray:
+        """Clamped pooled cosine similarity (0..1) of every candidate to the JD."""
+        if jd_emb is None or len(self) == 0:
+            return np.zeros(len(self))
+        sem = pool_segments(self.vectors @ np.asarray(jd_emb, dtype=np.float32), self.vec_indptr, self.pooling)
+        return np.clip(sem.astype(np.float64), 0.0, 1.0)
+
+    def semantic_many(self, jd_embs: np.ndarray) -> np.ndarray:
+        """semantic() for several JDs at once: a (JDs x candidates) matrix."""
+        if len(self) == 0:
+            return np.zeros((len(jd_embs), 0))
+        dots = np.asarray(jd_embs, dtype=np.float32) @ self.vectors.T
+        return np.clip(pool_segments(dots, self.vec_indptr, self.pooling).astype(np.float64), 0.0, 1.0)
+
+    def coverage(self, jd_tech: set[str]) -> np.ndarray:
+        """Fraction of JD skills each candidate covers (0..1)."""
+        if not jd_tech or len(self) == 0:
+            return np.zeros(len(self))
+        jd_ids = [self.vocab[s] for s in jd_tech if s in self.vocab]
+        hits = np.isin(self.skill_indices, jd_ids)
+        counts = np.bincount(self._skill_rows[hits], minlength=len(self))
+        return counts / len(jd_tech)
+
+    def coverage_many(self, jd_techs: list[set[str]]) -> np.ndarray:
+        """coverage() for several JDs at once: a (JDs x candidates) matrix."""
+        out = np.zeros((len(jd_techs), len(self)))
+        if len(self) == 0 or not self.vocab:
+            return out
+        wanted = np.zeros((len(jd_techs), len(self.vocab)), dtype=np.int32)
+        for j, tech in enumerate(jd_techs):
+            ids = [self.vocab[s] for s in tech if s in self.vocab]
+            wanted[j, ids] = 1
+        # per-candidate hit counts from prefix sums over each CSR row's skills
+        hits = np.zeros((len(jd_techs), len(self.skill_indices) + 1), dtype=np.int64)
+        np.cumsum(wanted[:, self.skill_indices], axis=1, out=hits[:, 1:])
+        counts = hits[:, self.skill_indptr[1:]] - hits[:, self.skill_indptr[:-1]]
+        sizes = np.array([len(t) for t in jd_techs], dtype=np.float64)
+        np.divide(counts, sizes[:, None], out=out, where=sizes[:, None] > 0)
+        return out
+
+    def score_many(self, jd_embs: np.ndarray, jd_techs: list[set[str]]) -> tuple[np.ndarray, np.ndarray]:
+        """score() for several JDs in one pass: (similarity, success) as (JDs x candidates) matrices."""
+        if len(self) == 0:
+            empty = np.zeros((len(jd_techs), 0))
+            return empty, empty.copy()
+        return blend_scores_vec(self.semantic_many(jd_embs), self.coverage_many(jd_techs))
+
+    def score(self, jd_emb: np.ndarray | None, jd_tech: set[str]) -> tuple[np.ndarray, np.ndarray]:
+        """(similarity, success) for every candidate, identical to `combined_similarity()`."""
+        return blend_scores_vec(self.semantic(jd_emb), self.coverage(jd_tech))
+
+    def top_k(self, jd_emb: np.ndarray | None, jd_tech: set[str], k: int) -> list[tuple[object, float, float]]:
+        """Best k candidates as (payload, similarity, success), ranked by success then similarity."""
+        sim, success = self.score(jd_emb, jd_tech)
+        order = top_k_indices(rank_key(sim, success), k)
+        return [(self.payloads[i], float(sim[i]), float(success[i])) for i in order]
+
+
+class StreamingTopK:
+    """
+    Bounded top-k over candidates that arrive in batches, so memory stays flat
+    however large the pool is. Records whose group key (PDF fingerprint) is
+    already kept join that entry instead of being ranked again.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: list[tuple] = []      # (key, -seq, sim, success, payloads, group_key)
+        self._kept: dict[object, tuple] = {}
+        self._seq = 0
+
+    def add_batch(self, sim: np.ndarray, success: np.ndarray, payloads: list, group_keys: list):
+        key = rank_key(sim, success)
+        # collapse the batch first: a group ranks on its first record, the rest ride along
+        firsts, members = [], {}
+        for i, (payload, gk) in enumerate(zip(payloads, group_keys)):
+            kept = self._kept.get(gk)
+            if kept is not None:
+                kept[4].append(payload)
+            elif gk in members:
+                members[gk].append(payload)
+            else:
+                members[gk] = [payload]
+                firsts.append(i)
+        firsts = np.asarray(firsts, dtype=np.int64)
+        # nothing outside the batch's own top-k groups can displace an entry already kept
+        for i in firsts[top_k_indices(key[firsts], self.k)].tolist():
+            gk = group_keys[i]
+            # -seq: on equal scores the earlier record wins, as with a stable sort
+            item = (int(key[i]), -(self._seq + i), float(sim[i]), float(success[i]), members[gk], gk)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item[:2] > self._heap[0][:2]:
+                dropped = heapq.heapreplace(self._heap, item)
+                del self._kept[dropped[5]]
+            else:
+                continue
+            self._kept[gk] = item
+        self._seq += len(payloads)
+
+    def results(self) -> list[tuple[list, float, float]]:
+        """(payloads sharing a resume, similarity, success), best first."""
+        ranked = sorted(self._heap, key=lambda e: e[:2], reverse=True)
+        return [(e[4], e[2], e[3]) for e in ranked]
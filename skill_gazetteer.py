@@ -0,0 +1,138 @@
+"""
+Gazetteer-based skill extraction: a curated technology list matched with spaCy's
+PhraseMatcher over the tokenizer only, as a fast alternative (or complement) to NER.
+"""
+import hashlib
+import os
+import re
+import spacy
+from spacy.matcher import PhraseMatcher
+
+from training_data import train_data
+
+# alias -> canonical skill; canonical names are what ends up in `skills`
+ALIASES = {
+    "react.js": "react", "reactjs": "react", "react js": "react",
+    "node": "node.js", "nodejs": "node.js", "node js": "node.js",
+    "vue": "vue.js", "vuejs": "vue.js",
+    "express.js": "express", "expressjs": "express",
+    "nextjs": "next.js", "next js": "next.js",
+    "angularjs": "angular", "angular.js": "angular",
+    "js": "javascript", "ecmascript": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql", "psql": "postgresql",
+    "mssql": "microsoft sql server", "sql server": "microsoft sql server", "ms sql server": "microsoft sql server",
+    "mongo": "mongodb",
+    "sklearn": "scikit-learn", "scikit learn": "scikit-learn",
+    "gcp": "google cloud", "google cloud platform": "google cloud",
+    "amazon web services": "aws",
+    "microsoft azure": "azure",
+    "c sharp": "c#", "csharp": "c#",
+    "cpp": "c++",
+    "dotnet": ".net", "asp.net core": "asp.net",
+    "tensorflow 2": "tensorflow", "tf.keras": "keras",
+    "hugging face": "hugging face transformers", "huggingface": "hugging face transformers",
+    "elastic search": "elasticsearch",
+    "powerbi": "power bi",
+    "ror": "rails", "ruby on rails": "rails",
+    "cicd": "ci/cd",
+    "objective c": "objective-c",
+}
+
+# Everyday words and very short abbreviations that are also technology names: matched only in
+# these spellings (every other term is matched case-insensitively)
+CASE_SENSITIVE = {"Go", "R", "C", "Qt", "JS", "TS", "RoR", "ROR", "Node", "Git", "GIT", "Excel", "Boost",
+                  "Bash", "Jest", "Jenkins", "Airflow", "Bootstrap", "Sass", "Selenium", "Cypress",
+                  "Illustrator", "Swift", "Spring", "Express", "Rails", "Unity", "Helm", "Apex", "Oracle",
+                  "Flask", "Dart", "Rust", "Ruby", "Looker", "Druid", "Presto", "Tokio"}
+
+# Curated technologies beyond what the training snippets cover
+SEED_SKILLS = [
+    "python", "java", "javascript", "typescript", "c++", "c#", ".net", "asp.net", "php", "kotlin",
+    "scala", "perl", "matlab", "bash", "powershell", "sql", "nosql", "graphql", "rest apis", "grpc",
+    "html", "css", "sass", "tailwind css", "bootstrap", "jquery", "react", "react native", "redux",
+    "angular", "vue.js", "svelte", "next.js", "node.js", "express", "django", "fastapi", "flask",
+    "spring boot", "hibernate", "laravel", "rails", "mysql", "postgresql", "mongodb", "redis",
+    "sqlite", "cassandra", "elasticsearch", "dynamodb", "microsoft sql server", "snowflake",
+    "bigquery", "aws", "azure", "google cloud", "docker", "kubernetes", "terraform", "ansible",
+    "jenkins", "github actions", "gitlab ci", "ci/cd", "git", "linux", "windows server", "nginx",
+    "kafka", "rabbitmq", "apache spark", "hadoop", "apache flink", "airflow", "dbt", "pandas",
+    "numpy", "scipy", "scikit-learn", "tensorflow", "keras", "pytorch", "pytorch lightning",
+    "xgboost", "lightgbm", "hugging face transformers", "spacy", "nltk", "opencv",
+    "machine learning", "deep learning", "nlp", "computer vision", "tableau", "power bi",
+    "excel", "prometheus", "grafana", "elk stack", "selenium", "cypress", "appium", "jest",
+    "pytest", "junit", "flutter", "swiftui", "objective-c", "android", "ios", "unreal engine",
+    "salesforce", "openstack", "vmware", "mqtt", "raspberry pi", "arduino", "arkit", "arcore",
+    "vuforia", "wireshark", "metasploit", "nessus", "microservices", "jira", "figma",
+    "photoshop", "illustrator", "docker swarm", "tokio", "actix", "boost",
+]
+
+# Training spans that name a role rather than a technology
+ROLE_WORDS = re.compile(r"\b(developer|engineer|architect|administrator|specialist|scientist|researcher|"
+                        r"analyst|programming|development|framework|architecture)\b", re.I)
+# ...or a domain too broad to count as a skill
+GENERIC_TERMS = {"backend", "frontend", "mobile", "web", "database", "monitoring", "networking", "cloud",
+                 "enterprise infrastructure"}
+
+
+def normalize_skill(term: str) -> str:
+    """Lowercase, collapse whitespace, drop trailing punctuation and resolve aliases."""
+    t = re.sub(r"\s+", " ", (term or "").strip().lower()).rstrip(",;:.")
+    return ALIASES.get(t, t)
+
+
+def training_terms(nlp) -> set[str]:
+    """TECH entities from training_data whose spans align with tokens (as train.py requires)."""
+    terms = set()
+    for text, annotations in train_data:
+        doc = nlp.make_doc(text)
+        for start, end, _ in annotations["entities"]:
+            span = doc.char_span(start, end)
+            if span is None or ROLE_WORDS.search(span.text) or span.text.lower() in GENERIC_TERMS:
+                continue
+            if not re.search(r"[\w+#]$", span.text):  # cut-off annotations such as "Objective-"
+                continue
+            terms.add(span.text.strip())
+    return terms
+
+
+def load_extra_terms(path: str) -> set[str]:
+    """One term per line, e.g. as written by `flask build-gazetteer`."""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip() and not line.startswith("#")}
+
+
+class GazetteerExtractor:
+    """Multi-pattern skill matcher; `extract()` returns canonical lowercased skills."""
+
+    def __init__(self, extra_terms: set[str] = frozenset()):
+        self.nlp = spacy.blank("en")
+        self.lower = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+        self.exact = PhraseMatcher(self.nlp.vocab, attr="ORTH")
+
+        terms = set(SEED_SKILLS) | set(ALIASES) | training_terms(self.nlp) | set(extra_terms)
+        case_sensitive = {t.lower() for t in CASE_SENSITIVE}
+        lower_terms = sorted({t for t in terms if t.lower() not in case_sensitive and len(t) > 1})
+        self.lower.add("SKILL", list(self.nlp.tokenizer.pipe(lower_terms)))
+        self.exact.add("SKILL", list(self.nlp.tokenizer.pipe(sorted(CASE_SENSITIVE))))
+        self.size = len(lower_terms) + len(CASE_SENSITIVE)
+        # changes whenever the term list does (e.g. after `flask build-gazetteer`)
+        digest = hashlib.sha1("\n".join(lower_terms + sorted(CASE_SENSITIVE)).encode()).hexdigest()
+        self.version = f"gazetteer-{digest[:12]}"
+
+    def _from_doc(self, doc) -> set[str]:
+        found = set()
+        for matcher in (self.lower, self.exact):
+            for _, start, end in matcher(doc):
+                found.add(normalize_skill(doc[start:end].text))
+        return found
+
+    def extract(self, text: str) -> set[str]:
+        return self._from_doc(self.nlp.make_doc(text or ""))
+
+    def extract_batch(self, texts: list[str], batch_size: int = 256) -> list[set[str]]:
+        return [self._from_doc(doc) for doc in self.nlp.pipe((t or "" for t in texts), batch_size=batch_size)]
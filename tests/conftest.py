@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def webapp(tmp_path_factory):
+    """The app module against an in-memory MongoDB stand-in, with every local file in a scratch directory."""
+    mongomock = pytest.importorskip("mongomock")
+    import mongomock.gridfs
+
+    scratch = tmp_path_factory.mktemp("matchwise")
+    os.environ.update(WARM_MODELS="0", ENSURE_INDEXES="0", PDF_WORKERS="0")
+    os.environ.setdefault("SKILL_EXTRACTOR", "gazetteer")   # no trained pipeline needed
+    for var, name in (("JD_CACHE_PATH", "jd_cache.sqlite3"), ("INGEST_QUEUE_PATH", "ingest_queue.sqlite3"),
+                      ("ANN_INDEX_PATH", "ann_index.npz"), ("VECTOR_SNAPSHOT_PATH", "vectors"),
+                      ("RESUME_CACHE_PATH", "resume_cache")):
+        os.environ[var] = str(scratch / name)
+
+    import database
+    client = mongomock.MongoClient()
+    mongomock.gridfs.enable_gridfs_integration()
+    database.get_client = lambda: client
+
+    import app
+    app.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+@pytest.fixture
+def db(webapp):
+    """Empty collections and caches for each test."""
+    client = webapp.database.get_client()
+    for name in client.list_database_names():
+        client.drop_database(name)
+    webapp.jd_cache.clear()
+    with webapp.ingest_queue._db() as conn:
+        conn.execute("DELETE FROM jobs")
+        conn.execute("DELETE FROM dead_letters")
+    webapp.reset_ann_index()
+    if webapp.vector_snapshot is not None:
+        webapp.refresh_vector_snapshot(webapp.database.candidates(), rebuild=True)
+    return webapp.database
+
+
+@pytest.fixture
+def company(webapp, db):
+    """A test client logged in as a company account."""
+    db.users().insert_one({"email": "hr@example.com", "password": "", "user_type": "company"})
+    client = webapp.app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "hr@example.com"
+        session["_fresh"] = True
+    return client
+
+
+@pytest.fixture
+def candidate(webapp, db):
+    """A test client logged in as a candidate account."""
+    db.users().insert_one({"email": "dev@example.com", "password": "", "user_type": "candidate"})
+    client = webapp.app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "dev@example.com"
+        session["_fresh"] = True
+    return client
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from ann_index import IVFIndex
+from tests.test_ranking import JD_TECH, make_pool
+
+
+def test_sync_only_adds_newly_embedded_records(webapp, db, monkeypatch):
+    monkeypatch.setattr(webapp, "ANN_MIN_CANDIDATES", 1)
+    jd = make_pool(webapp, 40)
+    index = webapp.get_ann_index(db.candidates())
+    rows = index._size
+    for _ in range(3):
+        webapp.rank_candidates(db.candidates(), jd, JD_TECH, 5)
+    assert index._size == rows == 40 and len(index) == 40   # one row per resume, however many chunks
+
+
+def test_small_pool_does_not_load_the_index(webapp, db):
+    jd = make_pool(webapp, 40)
+    webapp.rank_candidates(db.candidates(), jd, JD_TECH, 5)
+    assert webapp._ann_index is None
+
+
+def test_shortlist_recalls_on_the_chunks(webapp, db, monkeypatch):
+    monkeypatch.setattr(webapp, "ANN_MIN_CANDIDATES", 1)
+    monkeypatch.setattr(webapp, "ANN_SHORTLIST", 1)
+    make_pool(webapp, 40)
+    rng = np.random.default_rng(5)
+    jd = rng.normal(size=webapp.SEM_DIM).astype(np.float32)
+    jd /= np.linalg.norm(jd)
+    # the whole-resume embedding is unrelated to the JD; one of its two chunks is the JD itself
+    other = rng.normal(size=webapp.SEM_DIM).astype(np.float32)
+    other /= np.linalg.norm(other)
+    fields = webapp.embedding_fields(other, np.stack([other, jd]))
+    new_id = db.candidates().insert_one({"name": "Chunk match", "resume_id": webapp.ObjectId(),
+                                         "skills": [], **fields}).inserted_id
+    top = webapp.rank_candidates(db.candidates(), jd, set(), 1)
+    assert [d["_id"] for d in top[0][0]] == [new_id]
+
+
+def test_index_is_used_under_the_lock(webapp, db, monkeypatch):
+    monkeypatch.setattr(webapp, "ANN_MIN_CANDIDATES", 1)
+    jd = make_pool(webapp, 40)
+    owned = []
+    for name in ("add", "search", "remove", "train", "save"):
+        method = getattr(webapp.IVFIndex, name)
+
+        def checked(self, *args, _method=method, **kwargs):
+            owned.append(webapp._ann_lock._is_owned())
+            return _method(self, *args, **kwargs)
+        monkeypatch.setattr(webapp.IVFIndex, name, checked)
+
+    webapp.rank_candidates(db.candidates(), jd, JD_TECH, 5)
+    db.candidates().delete_one({})
+    webapp.rank_candidates(db.candidates(), jd, JD_TECH, 40)   # the shortlist drops the deleted id
+    webapp.save_ann_index()
+    assert owned and all(owned)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(7, 8)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    index = IVFIndex(8)
+    index.add(["a", "b", "c"], vecs[:6], [1, 3, 2])
+    index.add(["é"], vecs[6:])
+    index.train(vecs, 2)
+    index.meta.update(model="m/max", embedded_since="2026-01-01T00:00:00")
+    index.save(str(tmp_path / "ann.npz"))
+
+    loaded = IVFIndex.load(str(tmp_path / "ann.npz"))
+    assert loaded.ids == index.ids and loaded.pos == index.pos and loaded.meta == index.meta
+    assert loaded.search(vecs[3], 4, nprobe=2) == index.search(vecs[3], 4, nprobe=2)
+
+
+def test_load_refuses_pickled_arrays(tmp_path):
+    path = tmp_path / "ann.npz"
+    np.savez(path, dim=np.int64(2), centroids=np.zeros((0, 2), np.float32), vectors=np.zeros((1, 2), np.float32),
+             assign=np.zeros(1, np.int32), alive=np.ones(1, bool), ids=np.asarray(["a"], dtype=object),
+             meta=np.asarray("{}"))
+    with pytest.raises(ValueError):
+        IVFIndex.load(str(path))
@@ -0,0 +1,40 @@
+"""Request validation of the JSON API."""
+import json
+
+import pytest
+
+JDS = [{"id": "req-1", "text": "Python developer"}]
+
+
+@pytest.mark.parametrize("top_k", [0, -1, "huge"])
+def test_batch_match_rejects_top_k_out_of_range(webapp, company, top_k):
+    resp = company.post("/api/v1/match/batch", json={"job_descriptions": JDS, "top_k": top_k})
+    assert resp.status_code == 400
+
+
+def test_batch_match_caps_top_k(webapp, company):
+    resp = company.post("/api/v1/match/batch", json={"job_descriptions": JDS, "top_k": webapp.API_MAX_TOP_K + 1})
+    assert resp.status_code == 400
+    assert str(webapp.API_MAX_TOP_K) in resp.get_json()["error"]
+
+
+@pytest.mark.parametrize("body", [[], ["Python developer"], "Python developer", 3, None])
+@pytest.mark.parametrize("url", ["/api/v1/match", "/api/v1/match/batch"])
+def test_company_endpoints_reject_non_object_bodies(company, url, body):
+    resp = company.post(url, data=json.dumps(body), content_type="application/json")
+    assert resp.status_code == 400
+
+
+def test_compare_rejects_non_object_bodies(candidate):
+    assert candidate.post("/api/v1/compare", json=["Python developer"]).status_code == 400
+
+
+@pytest.mark.parametrize("field", ["top_k", "limit", "min_success_rate"])
+@pytest.mark.parametrize("value", [[5], {"n": 5}, "five"])
+def test_non_scalar_numbers_are_a_value_error(webapp, field, value):
+    with pytest.raises(ValueError, match=field):
+        webapp.parse_match_params({field: value})
+
+
+def test_match_rejects_a_non_string_job_description(company):
+    assert company.post("/api/v1/match", json={"job_description": ["Python"]}).status_code == 400
@@ -0,0 +1,26 @@
+import sys
+
+import numpy as np
+
+from benchmarks.pdf_extraction import make_pdf
+
+
+def test_imported_copy_of_an_uploaded_pdf_takes_a_reference(webapp, db, tmp_path, monkeypatch):
+    import bulk_import
+
+    data = make_pdf("Jane Doe\nPython developer with Django and AWS experience")
+    webapp.store_resume_file(data, "upload.pdf", webapp.resume_fingerprint(data))   # a candidate's upload
+    (tmp_path / "pool").mkdir()
+    (tmp_path / "pool" / "jane.pdf").write_bytes(data)
+    monkeypatch.setattr(bulk_import, "embed_resumes",
+                        lambda texts, batch_size=32: [webapp.embedding_fields(np.ones(webapp.SEM_DIM) / 20)
+                                                      for _ in texts])
+    monkeypatch.setattr(sys, "argv", ["bulk_import", str(tmp_path / "pool"), "--email", "hr@example.com",
+                                      "--workers", "0", "--state", str(tmp_path / "state.jsonl")])
+    bulk_import.main()
+
+    record = db.candidates().find_one({"email": "hr@example.com"})
+    blob = db.resume_fs().find_one({})
+    assert record["resume_id"] == blob._id and blob.metadata["refcount"] == 2
+    webapp.release_resume_file(blob._id)   # the upload is deleted: the imported record keeps the PDF
+    assert db.resume_fs().find_one({"_id": blob._id}) is not None
@@ -0,0 +1,82 @@
+"""/candidate/compare: several JDs and/or every resume in one batched grid."""
+import pytest
+from bson import ObjectId
+
+from embedding_service import EmbeddingOverloaded
+
+RESUMES = {
+    "backend.pdf": ("Python developer with Django and PostgreSQL.", ["python", "django", "postgresql"]),
+    "frontend.pdf": ("React and TypeScript engineer.", ["react", "typescript"]),
+}
+
+
+def add_resumes(webapp, db, embedded: bool = True):
+    for filename, (text, skills) in RESUMES.items():
+        fields = webapp.embed_resumes([text])[0] if embedded else {}
+        db.candidates().insert_one({"name": "Dev", "email": "dev@example.com", "resume_id": ObjectId(),
+                                    "resume_filename": filename, "resume_text": text, "skills": skills,
+                                    **fields})
+
+
+def test_overloaded_embedding_service_is_a_503_not_zero_scores(webapp, db, candidate, monkeypatch):
+    add_resumes(webapp, db, embedded=False)
+
+    def overloaded(texts, **kwargs):
+        raise EmbeddingOverloaded()
+    monkeypatch.setattr(webapp, "embed_resumes", overloaded)
+
+    resp = candidate.post("/candidate/compare", data={"job_description": "Python developer", "all_resumes": "1"})
+    assert resp.status_code == 503
+    assert db.compare_history().count_documents({}) == 0
+
+
+def test_split_jds_on_dash_lines(webapp):
+    text = "Python developer\n---\nReact engineer\n   -----   \nGo engineer, well-known --- team\n\n---\n"
+    assert webapp.split_jds(text) == ["Python developer", "React engineer", "Go engineer, well-known --- team"]
+    assert webapp.split_jds("") == [] and webapp.split_jds("---\n---") == []
+
+
+def test_all_resumes_grid_writes_one_history_row_per_pair(webapp, db, candidate):
+    add_resumes(webapp, db)
+    db.candidates().insert_one({"name": "Other", "email": "other@example.com", "resume_id": ObjectId(),
+                                "resume_filename": "other.pdf", "resume_text": "Python", "skills": ["python"]})
+    jds = ["Python developer with Django", "React engineer with TypeScript", "Rust systems programmer"]
+
+    resp = candidate.post("/candidate/compare", data={"job_description": "\n---\n".join(jds), "all_resumes": "1"})
+    assert resp.status_code == 200
+    rows = list(db.compare_history().find({}))
+    assert len(rows) == len(RESUMES) * len(jds)
+    assert {(r["resume_filename"], r["jd_text"]) for r in rows} == {(f, jd) for f in RESUMES for jd in jds}
+    assert {r["email"] for r in rows} == {"dev@example.com"}
+    assert len({r["compared_at"] for r in rows}) == 1
+
+    # the batched grid scores each pair as a single compare would
+    docs = {d["resume_filename"]: d for d in db.candidates().find({"email": "dev@example.com"})}
+    for r in rows:
+        d = docs[r["resume_filename"]]
+        jd_tech, jd_emb = webapp.analyze_jd(r["jd_text"])
+        sim, success = webapp.combined_similarity(r["jd_text"], jd_tech, d["resume_text"], set(d["skills"]),
+                                                  jd_emb=jd_emb, resume_emb=webapp.stored_vectors(d))
+        assert r["similarity_score"] == pytest.approx(sim, abs=0.1)
+        assert r["success_rate"] == pytest.approx(success, abs=0.1)
+
+
+def test_one_resume_against_several_jds(webapp, db, candidate):
+    add_resumes(webapp, db, embedded=False)   # encoded in one batch on the way
+    doc = db.candidates().find_one({"resume_filename": "backend.pdf"})
+    resp = candidate.post("/candidate/compare", data={"job_description": "Python developer\n---\nReact engineer",
+                                                      "resume_id": str(doc["resume_id"])})
+    assert resp.status_code == 200
+    rows = list(db.compare_history().find({}))
+    assert [r["resume_id"] for r in rows] == [doc["resume_id"]] * 2
+    assert {r["jd_text"] for r in rows} == {"Python developer", "React engineer"}
+
+
+def test_too_many_jds_is_refused(webapp, db, candidate, monkeypatch):
+    add_resumes(webapp, db)
+    monkeypatch.setattr(webapp, "COMPARE_MAX_JDS", 2)
+    resp = candidate.post("/candidate/compare", data={"job_description": "a\n---\nb\n---\nc", "all_resumes": "1"})
+    assert resp.status_code == 200
+    with candidate.session_transaction() as sess:
+        assert any("at most 2 job descriptions" in msg for _, msg in sess["_flashes"])
+    assert db.compare_history().count_documents({}) == 0
@@ -0,0 +1,21 @@
+"""ensure_indexes() against an existing deployment."""
+from pymongo import ASCENDING, DESCENDING
+
+
+def index_keys(coll) -> list[list[tuple[str, int]]]:
+    return [list(spec["key"]) for spec in coll.index_information().values()]
+
+
+def test_history_indexes_replace_their_prefixes(db):
+    old_compare = [("email", ASCENDING), ("compared_at", DESCENDING)]
+    old_company = [("email", ASCENDING), ("ran_at", DESCENDING)]
+    db.compare_history().create_index(old_compare)
+    db.company_match_history().create_index(old_company)
+
+    db.ensure_indexes()
+    db.ensure_indexes()   # nothing left to drop the second time
+
+    assert old_compare not in index_keys(db.compare_history())
+    assert old_company not in index_keys(db.company_match_history())
+    assert old_compare + [("_id", DESCENDING)] in index_keys(db.compare_history())
+    assert old_company + [("_id", DESCENDING)] in index_keys(db.company_match_history())
@@ -0,0 +1,95 @@
+"""/fetch_resume: conditional requests, ranges, the local file cache and download names."""
+import hashlib
+from urllib.parse import quote
+
+import pytest
+from bson import ObjectId
+from werkzeug.http import parse_options_header
+
+from benchmarks.pdf_extraction import make_pdf
+
+
+@pytest.fixture
+def stored(webapp, db):
+    """A PDF in GridFS, unique per test so the local cache starts cold for it."""
+    data = make_pdf("\n".join(f"{ObjectId()} line {i}" for i in range(200)))
+    sha = hashlib.sha256(data).hexdigest()
+    return webapp.store_resume_file(data, "first upload.pdf", sha), data, sha
+
+
+def add_record(db, email: str, file_id: ObjectId, filename: str) -> ObjectId:
+    return db.candidates().insert_one({"name": "Dev", "email": email, "resume_id": file_id,
+                                       "resume_filename": filename}).inserted_id
+
+
+def test_etag_revalidation_is_a_304(webapp, stored):
+    file_id, data, sha = stored
+    client = webapp.app.test_client()
+    resp = client.get(f"/fetch_resume/{file_id}")
+    assert resp.status_code == 200 and resp.data == data and resp.headers["ETag"] == f'"{sha}"'
+
+    again = client.get(f"/fetch_resume/{file_id}", headers={"If-None-Match": f'"{sha}"'})
+    assert again.status_code == 304 and again.data == b""
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_range_is_a_206(webapp, stored, monkeypatch, cached):
+    file_id, data, _ = stored
+    client = webapp.app.test_client()
+    if cached:
+        client.get(f"/fetch_resume/{file_id}")   # fills the cache
+    else:
+        monkeypatch.setattr(webapp, "resume_cache", None)
+    resp = client.get(f"/fetch_resume/{file_id}", headers={"Range": "bytes=100-299"})
+    assert resp.status_code == 206
+    assert resp.data == data[100:300]
+    assert resp.headers["Content-Range"] == f"bytes 100-299/{len(data)}"
+
+
+def test_full_download_fills_the_cache_and_is_then_served_from_it(webapp, db, stored):
+    file_id, data, sha = stored
+    client = webapp.app.test_client()
+    assert webapp.resume_cache.open(sha, len(data)) is None
+    assert client.get(f"/fetch_resume/{file_id}").data == data
+
+    cached = webapp.resume_cache.open(sha, len(data))
+    assert cached is not None
+    cached.close()
+    db.get_client()["candidates"]["fs.chunks"].delete_many({})   # GridFS can't serve it any more
+    assert client.get(f"/fetch_resume/{file_id}").data == data
+
+
+def test_unsatisfiable_range_is_a_416(webapp, stored):
+    file_id, data, _ = stored
+    resp = webapp.app.test_client().get(f"/fetch_resume/{file_id}", headers={"Range": f"bytes={len(data) + 10}-"})
+    assert resp.status_code == 416
+
+
+def test_unknown_or_malformed_id_is_a_404(webapp, db):
+    client = webapp.app.test_client()
+    assert client.get(f"/fetch_resume/{ObjectId()}").status_code == 404
+    assert client.get("/fetch_resume/nope").status_code == 404
+
+
+def test_non_ascii_filename(webapp, db, stored):
+    file_id, _, _ = stored
+    add_record(db, "dev@example.com", file_id, "Résumé Zoë.pdf")
+    client = webapp.app.test_client()
+    resp = client.get(f"/fetch_resume/{file_id}?candidate={db.candidates().find_one()['_id']}")
+    disposition = resp.headers["Content-Disposition"]
+    assert 'filename="Rsum Zo.pdf"' in disposition
+    assert f"filename*=UTF-8''{quote('Résumé Zoë.pdf')}" in disposition
+
+
+def test_shared_pdf_downloads_under_the_requesting_records_name(webapp, db, stored, candidate):
+    file_id, data, sha = stored
+    other = add_record(db, "other@example.com", file_id, "first upload.pdf")
+    assert webapp.store_resume_file(data, "mine.pdf", sha) == file_id   # deduplicated
+    add_record(db, "dev@example.com", file_id, "mine.pdf")
+
+    def name(client, url: str) -> str:
+        return parse_options_header(client.get(url).headers["Content-Disposition"])[1]["filename"]
+
+    assert name(candidate, f"/fetch_resume/{file_id}") == "mine.pdf"                           # own record
+    assert name(candidate, f"/fetch_resume/{file_id}?candidate={other}") == "first upload.pdf"
+    assert name(webapp.app.test_client(), f"/fetch_resume/{file_id}") == "first upload.pdf"    # the blob's own
@@ -0,0 +1,97 @@
+"""History pages: keyset cursors, the summary aggregation and the lazily loaded full run."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from flask import template_rendered
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+@pytest.fixture
+def rendered(webapp):
+    """The context of each template rendered during the test."""
+    seen = []
+
+    def record(sender, template, context, **extra):
+        seen.append(context)
+    template_rendered.connect(record, webapp.app)
+    yield seen
+    template_rendered.disconnect(record, webapp.app)
+
+
+def add_runs(db, email: str, times: list[datetime], **fields) -> list[ObjectId]:
+    return db.company_match_history().insert_many([
+        {"email": email, "ran_at": at, "jd_text": f"JD {i}", "jd_tech": ["python"], "results": [], **fields}
+        for i, at in enumerate(times)
+    ]).inserted_ids
+
+
+def test_cursor_pages_through_equal_timestamps_in_order(webapp, db, company, rendered, monkeypatch):
+    monkeypatch.setattr(webapp, "HISTORY_PAGE_SIZE", 3)
+    # ties on ran_at are broken by _id, so no run is skipped or repeated at a page boundary
+    times = [NOW] * 4 + [NOW - timedelta(hours=1)] * 3 + [NOW - timedelta(days=1)]
+    add_runs(db, "hr@example.com", times)
+    add_runs(db, "other@example.com", [NOW] * 2)
+    expected = [str(d["_id"]) for d in db.company_match_history().find({"email": "hr@example.com"})
+                .sort([("ran_at", -1), ("_id", -1)])]
+
+    seen, cursor = [], None
+    while True:
+        assert company.get("/company/history", query_string={"cursor": cursor} if cursor else {}).status_code == 200
+        page = rendered[-1]
+        assert page["first_page"] == (cursor is None)
+        seen += [r["_id"] for r in page["runs"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_malformed_cursor_starts_over(webapp, db, company, candidate):
+    for client, path in ((company, "/company/history"), (candidate, "/candidate/history")):
+        for cursor in ("not-a-cursor", "eyJ0IjogMX0"):   # the second is valid base64 for {"t": 1}
+            resp = client.get(path, query_string={"cursor": cursor})
+            assert resp.status_code == 302 and resp.headers["Location"].endswith(path)
+
+
+def test_summary_counts_weeks_success_and_skills(webapp, db, candidate, rendered):
+    monday = (NOW - timedelta(days=NOW.weekday())).replace(hour=12, minute=0, second=0)
+    rows = [
+        (monday, 80.0, ["python", "django"]),
+        (monday + timedelta(hours=1), 60.0, ["python"]),
+        (monday - timedelta(days=7), 40.0, ["python", "react"]),
+        (monday - timedelta(weeks=webapp.HISTORY_SUMMARY_WEEKS + 2), 0.0, ["cobol"]),   # outside the window
+    ]
+    db.compare_history().insert_many([
+        {"email": "dev@example.com", "compared_at": at, "success_rate": success, "matched_skills": skills,
+         "resume_id": ObjectId(), "resume_filename": "cv.pdf", "jd_text": "JD", "jd_tech": skills,
+         "similarity_score": success} for at, success, skills in rows
+    ] + [{"email": "other@example.com", "compared_at": monday, "success_rate": 0.0, "matched_skills": ["go"]}])
+
+    assert candidate.get("/candidate/history?summary=1").status_code == 200
+    summary = rendered[-1]["summary"]
+    assert summary["runs"] == 3 and summary["avg_success"] == 60.0
+    assert [w["runs"] for w in summary["weeks"]] == [1, 2]
+    assert summary["skills"] == [{"skill": "python", "count": 3},
+                                 {"skill": "django", "count": 1}, {"skill": "react", "count": 1}]
+
+    assert candidate.get("/candidate/history").status_code == 200
+    assert rendered[-1]["summary"] is None   # only computed when asked for
+
+
+def test_full_run_is_only_served_to_its_company(webapp, db, company):
+    candidate_id, resume_id = ObjectId(), ObjectId()
+    results = [{"candidate_name": f"Dev {i}", "match_score": 90 - i, "success_rate": 80 - i,
+                "resume_id": resume_id, "candidate_id": candidate_id} for i in range(5)]
+    mine, = add_runs(db, "hr@example.com", [NOW], results=results)
+    theirs, = add_runs(db, "rival@example.com", [NOW], results=results)
+
+    resp = company.get(f"/company/history/{mine}/results")
+    assert resp.status_code == 200
+    full = resp.get_json()["results"]
+    assert [r["candidate_name"] for r in full] == [f"Dev {i}" for i in range(5)]
+    assert full[0]["resume_url"] == f"/fetch_resume/{resume_id}?candidate={candidate_id}"
+
+    assert company.get(f"/company/history/{theirs}/results").status_code == 404
+    assert company.get("/company/history/not-an-id/results").status_code == 404
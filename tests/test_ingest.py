@@ -0,0 +1,46 @@
+import ingest
+
+
+def queue_upload(webapp, data: bytes, email: str = "c@example.com") -> str:
+    sha = webapp.resume_fingerprint(data)
+    file_id = webapp.store_resume_file(data, "resume.pdf", sha)
+    return webapp.ingest_queue.enqueue("ingest_resume", {
+        "upload_id": "u1", "file_id": str(file_id), "sha256": sha, "email": email,
+        "name": "C", "filename": "resume.pdf",
+    })
+
+
+def test_dead_lettered_upload_releases_its_pdf(webapp, db):
+    # text after the header is not a PDF body: fails as unreadable and is dead-lettered at once
+    job_id = queue_upload(webapp, b"%PDF-1.4 broken")
+    assert ingest.run_one(webapp.ingest_queue)
+    assert webapp.ingest_queue.get(job_id)["status"] == ingest.FAILED
+    assert db.resume_fs().find_one({}) is None
+
+    result = webapp.app.test_cli_runner().invoke(args=["ingest-dead-letters", "--retry", job_id])
+    assert result.exit_code != 0 and "uploaded again" in result.output
+
+
+def test_retrying_a_dead_letter_keeps_a_shared_pdf(webapp, db):
+    data = b"%PDF-1.4 broken"
+    webapp.store_resume_file(data, "resume.pdf", webapp.resume_fingerprint(data))   # another record's reference
+    job_id = queue_upload(webapp, data)
+    ingest.run_one(webapp.ingest_queue)
+    assert db.resume_fs().find_one({}).metadata["refcount"] == 1
+
+    result = webapp.app.test_cli_runner().invoke(args=["ingest-dead-letters", "--retry", job_id])
+    assert result.exit_code == 0 and "Re-queued" in result.output
+    assert db.resume_fs().find_one({}).metadata["refcount"] == 2
+    assert webapp.ingest_queue.get(job_id)["status"] == ingest.QUEUED
+
+
+def test_retry_yields_to_a_pending_job_with_the_same_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_ATTEMPTS", 1)
+    queue = ingest.get_queue(str(tmp_path / "queue.sqlite3"))
+    old = queue.enqueue("backfill_resume", {"candidate_id": "x"}, "backfill:x")
+    assert queue.fail(queue.claim(), "boom")
+    queue.enqueue("backfill_resume", {"candidate_id": "x"}, "backfill:x")
+
+    assert queue.retry_dead_letter(old) == ingest.PENDING
+    assert queue.get(old)["status"] == ingest.FAILED and queue.dead_letters() == []
+    assert queue.retry_dead_letter(old) is None
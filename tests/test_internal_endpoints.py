@@ -0,0 +1,32 @@
+"""/metrics and /internal/embedding-stats are for operators only."""
+import pytest
+
+URLS = ["/metrics", "/internal/embedding-stats"]
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_loopback_is_allowed(webapp, url):
+    assert webapp.app.test_client().get(url).status_code == 200
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_other_addresses_are_forbidden(webapp, url):
+    client = webapp.app.test_client()
+    assert client.get(url, environ_base={"REMOTE_ADDR": "203.0.113.7"}).status_code == 403
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_proxied_requests_need_the_token(webapp, monkeypatch, url):
+    monkeypatch.setattr(webapp, "INTERNAL_TOKEN", "s3cret")
+    client = webapp.app.test_client()
+    proxied = {"X-Forwarded-For": "203.0.113.7"}
+    assert client.get(url, headers=proxied).status_code == 403
+    assert client.get(url, headers={**proxied, "Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get(url, headers={**proxied, "Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_allowlist_takes_networks(webapp, monkeypatch):
+    monkeypatch.setattr(webapp, "INTERNAL_ALLOW_IPS", [webapp.ipaddress.ip_network("10.0.0.0/8")])
+    client = webapp.app.test_client()
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.1.2.3"}).status_code == 200
+    assert client.get("/metrics").status_code == 403
@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+import numpy as np
+
+import jd_cache
+from jd_cache import JDCache
+
+
+def test_hit_does_not_wait_for_the_write_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(jd_cache, "FLUSH_EVERY", 1)
+    cache = JDCache(str(tmp_path / "jd.sqlite3"))
+    cache.put("k", "v1", {"python"}, np.ones(4, dtype=np.float32))
+
+    writer = sqlite3.connect(cache.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")   # another process holding the write lock
+    t = time.monotonic()
+    assert cache.get("k", "v1")[0] == {"python"}
+    assert time.monotonic() - t < 1.0
+    writer.execute("COMMIT")
+    writer.close()
+
+    stats = cache.stats()   # the deferred hit is written back once the lock is free
+    assert stats["hits"] == 1 and stats["misses"] == 0
+
+
+def test_lookups_refresh_lru_order(tmp_path):
+    cache = JDCache(str(tmp_path / "jd.sqlite3"), max_entries=2)
+    cache.put("a", "v1", set(), None)
+    cache.put("b", "v1", set(), None)
+    assert cache.get("a", "v1") is not None
+    cache.put("c", "v1", set(), None)   # evicts b, the least recently used
+    assert cache.get("b", "v1") is None and cache.get("a", "v1") is not None
+
+
+def test_jds_are_analysed_as_written(webapp, db, monkeypatch):
+    seen = []
+    monkeypatch.setattr(webapp, "extract_skills_batch", lambda texts: seen.extend(texts) or [set() for _ in texts])
+    monkeypatch.setattr(webapp, "encode_texts", lambda texts: np.ones((len(texts), webapp.SEM_DIM), np.float32))
+    jd = "Senior engineer\n\n  Python,   Django\tAWS"
+    webapp.analyze_jds([jd])
+    webapp.analyze_jds(["Senior engineer Python, Django AWS"])   # same JD after normalisation: a hit
+    assert seen == [jd]
@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+
+import pytest
+
+import pdf_extract
+from benchmarks.pdf_extraction import make_pdf
+from pdf_extract import PDFExtractionError, PDFExtractor, PdfminerEngine
+
+
+@pdf_extract.engine("test-slow")
+class SlowEngine(PdfminerEngine):
+    """pdfminer, except that a document mentioning SLOW never finishes opening."""
+
+    @staticmethod
+    def open(data: bytes):
+        if b"SLOW" in data:
+            time.sleep(60)
+        return PdfminerEngine.open(data)
+
+
+def pages(n: int, lines: int = 5) -> bytes:
+    return make_pdf("\n".join(f"PAGE{p} line {i}" for p in range(n) for i in range(lines)), lines_per_page=lines)
+
+
+@pytest.fixture
+def extractor():
+    made = []
+
+    def make(**kwargs):
+        made.append(PDFExtractor(**kwargs))
+        return made[-1]
+    yield make
+    for ex in made:
+        ex.close()
+
+
+def code_of(fn) -> str:
+    with pytest.raises(PDFExtractionError) as e:
+        fn()
+    return e.value.code
+
+
+def test_too_large(extractor):
+    ex = extractor(workers=0, max_bytes=100)
+    assert code_of(lambda: ex.extract(pages(1))) == pdf_extract.TOO_LARGE
+    assert ex.extract_many([pages(1)])[0].code == pdf_extract.TOO_LARGE
+
+
+def test_too_many_pages(extractor):
+    ex = extractor(workers=0, max_pages=2)
+    assert code_of(lambda: ex.extract(pages(3))) == pdf_extract.TOO_MANY_PAGES
+    assert "PAGE1" in ex.extract(pages(2))
+
+
+def test_no_text(extractor):
+    ex = extractor(workers=0)
+    assert code_of(lambda: ex.extract(make_pdf("   \n  "))) == pdf_extract.NO_TEXT
+    assert code_of(lambda: ex.extract(b"hello")) == pdf_extract.UNREADABLE
+
+
+def test_stops_at_max_chars(extractor):
+    ex = extractor(workers=0, max_chars=60)
+    text = ex.extract(pages(10))
+    assert len(text) == 60 and text.startswith("PAGE0")
+
+    # split into page ranges across the pool: the text is still the document's first max_chars
+    ex = extractor(workers=2, max_chars=60, parallel_pages=2, pages_per_task=1)
+    assert ex.extract(pages(10)) == text
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the test engine is registered in this process only")
+def test_timeout_restarts_the_pool_and_finishes_the_rest(extractor):
+    ex = extractor(engine="test-slow", workers=2, timeout=1.5)
+    first_pool = ex._get_pool()
+    docs = [make_pdf("SLOW resume"), pages(1), pages(2), pages(3)]
+    out = ex.extract_many(docs)
+
+    assert isinstance(out[0], PDFExtractionError) and out[0].code == pdf_extract.TIMEOUT and out[0].retryable
+    assert [t.count("PAGE") for t in out[1:]] == [5, 10, 15]
+    assert ex._pool is not first_pool
+
+    # a single extract() past its deadline kills its pool too; the next call gets a fresh one
+    pool = ex._get_pool()
+    assert code_of(lambda: ex.extract(make_pdf("SLOW resume"))) == pdf_extract.TIMEOUT
+    assert ex._pool is not pool
+    assert "PAGE0" in ex.extract(pages(1))
@@ -0,0 +1,108 @@
+"""The vectorized, streamed and cached rankings against the original per-resume scoring and sort."""
+import numpy as np
+import pytest
+from bson import ObjectId
+
+JD = "Backend engineer: Python, Django, PostgreSQL and AWS."
+JD_TECH = {"python", "django", "postgresql", "aws"}
+SKILLS = ["python", "django", "postgresql", "aws", "java", "react", "docker", "go"]
+
+
+def unit(v: np.ndarray) -> np.ndarray:
+    return (v / np.linalg.norm(v, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def make_pool(webapp, n: int, seed: int = 0) -> list[dict]:
+    """
+    n records drawn from a few distinct resumes, so scores tie often; every third
+    record is an upload of another record's PDF (same hash and vectors).
+    """
+    rng = np.random.default_rng(seed)
+    jd = unit(rng.normal(size=webapp.SEM_DIM))
+    resumes = []
+    for r in range(12):
+        chunks = unit(rng.normal(size=(int(rng.integers(1, 4)), webapp.SEM_DIM)) + rng.uniform(0, 2) * jd)
+        skills = sorted(rng.choice(SKILLS, size=int(rng.integers(0, 5)), replace=False).tolist())
+        resumes.append((webapp.embedding_fields(chunks[0], chunks), skills))
+    docs = []
+    for i in range(n):
+        if i % 3 == 2:
+            twin = docs[int(rng.integers(len(docs)))]
+            sha, fields, skills = twin["resume_sha256"], twin, twin["skills"]
+        else:
+            fields, skills = resumes[int(rng.integers(len(resumes)))]
+            sha = f"sha-{i}"
+        docs.append({
+            "name": f"Candidate {i}", "email": f"c{i}@example.com", "resume_id": ObjectId(),
+            "resume_filename": f"r{i}.pdf", "resume_sha256": sha, "skills": list(skills),
+            **{f: fields[f] for f in ("embedding", "embedding_model", "embedding_version",
+                                      "chunk_embeddings", "chunk_count", "chunk_version")},
+            "embedded_at": fields["embedded_at"],
+        })
+    webapp.database.candidates().insert_many(docs)
+    return jd
+
+
+def baseline(webapp, jd_emb: np.ndarray, jd_tech: set[str], k: int) -> list[tuple[list, float, float]]:
+    """One combined_similarity() per unique PDF, then a stable sort on (success, similarity)."""
+    groups: dict = {}
+    for d in webapp.database.candidates().find({}).sort("_id", 1):
+        groups.setdefault(d.get("resume_sha256") or d["_id"], []).append(d)
+    scored = []
+    for docs in groups.values():
+        sim, success = webapp.combined_similarity(JD, jd_tech, "", set(docs[0]["skills"]),
+                                                  jd_emb=jd_emb, resume_emb=webapp.stored_vectors(docs[0]))
+        scored.append(([d["_id"] for d in docs], sim, success))
+    return sorted(scored, key=lambda e: (e[2], e[1]), reverse=True)[:k]
+
+
+def ids(top) -> list[tuple[list, float, float]]:
+    return [([d["_id"] for d in docs], sim, success) for docs, sim, success in top]
+
+
+def test_candidate_matrix_scores_match_combined_similarity(webapp, db):
+    jd = make_pool(webapp, 60)
+    docs = list(db.candidates().find({}))
+    matrix = webapp.CandidateMatrix.build(((d, webapp.stored_vectors(d), d["skills"]) for d in docs),
+                                          webapp.SEM_DIM, webapp.CHUNK_POOLING)
+    sim, success = matrix.score(jd, JD_TECH)
+    expected = [webapp.combined_similarity(JD, JD_TECH, "", set(d["skills"]), jd_emb=jd,
+                                           resume_emb=webapp.stored_vectors(d)) for d in docs]
+    assert list(zip(sim.tolist(), success.tolist())) == expected
+
+
+@pytest.mark.parametrize("batch", [7, 2000])
+@pytest.mark.parametrize("k", [1, 5, 50, 1000])
+def test_stream_top_k_matches_baseline(webapp, db, monkeypatch, batch, k):
+    monkeypatch.setattr(webapp, "MATCH_SCAN_BATCH", batch)
+    jd = make_pool(webapp, 150)
+    assert ids(webapp.rank_candidates(db.candidates(), jd, JD_TECH, k)) == baseline(webapp, jd, JD_TECH, k)
+
+
+def test_ann_shortlist_matches_baseline_when_it_covers_the_pool(webapp, db, monkeypatch):
+    monkeypatch.setattr(webapp, "ANN_MIN_CANDIDATES", 1)
+    monkeypatch.setattr(webapp, "ANN_SHORTLIST", 10_000)
+    monkeypatch.setattr(webapp, "ANN_NPROBE", 10_000)
+    jd = make_pool(webapp, 150)
+    assert ids(webapp.rank_candidates(db.candidates(), jd, JD_TECH, 20)) == baseline(webapp, jd, JD_TECH, 20)
+
+
+def test_cached_ranking_extended_with_new_records_matches_baseline(webapp, db):
+    jd = make_pool(webapp, 90, seed=1)
+    first = webapp.cached_rank_candidates(db.candidates(), JD, jd, JD_TECH, 10)
+    assert ids(first) == baseline(webapp, jd, JD_TECH, 10)
+
+    make_pool(webapp, 60, seed=2)
+    assert ids(webapp.cached_rank_candidates(db.candidates(), JD, jd, JD_TECH, 10)) == baseline(webapp, jd, JD_TECH, 10)
+
+
+def test_cached_ranking_picks_up_new_records_without_embeddings(webapp, db):
+    jd = make_pool(webapp, 60, seed=3)
+    webapp.cached_rank_candidates(db.candidates(), JD, jd, JD_TECH, 10)
+
+    # embedding failed at upload: no vectors and no embedded_at, but every JD skill
+    db.candidates().insert_many([{"name": f"Unembedded {i}", "resume_id": ObjectId(), "resume_sha256": f"new-{i}",
+                                  "skills": sorted(JD_TECH)} for i in range(3)])
+    cached = webapp.cached_rank_candidates(db.candidates(), JD, jd, JD_TECH, 10)
+    assert ids(cached) == ids(webapp.rank_candidates(db.candidates(), jd, JD_TECH, 10))
+    assert any(d["name"].startswith("Unembedded") for docs, _, _ in cached for d in docs)
@@ -0,0 +1,107 @@
+import numpy as np
+
+from resume_chunks import chunk_resume, pack_vectors, split_sections, unpack_vectors
+from scoring import CandidateMatrix, pool_segments
+
+RESUME = """Jane Doe
+jane@example.com
+
+Professional Summary
+Backend engineer.
+
+Experience:
+Acme Corp, 2019 - 2024
+Built billing services in Go.
+
+Education
+
+Skills
+Python, PostgreSQL
+"""
+
+
+def test_split_sections_on_headings():
+    assert split_sections(RESUME) == [
+        ("", ["Jane Doe", "jane@example.com"]),
+        ("Professional Summary", ["Backend engineer."]),
+        ("Experience", ["Acme Corp, 2019 - 2024", "Built billing services in Go."]),
+        ("Skills", ["Python, PostgreSQL"]),   # an empty section is dropped
+    ]
+
+
+def test_chunks_carry_their_heading_and_fit_the_window():
+    long_line = " ".join(f"word{i}" for i in range(300))
+    chunks = chunk_resume(RESUME + "\nProjects\n" + long_line, size=200)
+    assert chunks[:4] == ["Jane Doe jane@example.com", "Professional Summary: Backend engineer.",
+                          "Experience: Acme Corp, 2019 - 2024 Built billing services in Go.",
+                          "Skills: Python, PostgreSQL"]
+    projects = chunks[4:]
+    assert len(projects) > 1 and all(c.startswith("Projects: ") and len(c) <= 200 for c in projects)
+    # an overlong line is split on word boundaries, nothing lost
+    assert " ".join(c[len("Projects: "):] for c in projects) == long_line
+
+
+def test_chunk_cap_and_empty_text():
+    text = "Experience\n" + "\n".join(f"Role {i}: " + "x" * 90 for i in range(100))
+    assert len(chunk_resume(text, size=100, max_chunks=5)) == 5
+    assert chunk_resume("") == [""]
+
+
+def test_pack_round_trip():
+    vecs = np.random.default_rng(0).normal(size=(3, 8)).astype(np.float32)
+    np.testing.assert_allclose(unpack_vectors(pack_vectors(vecs), 8), vecs, atol=1e-2)
+
+
+def test_max_and_mean_pooling():
+    rng = np.random.default_rng(1)
+    jd = rng.normal(size=8).astype(np.float32)
+    jd /= np.linalg.norm(jd)
+    chunks = rng.normal(size=(4, 8)).astype(np.float32)
+    chunks /= np.linalg.norm(chunks, axis=1, keepdims=True)
+    single = chunks[:1]
+    dots = chunks @ jd
+
+    np.testing.assert_allclose(pool_segments(np.append(dots, dots[0]), np.array([0, 4, 5]), "max"),
+                               [dots.max(), dots[0]])
+    np.testing.assert_allclose(pool_segments(np.append(dots, dots[0]), np.array([0, 4, 5]), "mean"),
+                               [dots.mean(), dots[0]])
+    for pooling, expected in (("max", dots.max()), ("mean", dots.mean())):
+        matrix = CandidateMatrix.build([("a", chunks, []), ("b", single, [])], 8, pooling)
+        np.testing.assert_allclose(matrix.semantic(jd), np.clip([expected, dots[0]], 0, 1), rtol=1e-5)
+
+
+def test_stale_chunk_version_falls_back_to_the_embedding(webapp, monkeypatch):
+    rng = np.random.default_rng(2)
+    emb = rng.normal(size=webapp.SEM_DIM).astype(np.float32)
+    chunks = rng.normal(size=(3, webapp.SEM_DIM)).astype(np.float32)
+    doc = webapp.embedding_fields(emb, chunks)
+    assert webapp.stored_vectors(doc).shape == (3, webapp.SEM_DIM) and webapp.embedding_current(doc)
+
+    doc["chunk_version"] = doc["chunk_version"].replace(f"-v{webapp.CHUNKER_VERSION}", "-v0")
+    assert webapp.stored_chunks(doc) is None
+    np.testing.assert_array_equal(webapp.stored_vectors(doc), webapp.stored_embedding(doc))
+    assert not webapp.embedding_current(doc)   # and due a backfill
+    monkeypatch.setattr(webapp, "CHUNK_POOLING", "off")
+    assert webapp.embedding_current(doc)       # unless chunks aren't scored at all
+
+
+def test_late_section_skill_is_found_only_by_the_chunks(webapp, monkeypatch):
+    # an encoder that, like MiniLM, only reads the start of its input
+    encode = webapp.encode_texts
+    monkeypatch.setattr(webapp, "encode_texts",
+                        lambda texts, batch_size=32: encode([" ".join(t.split()[:40]) for t in texts], batch_size))
+    filler = "\n".join(f"Maintained the internal reporting dashboards for team {i}." for i in range(60))
+    resume = f"Experience\n{filler}\n\nCertifications\nKubernetes Terraform Helm"
+    jd = webapp.encode_text("Kubernetes Terraform Helm")
+
+    fields = webapp.embed_resumes([resume])[0]
+    whole = webapp.stored_embedding(fields)
+    chunks = webapp.stored_chunks(fields)
+    assert len(chunks) > 2
+
+    def sem(vectors, pooling):
+        return CandidateMatrix.build([("r", vectors, [])], webapp.SEM_DIM, pooling).semantic(jd)[0]
+
+    assert sem(whole, "max") < 0.2          # the truncated embedding never saw the certifications
+    assert sem(chunks, "max") > 0.8         # their chunk matches the JD
+    assert sem(whole, "max") < sem(chunks, "mean") < sem(chunks, "max")
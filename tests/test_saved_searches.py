@@ -0,0 +1,39 @@
+"""Saved-search pages: malformed ids and stale lists."""
+from datetime import datetime, timezone
+
+
+def saved(db, **fields) -> dict:
+    search = {"email": "hr@example.com", "jd_text": "Python developer", "k": 5, "active": True,
+              "results": [], "created_at": datetime.now(timezone.utc), **fields}
+    search["_id"] = db.saved_searches().insert_one(search).inserted_id
+    return search
+
+
+def test_malformed_search_id_is_not_found(company):
+    assert company.post("/company/saved/not-an-id/toggle").status_code == 404
+    assert company.post("/company/saved/not-an-id/delete").status_code == 404
+
+
+def refresh_in_request(search):
+    raise AssertionError("saved search recomputed inside the request")
+
+
+def test_stale_search_is_queued_not_recomputed_in_the_request(webapp, db, company, monkeypatch):
+    search = saved(db, needs_refresh=True)
+    monkeypatch.setattr(webapp, "refresh_saved_search", refresh_in_request)
+    assert company.get("/company/saved").status_code == 200
+    assert company.get("/company/saved").status_code == 200   # still pending: queued once
+
+    with webapp.ingest_queue._db() as conn:
+        jobs = conn.execute("SELECT kind, payload FROM jobs").fetchall()
+    assert [(j["kind"], j["payload"]) for j in jobs] == [("refresh_saved_search", f'{{"search_id": "{search["_id"]}"}}')]
+
+
+def test_refresh_job_recomputes_only_stale_searches(webapp, db, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(webapp, "refresh_saved_search", lambda s: refreshed.append(s["_id"]) or s)
+    stale = saved(db, needs_refresh=True)
+    current = saved(db, needs_refresh=False, model_version=webapp.score_version())
+    for s in (stale, current):
+        webapp.refresh_saved_search_job({"search_id": str(s["_id"])})
+    assert refreshed == [stale["_id"]]
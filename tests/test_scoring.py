@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from scoring import CandidateMatrix, StreamingTopK, top_k_indices
+
+
+def test_streaming_top_k_collapses_duplicates_within_a_batch():
+    top = StreamingTopK(2)
+    top.add_batch(np.array([90.0, 90.0, 80.0]), np.array([90.0, 90.0, 80.0]), ["A", "B", "C"], ["g", "g", "c"])
+    assert top.results() == [(["A", "B"], 90.0, 90.0), (["C"], 80.0, 80.0)]
+
+
+def test_streaming_top_k_collapses_duplicates_across_batches():
+    top = StreamingTopK(2)
+    top.add_batch(np.array([90.0]), np.array([90.0]), ["A"], ["g"])
+    top.add_batch(np.array([90.0, 80.0]), np.array([90.0, 80.0]), ["B", "C"], ["g", "c"])
+    assert top.results() == [(["A", "B"], 90.0, 90.0), (["C"], 80.0, 80.0)]
+
+
+def baseline_top_k(sim, success, payloads, group_keys, k):
+    """Group by PDF in arrival order, rank each group on its first record, stable sort."""
+    groups = {}
+    for i, (payload, gk) in enumerate(zip(payloads, group_keys)):
+        groups.setdefault(gk, [i, []])[1].append(payload)
+    ranked = sorted(groups.values(), key=lambda g: (success[g[0]], sim[g[0]]), reverse=True)[:k]
+    return [(members, float(sim[i]), float(success[i])) for i, members in ranked]
+
+
+def test_top_k_indices_keeps_tie_order():
+    key = np.array([3, 5, 5, 1, 5, 3, 0])
+    for k in range(len(key) + 2):
+        assert top_k_indices(key, k).tolist() == sorted(range(len(key)), key=lambda i: -key[i])[:k]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_streaming_top_k_matches_baseline_sort(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 400))
+    # few distinct scores so ties are common; a third of the records repeat an earlier PDF
+    sim = np.round(rng.integers(0, 8, size=n) * 12.5, 1)
+    success = np.round(rng.integers(0, 4, size=n) * 25.0, 1)
+    group_keys = list(range(n))
+    for i in range(1, n):
+        if rng.random() < 0.33:
+            j = int(rng.integers(i))
+            group_keys[i] = group_keys[j]
+            sim[i], success[i] = sim[j], success[j]
+    payloads = [f"r{i}" for i in range(n)]
+    k, batch = int(rng.integers(1, 60)), int(rng.integers(1, 80))
+
+    top = StreamingTopK(k)
+    for s in range(0, n, batch):
+        top.add_batch(sim[s:s + batch], success[s:s + batch], payloads[s:s + batch], group_keys[s:s + batch])
+    assert top.results() == baseline_top_k(sim, success, payloads, group_keys, k)
+
+
+def test_candidate_matrix_top_k_matches_baseline_sort():
+    rng = np.random.default_rng(0)
+    jd = rng.normal(size=16).astype(np.float32)
+    jd /= np.linalg.norm(jd)
+    base = rng.normal(size=(5, 16)).astype(np.float32)
+    base /= np.linalg.norm(base, axis=1, keepdims=True)
+    rows = [(i, base[i % 5], ["python", "sql"][: i % 3]) for i in range(40)]
+    matrix = CandidateMatrix.build(rows, 16)
+    sim, success = matrix.score(jd, {"python", "sql", "aws"})
+    ranked = sorted(range(40), key=lambda i: (success[i], sim[i]), reverse=True)[:12]
+    assert matrix.top_k(jd, {"python", "sql", "aws"}, 12) == [(i, float(sim[i]), float(success[i])) for i in ranked]
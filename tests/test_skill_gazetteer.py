@@ -0,0 +1,17 @@
+from skill_gazetteer import ALIASES, GazetteerExtractor
+
+
+def test_everyday_words_are_not_skills():
+    text = "I go to the node of the graph, boost sales, excel at teamwork and git ts js things."
+    assert GazetteerExtractor().extract(text) == set()
+
+
+def test_technology_spellings_still_match():
+    text = "Skills: Go, Node, Git, JS, TS, Excel, Boost, Node.js, React.js, Python, AWS, C++, RoR, PostgreSQL"
+    assert GazetteerExtractor().extract(text) == {
+        "go", "node.js", "git", "javascript", "typescript", "excel", "boost", "react", "python", "aws", "c++",
+        "rails", "postgresql"}
+
+
+def test_aliases_all_rename():
+    assert all(alias != skill for alias, skill in ALIASES.items())
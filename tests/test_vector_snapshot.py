@@ -0,0 +1,122 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from bson import ObjectId
+
+from tests.test_ranking import make_pool
+from vector_snapshot import SnapshotWriter, VectorSnapshot
+
+DIM = 4
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def vecs(rng, n: int = 1) -> np.ndarray:
+    # float16-exact values, so reads compare equal
+    return rng.integers(-8, 8, size=(n, DIM)).astype(np.float32) / 8
+
+
+def write(snap: VectorSnapshot, records, tag: str = "model@1", rebuild: bool = False):
+    with snap.writer(tag, rebuild=rebuild) as w:
+        for oid, at, v in records:
+            w.add(oid, at, v)
+
+
+def read(snap: VectorSnapshot, oids: list[ObjectId]) -> list:
+    view = snap.open()
+    return view.vectors_of(view.lookup(oids))
+
+
+def test_incremental_refresh_appends_and_commits(tmp_path):
+    rng = np.random.default_rng(0)
+    snap = VectorSnapshot(str(tmp_path), DIM)
+    first = [(ObjectId(), T0 + timedelta(seconds=i), vecs(rng, i + 1)) for i in range(3)]
+    write(snap, first)
+    assert snap.open().meta["since"] == (T0 + timedelta(seconds=2)).timestamp()
+
+    second = [(ObjectId(), T0 + timedelta(seconds=10 + i), vecs(rng)) for i in range(2)]
+    write(snap, first + second)   # a refresh re-reads behind its watermark: known versions are skipped
+    view = snap.open()
+    assert len(view) == 5 and view.meta["vectors"] == 1 + 2 + 3 + 2
+    for (oid, _, v), got in zip(first + second, read(snap, [r[0] for r in first + second])):
+        np.testing.assert_array_equal(got, v)
+
+
+def test_reembedded_record_shadows_its_old_row(tmp_path, monkeypatch):
+    monkeypatch.setattr(SnapshotWriter, "SORT_TAIL", 2)
+    rng = np.random.default_rng(1)
+    snap = VectorSnapshot(str(tmp_path), DIM)
+    oid, old, new = ObjectId(), vecs(rng, 2), vecs(rng, 3)
+    write(snap, [(oid, T0, old)] + [(ObjectId(), T0, vecs(rng)) for _ in range(4)])
+    assert snap.open().meta["sorted_upto"] == 5   # the old row is in the sorted part
+
+    write(snap, [(oid, T0 + timedelta(hours=1), new)])
+    assert snap.open().meta["sorted_upto"] == 5   # the new one is in the tail, and wins
+    np.testing.assert_array_equal(read(snap, [oid])[0], new)
+
+    write(snap, [(ObjectId(), T0, vecs(rng)) for _ in range(3)])
+    assert snap.open().meta["sorted_upto"] == 9   # re-sorted: the latest duplicate is kept
+    np.testing.assert_array_equal(read(snap, [oid])[0], new)
+    assert len(snap.open().order) == 8
+
+
+def test_lookup_covers_sorted_part_and_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(SnapshotWriter, "SORT_TAIL", 4)
+    rng = np.random.default_rng(2)
+    snap = VectorSnapshot(str(tmp_path), DIM)
+    sorted_part = [(ObjectId(), T0, vecs(rng)) for _ in range(10)]
+    tail = [(ObjectId(), T0, vecs(rng)) for _ in range(3)]
+    write(snap, sorted_part)
+    write(snap, tail)
+    view = snap.open()
+    assert view.meta["sorted_upto"] == 10 and len(view) == 13
+
+    unknown = ObjectId()
+    oids = [tail[1][0], sorted_part[7][0], unknown, sorted_part[0][0], tail[0][0]]
+    assert view.lookup(oids).tolist() == [11, 7, -1, 0, 10]
+    got = read(snap, oids)
+    assert got[2] is None
+    np.testing.assert_array_equal(got[0], tail[1][2])
+    np.testing.assert_array_equal(got[1], sorted_part[7][2])
+
+
+def test_tag_change_starts_a_new_generation(tmp_path):
+    rng = np.random.default_rng(3)
+    snap = VectorSnapshot(str(tmp_path), DIM)
+    kept = (ObjectId(), T0, vecs(rng))
+    write(snap, [kept, (ObjectId(), T0, vecs(rng))], tag="model@1")
+    assert snap.open().meta["gen"] == 1
+
+    write(snap, [kept], tag="model@2")
+    view = snap.open()
+    assert view.meta["gen"] == 2 and view.meta["tag"] == "model@2" and len(view) == 1
+    assert not [f for f in os.listdir(tmp_path) if f.startswith("g1.")]
+
+    write(snap, [], tag="model@2", rebuild=True)
+    assert snap.open().meta["gen"] == 3 and len(snap.open()) == 0
+
+
+def test_commit_drops_bytes_a_crashed_writer_left(tmp_path):
+    rng = np.random.default_rng(4)
+    snap = VectorSnapshot(str(tmp_path), DIM)
+    first = (ObjectId(), T0, vecs(rng))
+    write(snap, [first])
+    for ext in ("vec", "off", "ids", "at"):
+        with open(tmp_path / f"g1.{ext}", "ab") as f:
+            f.write(b"\xff" * 40)   # appended, never committed
+
+    second = (ObjectId(), T0 + timedelta(seconds=1), vecs(rng, 2))
+    write(snap, [second])
+    assert os.path.getsize(tmp_path / "g1.vec") == 3 * DIM * 2
+    got = read(snap, [first[0], second[0]])
+    np.testing.assert_array_equal(got[0], first[2])
+    np.testing.assert_array_equal(got[1], second[2])
+
+
+def test_refresh_from_mongo_matches_stored_vectors(webapp, db):
+    make_pool(webapp, 30)
+    webapp.refresh_vector_snapshot(db.candidates())
+    docs = list(db.candidates().find({}))
+    view = webapp.vector_snapshot.open()
+    for d, got in zip(docs, view.vectors_of(view.lookup([d["_id"] for d in docs]))):
+        np.testing.assert_allclose(got, webapp.stored_vectors(d), atol=1e-3)
@@ -0,0 +1,220 @@
+"""
+Local, memory-mapped snapshot of the vectors resumes are scored with. A full /match scan
+reads them from the page cache, mapped read-only and shared by every worker process,
+instead of pulling them from MongoDB. The snapshot is append-only, refreshed
+incrementally from `embedded_at`, and opening it only maps files.
+
+One directory holds:
+  meta.json        counts, the embedded_at watermark, the generation and the vector tag
+  g{gen}.vec       float16 vectors; a record owns rows off[i]:off[i+1] (several when chunked)
+  g{gen}.off       int64 offsets, records + 1 of them
+  g{gen}.ids       12-byte ObjectIds, one per record (a re-embedded record is appended again)
+  g{gen}.at        float64 embedded_at (epoch seconds) per record
+  g{gen}.ord{n}    int64 rows of the first n records sorted by id, latest duplicate kept
+
+Only rows counted in meta.json are visible, so readers never see a half-written append.
+"""
+import fcntl
+import glob
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+from bson import ObjectId
+
+EMPTY_META = {"gen": 0, "tag": None, "records": 0, "vectors": 0, "sorted_upto": 0, "ordered": 0, "since": None}
+
+
+def epoch(dt: datetime) -> float:
+    """Seconds since the epoch; naive datetimes (as pymongo returns them) are UTC."""
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class SnapshotView:
+    """One consistent, read-only state of the snapshot; a scan keeps using the view it started with."""
+
+    def __init__(self, path: str, dim: int, meta: dict):
+        self.meta = meta
+        m, n = meta, meta["records"]
+
+        def mm(ext: str, dtype, shape: tuple) -> np.ndarray:
+            if not shape[0]:
+                return np.zeros(shape, dtype=dtype)
+            return np.memmap(os.path.join(path, f"g{m['gen']}.{ext}"), dtype=dtype, mode="r", shape=shape)
+
+        self.vectors = mm("vec", np.float16, (m["vectors"], dim))
+        self.offsets = mm("off", np.int64, (n + 1,)) if n else np.zeros(1, dtype=np.int64)
+        self.ids = mm("ids", np.uint8, (n, 12))
+        self.at = mm("at", np.float64, (n,))
+        self.order = mm(f"ord{m['sorted_upto']}", np.int64, (m["ordered"],))
+        self._sorted_ids = None
+        # records appended since the last sort are few: looked up through a dict
+        self._tail = {self.ids[r].tobytes(): r for r in range(m["sorted_upto"], n)}
+
+    def __len__(self):
+        return self.meta["records"]
+
+    def lookup(self, ids: list[ObjectId]) -> np.ndarray:
+        """Latest record row per id, -1 where the snapshot doesn't have it."""
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        keys = [oid.binary for oid in ids]
+        if len(self.order) and keys:
+            if self._sorted_ids is None:
+                self._sorted_ids = self.ids.view("S12").reshape(-1)[self.order]
+            q = np.array(keys, dtype="S12")
+            pos = np.minimum(np.searchsorted(self._sorted_ids, q), len(self.order) - 1)
+            hit = self._sorted_ids[pos] == q
+            rows[hit] = self.order[pos[hit]]
+        for i, key in enumerate(keys):
+            row = self._tail.get(key)
+            if row is not None:
+                rows[i] = row
+        return rows
+
+    def vectors_of(self, rows: np.ndarray) -> list[np.ndarray | None]:
+        """(vectors x dim) float32 matrix per record row, None for -1."""
+        return [np.asarray(self.vectors[self.offsets[r]:self.offsets[r + 1]], dtype=np.float32) if r >= 0
+                else None for r in rows]
+
+
+class VectorSnapshot:
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self._stamp = None
+        os.makedirs(path, exist_ok=True)
+        self.view = SnapshotView(path, dim, dict(EMPTY_META))
+
+    @property
+    def meta(self) -> dict:
+        return self.view.meta
+
+    def _file(self, ext: str, gen: int) -> str:
+        return os.path.join(self.path, f"g{gen}.{ext}")
+
+    def open(self) -> SnapshotView:
+        """The latest committed state (a stat when nothing changed since the last call)."""
+        meta_path = os.path.join(self.path, "meta.json")
+        try:
+            st = os.stat(meta_path)
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            try:
+                with open(meta_path) as f:
+                    self.view = SnapshotView(self.path, self.dim, {**EMPTY_META, **json.load(f)})
+            except (OSError, ValueError):
+                # a writer replaced files under us: serve nothing and retry on the next call
+                self.view, stamp = SnapshotView(self.path, self.dim, dict(EMPTY_META)), None
+            self._stamp = stamp
+        return self.view
+
+    # -- writing ------------------------------------------------------------------------------------------
+    @contextmanager
+    def writer(self, tag: str, rebuild: bool = False, blocking: bool = True):
+        """
+        The single writer across processes: yields a SnapshotWriter whose appends are
+        committed on exit, or None if another process holds the lock and blocking is False.
+        A different tag (model or chunking change) or `rebuild` starts a new, empty generation.
+        """
+        with open(os.path.join(self.path, "lock"), "a+") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield None
+                return
+            try:
+                self.open()
+                w = SnapshotWriter(self, tag, rebuild or self.meta["tag"] != tag)
+                yield w
+                w.commit()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class SnapshotWriter:
+    SORT_TAIL = 4096   # re-sort once this many records (or 5%) have been appended unsorted
+
+    def __init__(self, snap: VectorSnapshot, tag: str, fresh: bool):
+        self.snap = snap
+        self.meta = dict(snap.meta)
+        if fresh:
+            self.meta = {**EMPTY_META, "gen": snap.meta["gen"] + 1, "tag": tag}
+        self.fresh = fresh
+        self._ids, self._at, self._counts, self._vecs = [], [], [], []
+        self._newest = self.meta["since"]
+
+    @property
+    def since(self) -> float | None:
+        """Watermark: embedded_at of the newest record committed so far (None when empty)."""
+        return self.meta["since"]
+
+    def add(self, oid: ObjectId, embedded_at: datetime, vectors: np.ndarray):
+        """Append a record's vectors unless the snapshot already has this exact version of it."""
+        at = epoch(embedded_at)
+        if not self.fresh:
+            view = self.snap.view
+            row = view.lookup([oid])[0]
+            if row >= 0 and view.at[row] == at:
+                return
+        vectors = np.atleast_2d(vectors)
+        self._ids.append(oid.binary)
+        self._at.append(at)
+        self._counts.append(len(vectors))
+        self._vecs.append(vectors)
+        self._newest = at if self._newest is None else max(self._newest, at)
+
+    def _append(self, ext: str, data: bytes, committed: int):
+        with open(self.snap._file(ext, self.meta["gen"]), "ab") as f:
+            f.truncate(committed)   # drop whatever a crashed writer left past the last commit
+            f.write(data)
+
+    def commit(self):
+        """Make the appended records visible; may be called repeatedly to bound memory on large refreshes."""
+        m, n = self.meta, self.meta["records"]
+        if self._ids:
+            counts = np.asarray(self._counts, dtype=np.int64)
+            offsets = m["vectors"] + np.cumsum(counts)
+            if n == 0:
+                offsets = np.concatenate([[0], offsets])
+            self._append("vec", np.vstack(self._vecs).astype(np.float16).tobytes(), m["vectors"] * self.snap.dim * 2)
+            self._append("off", offsets.astype(np.int64).tobytes(), (n + 1) * 8 if n else 0)
+            self._append("ids", b"".join(self._ids), n * 12)
+            self._append("at", np.asarray(self._at, dtype=np.float64).tobytes(), n * 8)
+            m.update(records=n + len(self._ids), vectors=int(m["vectors"] + counts.sum()), since=self._newest)
+            self._ids, self._at, self._counts, self._vecs = [], [], [], []
+        elif not self.fresh:
+            return
+
+        if m["records"] - m["sorted_upto"] > max(self.SORT_TAIL, m["records"] // 20):
+            self._sort()
+        tmp = os.path.join(self.snap.path, f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(m, f)
+        os.replace(tmp, os.path.join(self.snap.path, "meta.json"))
+        self._cleanup()
+        self.snap.open()
+
+    def _sort(self):
+        m = self.meta
+        ids = np.fromfile(self.snap._file("ids", m["gen"]), dtype="S12", count=m["records"])
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        # equal ids sort in append order: keep the last, i.e. the latest embedding
+        order = order[np.append(ids[1:] != ids[:-1], True)]
+        order.astype(np.int64).tofile(self.snap._file(f"ord{m['records']}", m["gen"]))
+        m.update(sorted_upto=m["records"], ordered=len(order))
+
+    def _cleanup(self):
+        """Remove older generations and sort orders; processes that still map them keep their inodes."""
+        keep = {f"ord{self.meta['sorted_upto']}", f"ord{self.snap.meta['sorted_upto']}"}
+        for path in glob.glob(os.path.join(self.snap.path, "g*.*")):
+            gen, ext = os.path.basename(path)[1:].split(".", 1)
+            if int(gen) < self.meta["gen"] or (ext.startswith("ord") and ext not in keep):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass